@@ -1,10 +1,17 @@
+import os
+
 import dash
 from dash import dcc, html, Input, Output
-import yfinance as yf
+
+from services.instrumentation import instrumented, register_metrics_routes
+from services.ticker_service import TickerService, replay_download
 
 # === INITIALISATION ===
 app = dash.Dash(__name__,use_pages=True, suppress_callback_exceptions=True, external_stylesheets=[  "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.0/css/all.min.css" ])
 app.title = "TradeLux - Plateforme de Trading"
+# /metrics (Prometheus) : durées par callback et par étape, caches, fournisseurs de données.
+# PROFILE_SAMPLING=1 active en plus le profileur par échantillonnage (/metrics/profile)
+register_metrics_routes(app.server)
 
 # === TICKERS ===
 TICKERS = {
@@ -16,24 +23,21 @@ TICKERS = {
 }
 
 # === RÉCUPÉRATION DONNÉES ===
+# Un seul téléchargement groupé toutes les 5 minutes, partagé par tous les visiteurs
+def ticker_download():
+    """TICKER_REPLAY=1 : cotations rejouées depuis les partitions ALL_CLEANED (hors-ligne, tests de charge)."""
+    if os.getenv("TICKER_REPLAY") != "1":
+        return None
+    from services.data_store import load_partitions
+    return replay_download(load_partitions("Data/ALL_CLEANED.csv", "ALL_CLEANED", parse_dates=["date"]))
+
+ticker_service = TickerService(TICKERS, refresh_seconds=5*60, download=ticker_download())
+ticker_service.start()
+
 def fetch_ticker_data():
-    data = []
-    for symbol, label in TICKERS.items():
-        try:
-            stock = yf.Ticker(symbol)
-            hist = stock.history(period="1d", interval="1m")
-            if len(hist) >= 2:
-                current = hist['Close'].iloc[-1]
-                prev = hist['Close'].iloc[-2]
-                change = (current - prev) / prev * 100
-                change_str = f"up {change:.2f}%" if change > 0 else f"down {abs(change):.2f}%"
-                change_class = "up" if change > 0 else "down"
-                data.append({"label": label, "value": f"{current:,.2f}", "change": change_str, "class": change_class})
-            else:
-                data.append({"label": label, "value": "N/A", "change": "down 0.0%", "class": "down"})
-        except:
-            data.append({"label": label, "value": "ERR", "change": "down 0.0%", "class": "down"})
-    return data
+    # Jamais d'attente dans un worker : au démarrage à froid, le bandeau affiche N/A
+    # jusqu'au premier rafraîchissement en arrière-plan (repris au prochain tick)
+    return ticker_service.snapshot()
 
 # === LAYOUT COMPLET (TOUT DEDANS) ===
 app.layout = html.Div([
@@ -77,6 +81,7 @@ app.layout = html.Div([
     Output("page-transition", "className"),
     Input("url", "pathname")
 )
+@instrumented
 def control_layout(pathname):
     if pathname == "/":
         return (
@@ -102,6 +107,7 @@ def control_layout(pathname):
     Output("ticker-inner", "children"),
     Input("interval-component", "n_intervals")
 )
+@instrumented
 def update_ticker(n):
     data = fetch_ticker_data()
     items = [  
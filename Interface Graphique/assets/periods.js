@@ -0,0 +1,216 @@
+// === PÉRIODES CÔTÉ NAVIGATEUR (mode CLIENTSIDE_PERIODS=1) ===
+// Le serveur envoie une fois par version l'historique complet de chaque symbole
+// (store "series-cache") et celui des oscillateurs cochés (store "oscillator-series") ;
+// changer de période, de symbole ou de courbes superposées ne fait que découper les
+// séries en cache et reconstruire les figures ici, sans aller-retour serveur.
+(function () {
+    var PRICE_OVERLAYS = [
+        {toggle: "ma20", name: "MA 20", line: {color: "#ffb000", width: 1.5}},
+        {toggle: "ma50", name: "MA 50", line: {color: "#b266ff", width: 1.5}},
+        {toggle: "bollinger", name: "Bollinger haut", line: {color: "rgba(230,255,255,0.5)", width: 1}},
+        {toggle: "bollinger", name: "Bollinger bas", line: {color: "rgba(230,255,255,0.5)", width: 1}}
+    ];
+
+    function pad(n) {
+        return (n < 10 ? "0" : "") + n;
+    }
+
+    // Jour local au format ISO (comme pd.Timestamp.today() côté serveur)
+    function isoDay(date) {
+        return date.getFullYear() + "-" + pad(date.getMonth() + 1) + "-" + pad(date.getDate());
+    }
+
+    // Premier indice dont la date est postérieure au jour de coupure (recherche dichotomique)
+    function firstAfter(x, day) {
+        var lo = 0, hi = x.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (x[mid].slice(0, 10) > day) {
+                hi = mid;
+            } else {
+                lo = mid + 1;
+            }
+        }
+        return lo;
+    }
+
+    // Jour de coupure de la période (null : historique complet)
+    function cutoffDay(period, config) {
+        var days = config.days[period];
+        if (days === undefined) {
+            return null;
+        }
+        var cutoff = new Date();
+        cutoff.setDate(cutoff.getDate() - days);
+        return isoDay(cutoff);
+    }
+
+    // Début de la semaine (lundi), du mois ou du trimestre : mêmes règles que downsample_ohlc
+    // (DOWNSAMPLE_RULES), partagées avec streaming.js pour prolonger les bougies agrégées
+    var RULES = ["W-MON", "MS", "QS"];
+    var BUCKETS = window.ohlcBuckets = {
+        "W-MON": function (d) {
+            var date = new Date(d.slice(0, 10) + "T00:00:00");
+            date.setDate(date.getDate() - (date.getDay() + 6) % 7);
+            return isoDay(date);
+        },
+        "MS": function (d) {
+            return d.slice(0, 7) + "-01";
+        },
+        "QS": function (d) {
+            var month = Math.floor((parseInt(d.slice(5, 7), 10) - 1) / 3) * 3 + 1;
+            return d.slice(0, 5) + pad(month) + "-01";
+        }
+    };
+
+    function aggregate(s, bucket) {
+        var out = {x: [], open: [], high: [], low: [], close: []};
+        var current = null;
+        for (var i = 0; i < s.x.length; i++) {
+            if (s.close[i] === null) {
+                continue;
+            }
+            var key = bucket(s.x[i]);
+            if (key !== current) {
+                current = key;
+                out.x.push(key);
+                out.open.push(s.open[i]);
+                out.high.push(s.high[i]);
+                out.low.push(s.low[i]);
+                out.close.push(s.close[i]);
+            } else {
+                var j = out.x.length - 1;
+                out.high[j] = Math.max(out.high[j], s.high[i]);
+                out.low[j] = Math.min(out.low[j], s.low[i]);
+                out.close[j] = s.close[i];
+            }
+        }
+        return out;
+    }
+
+    function downsample(s, maxPoints) {
+        if (s.x.length <= maxPoints) {
+            return s;
+        }
+        var out = s;
+        for (var k = 0; k < RULES.length; k++) {
+            out = aggregate(s, BUCKETS[RULES[k]]);
+            out.rule = RULES[k];
+            if (out.x.length <= maxPoints) {
+                break;
+            }
+        }
+        return out;
+    }
+
+    // Mise en page de build_price_figure, modèle plotly_dark résolu par le serveur
+    function layout(config) {
+        return JSON.parse(JSON.stringify(config.layout));
+    }
+
+    function message(text, config) {
+        var fig = {data: [], layout: layout(config)};
+        fig.layout.annotations = [{text: text, x: 0.5, y: 0.5, showarrow: false}];
+        return fig;
+    }
+
+    function figure(entry, symbol, start, toggles, config) {
+        var maxCandles = config.max_candles;
+        var n = entry.x.length - start;
+        var stride = Math.max(Math.floor(n / maxCandles), 1);
+        var s = downsample({
+            x: entry.x.slice(start),
+            open: entry.open.slice(start),
+            high: entry.high.slice(start),
+            low: entry.low.slice(start),
+            close: entry.close.slice(start)
+        }, maxCandles);
+
+        var data = [{
+            type: "candlestick", x: s.x, open: s.open, high: s.high, low: s.low, close: s.close,
+            name: symbol, meta: {resampled: s.rule || false},
+            increasing: {line: {color: "green"}, fillcolor: "rgba(0,255,0,0.6)"},
+            decreasing: {line: {color: "red"}, fillcolor: "rgba(255,0,0,0.6)"}
+        }];
+
+        // Traces 1..4 : courbes superposées, visibles selon les cases cochées
+        PRICE_OVERLAYS.forEach(function (overlay, k) {
+            var x = [], y = [];
+            for (var i = start; i < entry.x.length; i += stride) {
+                x.push(entry.x[i]);
+                y.push(entry.overlays[k][i]);
+            }
+            data.push({
+                type: "scatter", mode: "lines", x: x, y: y, name: overlay.name, line: overlay.line,
+                visible: toggles.indexOf(overlay.toggle) >= 0, hoverinfo: "x+y"
+            });
+        });
+
+        var forecast = entry.forecast;
+        if (forecast) {
+            var lastX = s.x[s.x.length - 1], lastClose = s.close[s.close.length - 1];
+            var x = [lastX].concat(forecast.x);
+            data.push({
+                type: "scatter", mode: "lines", x: x, y: [lastClose].concat(forecast.upper),
+                line: {width: 0}, hoverinfo: "skip", showlegend: false
+            });
+            data.push({
+                type: "scatter", mode: "lines", x: x, y: [lastClose].concat(forecast.lower),
+                line: {width: 0}, fill: "tonexty", fillcolor: "rgba(0,240,255,0.15)",
+                name: "Intervalle 10-90 %"
+            });
+            data.push({
+                type: "scatter", mode: "lines", x: x, y: [lastClose].concat(forecast.forecast),
+                line: {color: "#00f0ff", dash: "dash"}, name: "Prévision IA"
+            });
+        }
+        return {data: data, layout: layout(config)};
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        periods: {
+            render: function (cache, symbol, period, toggles, currentKey, config) {
+                var no_update = window.dash_clientside.no_update;
+                var entry = cache && cache[symbol];
+                if (!entry) {
+                    // Série pas encore reçue : rendue dès que le serveur l'aura envoyée
+                    return [no_update, no_update];
+                }
+                toggles = (toggles || []).slice().sort();
+                var key = [symbol, period, entry.last, isoDay(new Date()), entry.forecast_version, toggles.join(",")];
+                if (currentKey && currentKey.join("|") === key.join("|")) {
+                    // Mise à jour du cache pour un autre symbole : figure affichée inchangée
+                    return [no_update, no_update];
+                }
+
+                var start = 0;
+                var day = cutoffDay(period, config);
+                if (day !== null) {
+                    start = firstAfter(entry.x, day);
+                }
+                if (start >= entry.x.length) {
+                    return [message("Aucune donnée pour la période sélectionnée", config), key];
+                }
+                return [figure(entry, symbol, start, toggles, config), key];
+            },
+
+            // Oscillateurs (historique complet envoyé par le serveur) découpés à la période
+            oscillators: function (series, period, config) {
+                if (!series) {
+                    return window.dash_clientside.no_update;
+                }
+                var day = cutoffDay(period, config);
+                if (day === null) {
+                    return series;
+                }
+                return {
+                    data: series.data.map(function (trace) {
+                        var start = firstAfter(trace.x, day);
+                        return Object.assign({}, trace, {x: trace.x.slice(start), y: trace.y.slice(start)});
+                    }),
+                    layout: series.layout
+                };
+            }
+        }
+    });
+})();
@@ -0,0 +1,109 @@
+// === STREAMING DES BOUGIES (mode STREAMING_MODE=1) ===
+// Une connexion SSE par onglet vers /stream/candles/<symbole> : le serveur ne pousse
+// que les nouvelles barres (et la barre en cours quand elle change), appliquées à la
+// figure affichée par un Patch : bougies ajoutées, dernière bougie remplacée à son indice.
+(function () {
+    // Date ISO comparable quel que soit le format reçu (jour seul, espace ou "T")
+    function isoTime(x) {
+        var s = String(x).replace(" ", "T");
+        return (s.length === 10 ? s + "T00:00:00" : s).slice(0, 19);
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        streaming: {
+            subscribe: function (symbol) {
+                var state = window._candleStream || (window._candleStream = {});
+                if (state.symbol === symbol && state.source) {
+                    return window.dash_clientside.no_update;
+                }
+                if (state.source) {
+                    state.source.close();
+                }
+                state.symbol = symbol;
+                state.source = null;
+                if (!symbol) {
+                    return "";
+                }
+                state.source = new EventSource("/stream/candles/" + encodeURIComponent(symbol));
+                state.source.onmessage = function (event) {
+                    window.dash_clientside.set_props("stream-bars", {data: JSON.parse(event.data)});
+                };
+                return symbol;
+            },
+
+            extend: function (bars, symbol, figure) {
+                var dc = window.dash_clientside;
+                if (!bars || bars.symbol !== symbol || !bars.x.length) {
+                    return dc.no_update;
+                }
+                // Trace des bougies telle qu'affichée (listes simples, Patchs précédents compris)
+                var trace = figure && figure.data && figure.data[0];
+                if (!trace || !Array.isArray(trace.x) || !trace.x.length || !Array.isArray(trace.close)) {
+                    return dc.no_update;
+                }
+                // Bougies agrégées : une barre journalière est repliée dans la bougie de sa période
+                var rule = trace.meta && trace.meta.resampled;
+                var bucket = rule && window.ohlcBuckets && window.ohlcBuckets[rule];
+                if (rule && !bucket) {
+                    return dc.no_update;
+                }
+                var key = function (x) {
+                    return bucket ? bucket(isoTime(x)) : x;
+                };
+
+                var index = trace.x.length - 1;
+                var last = isoTime(trace.x[index]);
+                var candle = {x: trace.x[index], open: trace.open[index], high: trace.high[index],
+                              low: trace.low[index], close: trace.close[index]};
+                var added = [];
+                var changed = false;
+                for (var i = 0; i < bars.x.length; i++) {
+                    var x = key(bars.x[i]);
+                    if (isoTime(x) < last) {
+                        continue;
+                    }
+                    var bar = {x: x, open: bars.open[i], high: bars.high[i], low: bars.low[i], close: bars.close[i]};
+                    var current = added.length ? added[added.length - 1] : candle;
+                    if (isoTime(x) !== isoTime(current.x)) {
+                        added.push(bar);
+                    } else if (bucket) {
+                        current.high = Math.max(current.high, bar.high);
+                        current.low = Math.min(current.low, bar.low);
+                        current.close = bar.close;
+                        changed = changed || !added.length;
+                    } else if (added.length) {
+                        added[added.length - 1] = bar;
+                    } else {
+                        // Barre en cours : ses nouvelles valeurs remplacent la bougie affichée
+                        candle = bar;
+                        changed = true;
+                    }
+                }
+                if (changed) {
+                    changed = ["open", "high", "low", "close"].some(function (field) {
+                        return candle[field] !== trace[field][index];
+                    });
+                }
+                if (!changed && !added.length) {
+                    return dc.no_update;
+                }
+
+                var patch = new dc.Patch();
+                if (changed) {
+                    // Dernière bougie remplacée à son indice : les autres restent côté navigateur
+                    ["open", "high", "low", "close"].forEach(function (field) {
+                        patch.assign(["data", 0, field, index], candle[field]);
+                    });
+                }
+                if (added.length) {
+                    ["x", "open", "high", "low", "close"].forEach(function (field) {
+                        patch.extend(["data", 0, field], added.map(function (bar) {
+                            return bar[field];
+                        }));
+                    });
+                }
+                return patch.build();
+            }
+        }
+    });
+})();
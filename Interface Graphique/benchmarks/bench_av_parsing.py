@@ -0,0 +1,115 @@
+"""
+Micro-benchmark du parsing d'une réponse Alpha Vantage TIME_SERIES_INTRADAY (outputsize=full) :
+- "boucle"   : ancienne version, un dict + fromisoformat + float() par ligne
+- "colonnes" : parse_alpha_vantage, conversion colonnaire en bloc
+- "csv"      : parse_alpha_vantage_csv (datatype=csv), parseur C de pandas
+
+Par défaut une réponse enregistrée synthétique de --rows barres 1min est générée ;
+--payload <fichier.json> rejoue une vraie réponse enregistrée (JSON uniquement).
+
+Usage (depuis la racine du dépôt) :
+    python "Interface Graphique/benchmarks/bench_av_parsing.py" [--rows 20000] [--repeat 20]
+"""
+import argparse
+import datetime as dt
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+
+def recorded_payload(rows: int, seed: int = 0):
+    """Réponse au format Alpha Vantage (JSON et CSV), barres de la plus récente à la plus ancienne."""
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end="2025-12-05 20:00", periods=rows, freq="min")[::-1]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    open_ = close * np.exp(rng.normal(0, 0.0005, rows))
+    high = np.maximum(open_, close) * 1.001
+    low = np.minimum(open_, close) * 0.999
+    volume = rng.integers(100, 100_000, rows)
+    stamps = index.strftime("%Y-%m-%d %H:%M:%S")
+    series = {
+        ts: {"1. open": f"{o:.4f}", "2. high": f"{h:.4f}", "3. low": f"{lo:.4f}",
+             "4. close": f"{c:.4f}", "5. volume": str(v)}
+        for ts, o, h, lo, c, v in zip(stamps, open_, high, low, close, volume)
+    }
+    data = {"Meta Data": {"1. Information": "Intraday (1min) open, high, low, close prices and volume"},
+            "Time Series (1min)": series}
+    lines = ["timestamp,open,high,low,close,volume"]
+    lines += [f"{ts},{v['1. open']},{v['2. high']},{v['3. low']},{v['4. close']},{v['5. volume']}"
+              for ts, v in series.items()]
+    return json.dumps(data), "\n".join(lines) + "\n"
+
+
+def legacy_parse(data: dict, av_interval: str) -> pd.DataFrame:
+    rows = []
+    for ts_str, ohlc in data[f'Time Series ({av_interval})'].items():
+        try:
+            ts_dt = dt.datetime.fromisoformat(ts_str)
+        except Exception:
+            ts_dt = dt.datetime.strptime(ts_str, '%Y-%m-%d %H:%M:%S')
+        rows.append({
+            'Date': ts_dt,
+            'Open': float(ohlc['1. open']),
+            'High': float(ohlc['2. high']),
+            'Low': float(ohlc['3. low']),
+            'Close': float(ohlc['4. close']),
+            'Volume': float(ohlc['5. volume'])
+        })
+    df = pd.DataFrame(rows).set_index('Date').sort_index()
+    return df[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--payload", default=None)
+    args = parser.parse_args()
+
+    from services.market_data import parse_alpha_vantage, parse_alpha_vantage_csv
+
+    if args.payload:
+        with open(args.payload) as f:
+            json_text, csv_text = f.read(), None
+    else:
+        json_text, csv_text = recorded_payload(args.rows)
+    data = json.loads(json_text)
+    n = len(data["Time Series (1min)"])
+
+    reference = legacy_parse(data, "1min")
+    pd.testing.assert_frame_equal(parse_alpha_vantage(data, "1min"), reference, check_freq=False)
+    if csv_text is not None:
+        pd.testing.assert_frame_equal(parse_alpha_vantage_csv(csv_text), reference, check_freq=False)
+
+    # Le décodage JSON (json.loads) est commun aux deux premières variantes et exclu ici
+    timings = [
+        ("boucle", _best_of(lambda: legacy_parse(data, "1min"), args.repeat)),
+        ("colonnes", _best_of(lambda: parse_alpha_vantage(data, "1min"), args.repeat)),
+    ]
+    if csv_text is not None:
+        timings.append(("csv", _best_of(lambda: parse_alpha_vantage_csv(csv_text), args.repeat)))
+
+    print(f"{n} barres, JSON {len(json_text) / 1e6:.1f} Mo"
+          + (f", CSV {len(csv_text) / 1e6:.1f} Mo" if csv_text is not None else ""))
+    for name, t in timings:
+        print(f"{name:>9} : {t * 1000:8.2f} ms  (x{timings[0][1] / t:5.1f})")
+
+
+if __name__ == "__main__":
+    main()
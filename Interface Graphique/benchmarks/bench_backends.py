@@ -0,0 +1,87 @@
+"""
+Benchmark des backends d'inférence du LSTM (keras / onnx / tflite).
+Chaque backend est mesuré dans un processus neuf : temps de chargement
+(imports compris), latence par prédiction et mémoire du worker.
+
+Prérequis : modèles exportés via
+    PYTHONPATH="Interface Graphique" python -m services.model_export --format all
+
+Usage (depuis la racine du dépôt) :
+    python "Interface Graphique/benchmarks/bench_backends.py" [--calls 200]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(HERE)
+MODEL_PATH = "Modèle IA/global_lstm_returns.keras"
+
+
+def _child(backend, calls):
+    sys.path.insert(0, APP_DIR)
+    import numpy as np
+    from services.model_backends import load_backend
+    from services.model_export import feature_windows
+
+    # Fenêtres réelles (rendements), pas de bruit hors distribution
+    windows = feature_windows()
+
+    t0 = time.perf_counter()
+    model = load_backend(MODEL_PATH, backend)
+    load_s = time.perf_counter() - t0
+
+    latencies = {}
+    for batch in (1, 8):
+        # Fenêtres réparties sur tous les symboles
+        rows = np.linspace(0, len(windows[0]) - 1, batch).astype(int)
+        inputs = [np.ascontiguousarray(windows[0][rows]), windows[1][rows]]
+        model.predict_on_batch(inputs)  # premier appel (traçage/allocation) exclu
+        samples = []
+        for _ in range(calls):
+            t0 = time.perf_counter()
+            model.predict_on_batch(inputs)
+            samples.append(time.perf_counter() - t0)
+        samples.sort()
+        latencies[batch] = samples[len(samples) // 2]
+
+    print(json.dumps({
+        "backend": backend,
+        "load_s": load_s,
+        "p50_batch1_ms": latencies[1] * 1000,
+        "p50_batch8_ms": latencies[8] * 1000,
+        "tensorflow_loaded": "tensorflow" in sys.modules,
+        "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--backends", default="keras,onnx,tflite")
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.calls)
+        return
+
+    print(f"{'backend':>8} | {'chargement':>10} | {'p50 b=1':>8} | {'p50 b=8':>8} | {'RSS max':>8} | TF chargé")
+    for backend in args.backends.split(","):
+        proc = subprocess.run([sys.executable, __file__, "--child", backend, "--calls", str(args.calls)],
+                              capture_output=True, text=True)
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            print(f"{backend:>8} | indisponible : {proc.stderr.strip().splitlines()[-1] if proc.stderr else '?'}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{backend:>8} | {r['load_s'] * 1000:8.0f} ms | {r['p50_batch1_ms']:5.2f} ms | {r['p50_batch8_ms']:5.2f} ms"
+              f" | {r['maxrss_mb']:5.0f} MB | {r['tensorflow_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark du backtest walk-forward (tous les symboles de ALL_FEATURES) :
+- "boucle"     : une fenêtre copiée et un appel modèle par barre
+- "vectorisé"  : run_backtest, fenêtres sliding_window_view + un seul appel par symbole
+
+Usage (depuis la racine du dépôt) :
+    python "Interface Graphique/benchmarks/bench_backtest.py" [--backend onnx|keras|tflite]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+MODEL_PATH = os.path.join("Modèle IA", "global_lstm_returns.keras")
+
+
+def loop_predictions(model, close: np.ndarray, symbol_id: int) -> np.ndarray:
+    from services.model_inputs import to_model_input, window_closes
+    size = window_closes()
+    preds = []
+    for end in range(size, len(close) + 1):
+        window = to_model_input(close[end - size:end].reshape(1, size))
+        preds.append(np.ravel(model.predict_on_batch([window, np.array([[symbol_id]])]))[0])
+    return np.array(preds)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="onnx")
+    args = parser.parse_args()
+
+    from services.backtest import run_backtest
+    from services.data_store import load_partitions
+    from services.model_backends import load_backend
+    from services.model_inputs import SYMBOL_TO_ID, series_windows
+    from services.symbol_index import SymbolIndex
+
+    index = SymbolIndex(load_partitions(os.path.join("Data", "ALL_FEATURES.csv"), "ALL_FEATURES",
+                                        parse_dates=["date"]))
+    model = load_backend(MODEL_PATH, args.backend)
+    symbols = [s for s in index.symbols() if s in SYMBOL_TO_ID]
+    n_windows = sum(len(series_windows(index.get(s)["Close"].to_numpy())[0]) for s in symbols)
+
+    t0 = time.perf_counter()
+    loop = {s: loop_predictions(model, index.get(s)["Close"].to_numpy(), SYMBOL_TO_ID[s]) for s in symbols}
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for s in symbols:
+        run_backtest(index.get(s), SYMBOL_TO_ID[s], model.predict_on_batch)
+    t_vec = time.perf_counter() - t0
+
+    for s in symbols:
+        batched = np.ravel(model.predict_on_batch(
+            [series_windows(index.get(s)["Close"].to_numpy())[0], np.full((len(loop[s]), 1), SYMBOL_TO_ID[s])]))
+        np.testing.assert_allclose(batched, loop[s], rtol=1e-4, atol=1e-5)
+
+    print(f"{len(symbols)} symboles, {n_windows} fenêtres, backend {args.backend}")
+    print(f"{'boucle':>10} : {t_loop * 1000:9.1f} ms")
+    print(f"{'vectorisé':>10} : {t_vec * 1000:9.1f} ms  (x{t_loop / t_vec:.1f})")
+
+
+if __name__ == "__main__":
+    main()
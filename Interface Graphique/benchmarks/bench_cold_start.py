@@ -0,0 +1,72 @@
+"""
+Benchmark du démarrage à froid de app.py (import de l'application et de toutes
+les pages, comme le fait un worker gunicorn), dans un processus neuf à chaque mesure.
+
+--load-model mesure en plus le premier chargement du modèle LSTM
+(import de TensorFlow compris), qui n'est plus payé au démarrage.
+
+Usage (depuis la racine du dépôt) :
+    python "Interface Graphique/benchmarks/bench_cold_start.py" [--repeat 5] [--load-model]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(HERE)
+
+
+def _child(load_model):
+    sys.path.insert(0, APP_DIR)
+    t0 = time.perf_counter()
+    import app  # noqa: F401
+    import_s = time.perf_counter() - t0
+    tf_loaded = "tensorflow" in sys.modules
+
+    model_s = None
+    if load_model:
+        from services.model_registry import model_registry
+        t0 = time.perf_counter()
+        model_registry.get("lstm")
+        model_s = time.perf_counter() - t0
+
+    print(json.dumps({
+        "import_s": import_s,
+        "model_s": model_s,
+        "tensorflow_at_import": tf_loaded,
+        "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--load-model", action="store_true")
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.load_model)
+        return
+
+    cmd = [sys.executable, __file__, "--child"] + (["--load-model"] if args.load_model else [])
+    runs = [json.loads(subprocess.check_output(cmd, text=True).strip().splitlines()[-1]) for _ in range(args.repeat)]
+
+    print(f"import app      : {_median(r['import_s'] for r in runs) * 1000:8.1f} ms (médiane sur {len(runs)})")
+    print(f"TensorFlow importé au démarrage : {any(r['tensorflow_at_import'] for r in runs)}")
+    if args.load_model:
+        print(f"1er chargement modèle : {_median(r['model_s'] for r in runs) * 1000:8.1f} ms")
+    print(f"RSS max         : {_median(r['maxrss_mb'] for r in runs):8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Benchmark du chargement des données de pages/actions_page.py :
+- "csv"     : pd.read_csv + parsing des dates (comportement d'origine)
+- "store64" : partitions Arrow memory-mappées aux types par défaut (DATA_STORE_SCHEMA=0)
+- "store"   : partitions Arrow memory-mappées aux types compacts de data_store.SCHEMAS
+
+Chaque mode tourne dans un processus neuf pour mesurer le temps de chargement
+et la mémoire du worker. "anon" est la mémoire privée (dupliquée par chaque
+worker gunicorn) ; le reste du RSS en mode store est partagé via le page cache.
+"données" est la taille des colonnes de valeurs chargées (memory_usage(deep=True)),
+hors colonne symbole : absente des partitions, elle fausserait la comparaison.
+
+Les trois modes chargent les mêmes tables (celles dont le CSV existe) et les deux
+stores sont construits dans des répertoires temporaires (Data/store n'est pas touché).
+
+Usage (depuis la racine du dépôt) :
+    python "Interface Graphique/benchmarks/bench_data_loading.py" [--repeat 5] [--scale 50]
+
+--scale N duplique l'historique N fois (dates décalées) pour simuler des
+historiques multi-décennies comme ceux listés dans data_report.csv.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(HERE)
+
+DATA_DIR = os.getenv("BENCH_DATA_DIR", "Data")
+TABLES = [
+    (os.path.join(DATA_DIR, "ALL_CLEANED.csv"), "ALL_CLEANED"),
+    (os.path.join(DATA_DIR, "ALL_FEATURES.csv"), "ALL_FEATURES"),
+]
+
+
+def _memory_kb():
+    """{'Rss': kB, 'Anonymous': kB} pour le processus courant (Linux)."""
+    values = {"Rss": 0, "Anonymous": 0}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if parts[0][:-1] in values:
+                    values[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        pass
+    return values
+
+
+def _tables():
+    """Tables dont le CSV source existe : le même jeu pour tous les modes."""
+    return [(csv_path, table) for csv_path, table in TABLES if os.path.exists(csv_path)]
+
+
+def _data_kb(df):
+    return int(df.memory_usage(deep=True).drop(["Index", "symbol"], errors="ignore").sum()) // 1024
+
+
+def _child(mode):
+    sys.path.insert(0, APP_DIR)
+    import pandas as pd
+    from services.data_store import load_partitions
+
+    before = _memory_kb()
+    t0 = time.perf_counter()
+    tables = []
+    for csv_path, table in _tables():
+        if mode == "csv":
+            data = pd.read_csv(csv_path, parse_dates=["date"])
+        else:
+            data = load_partitions(csv_path, table, parse_dates=["date"])
+        tables.append((table, data))
+    elapsed = time.perf_counter() - t0
+    after = _memory_kb()
+    frames = [df for _, data in tables for df in (data.values() if isinstance(data, dict) else [data])]
+    print(json.dumps({
+        "tables": [name for name, _ in tables],
+        "load_s": elapsed,
+        "data_kb": sum(_data_kb(df) for df in frames),
+        "rss_kb": after["Rss"] - before["Rss"],
+        "anon_kb": after["Anonymous"] - before["Anonymous"],
+    }))
+
+
+def _scaled_copy(scale, out_dir):
+    """Écrit dans out_dir des CSV dont l'historique est répété `scale` fois."""
+    import pandas as pd
+    for csv_path, _ in _tables():
+        df = pd.read_csv(csv_path, parse_dates=["date"])
+        span = df["date"].max() - df["date"].min() + pd.Timedelta(days=1)
+        copies = [df.assign(date=df["date"] - span * k) for k in range(scale)]
+        pd.concat(copies, ignore_index=True).to_csv(
+            os.path.join(out_dir, os.path.basename(csv_path)), index=False
+        )
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    env = dict(os.environ)
+    tmp_dir = None
+    if args.scale > 1:
+        tmp_dir = tempfile.TemporaryDirectory()
+        _scaled_copy(args.scale, tmp_dir.name)
+        env["BENCH_DATA_DIR"] = tmp_dir.name
+
+    # Un répertoire par variante : les deux stores coexistent (chacun serait sinon reconstruit
+    # par l'autre, le schéma faisant partie de la fraîcheur) sans toucher à Data/store
+    store64_dir, store_dir = tempfile.TemporaryDirectory(), tempfile.TemporaryDirectory()
+    envs = {
+        "csv": env,
+        "store64": dict(env, DATA_STORE_SCHEMA="0", DATA_STORE_DIR=store64_dir.name),
+        "store": dict(env, DATA_STORE_DIR=store_dir.name),
+    }
+
+    # Construction préalable du store pour ne mesurer que le chargement
+    build = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from services.data_store import build_store;"
+        "build_store(sys.argv[2], sys.argv[3], parse_dates=['date'])"
+    )
+    data_dir = env.get("BENCH_DATA_DIR", DATA_DIR)
+    for csv_path, table in TABLES:
+        csv_path = os.path.join(data_dir, os.path.basename(csv_path))
+        if os.path.exists(csv_path):
+            for mode in ("store64", "store"):
+                subprocess.check_call([sys.executable, "-c", build, APP_DIR, csv_path, table], env=envs[mode])
+
+    for mode, mode_env in envs.items():
+        runs = [
+            json.loads(subprocess.check_output([sys.executable, __file__, "--child", mode], text=True, env=mode_env))
+            for _ in range(args.repeat)
+        ]
+        print(f"{mode:>7} | {','.join(runs[0]['tables'])} | chargement {_median(r['load_s'] for r in runs) * 1000:7.1f} ms"
+              f" | données {runs[0]['data_kb']} kB"
+              f" | RSS +{_median(r['rss_kb'] for r in runs)} kB | anon +{_median(r['anon_kb'] for r in runs)} kB")
+
+    store64_dir.cleanup()
+    store_dir.cleanup()
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark des chemins chauds de pages/actions_page.py, dans le processus (page importée
+comme le fait Dash) :
+- "import page"        : chargement des données et construction des index à l'import
+- "fenêtre <période>"  : découpage par période de tous les symboles (searchsorted)
+- "filter_period ..."  : même découpage par masque booléen (référence)
+- "entrées modèle"     : tampons InputBuffers -> batch [séquences, ids] de tous les symboles
+- "prédiction batch"   : PredictionStore.refresh forcé (un appel modèle pour tous les symboles)
+- "predict_lstm"       : lecture mémorisée d'une prédiction + backtest
+- "figure <période>"   : build_price_figure sans cache, pour chaque période
+- "indicateurs"        : toutes les séries d'indicateurs d'un symbole, sans puis avec mémoïsation
+- "parse AV json/csv"  : parsing d'une réponse Alpha Vantage enregistrée (hors-ligne)
+
+Chaque mesure est répétée (--repeat) : médiane et p99 en ms. --out écrit les résultats
+en JSON ; --baseline <fichier.json> ajoute le rapport à une exécution précédente.
+
+Usage (depuis la racine du dépôt) :
+    MODEL_BACKEND=onnx python "Interface Graphique/benchmarks/bench_hot_paths.py" \\
+        [--repeat 50] [--out hot_paths.json] [--baseline ancien.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(HERE)
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, HERE)
+
+
+def measure(fn, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return {"median_ms": float(np.median(times)), "p99_ms": float(np.percentile(times, 99)), "n": repeat}
+
+
+def filter_period(df, cutoff):
+    """Référence : découpage par masque booléen sur toute la série (avant SymbolIndex.window)."""
+    if cutoff is None:
+        return df
+    return df[df["date"] >= cutoff]
+
+
+def import_page():
+    """Importe la page comme Dash (use_pages) ; retourne (module, durée en ms)."""
+    import dash
+
+    t0 = time.perf_counter()
+    dash.Dash(__name__, use_pages=True, pages_folder=os.path.join(APP_DIR, "pages"))
+    elapsed = (time.perf_counter() - t0) * 1000
+    page = next(m for name, m in sys.modules.items() if name.endswith("actions_page"))
+    return page, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--symbol", default="AAPL")
+    parser.add_argument("--rows", type=int, default=5000, help="barres de la réponse Alpha Vantage enregistrée")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--baseline", default=None)
+    args = parser.parse_args()
+
+    page, import_ms = import_page()
+    results = {"import page": {"median_ms": import_ms, "p99_ms": import_ms, "n": 1}}
+    symbols = page.available_symbols
+    periods = list(page.PERIOD_DAYS)
+
+    # --- Découpage par période ---
+    for period in periods:
+        cutoff = page.period_cutoff(period)
+        results[f"fenêtre {period}"] = measure(
+            lambda: [page.cleaned_index.window(s, cutoff) for s in symbols], args.repeat)
+    frames = {s: page.cleaned_index.get(s) for s in symbols}
+    cutoff = page.period_cutoff("1y")
+    results["filter_period 1y"] = measure(
+        lambda: [filter_period(frames[s], cutoff) for s in symbols], args.repeat)
+
+    # --- Entrées et prédictions ---
+    results["entrées modèle"] = measure(page.input_buffers.inputs, args.repeat)
+    page.model_registry.get("lstm")
+
+    def refresh_all():
+        page.prediction_store._entries.clear()
+        page.prediction_store.refresh()
+
+    results["prédiction batch"] = measure(refresh_all, args.repeat)
+    results["predict_lstm"] = measure(lambda: page.predict_lstm(args.symbol), args.repeat)
+
+    # --- Figures (sans cache) ---
+    for period in periods:
+        window = page.cleaned_index.window(args.symbol, page.period_cutoff(period))
+        if window.empty:
+            # Historique local plus court que la période (ou terminé avant son début)
+            window = page.cleaned_index.get(args.symbol)
+        results[f"figure {period}"] = measure(
+            lambda: page.build_price_figure(window, args.symbol), max(args.repeat // 5, 3))
+
+    # --- Indicateurs ---
+    from services.indicators import INDICATORS, IndicatorEngine
+
+    def all_indicators(engine):
+        for name in INDICATORS:
+            engine.series(args.symbol, name)
+
+    results["indicateurs (calcul)"] = measure(
+        lambda: all_indicators(IndicatorEngine(page.cleaned_index, page.features_index)), args.repeat)
+    results["indicateurs (mémo)"] = measure(lambda: all_indicators(page.indicator_engine), args.repeat)
+
+    # --- Parsing fournisseur (réponse enregistrée) ---
+    from bench_av_parsing import recorded_payload
+    from services.market_data import parse_alpha_vantage, parse_alpha_vantage_csv
+
+    text_json, text_csv = recorded_payload(args.rows)
+    results["parse AV json"] = measure(lambda: parse_alpha_vantage(json.loads(text_json), "1min"), args.repeat)
+    results["parse AV csv"] = measure(lambda: parse_alpha_vantage_csv(text_csv), args.repeat)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    print(f"{len(symbols)} symboles, backend {os.getenv('MODEL_BACKEND', 'keras')}, {args.repeat} répétitions")
+    print(f"{'mesure':<24} {'médiane ms':>11} {'p99 ms':>9}" + (f" {'vs base':>9}" if baseline else ""))
+    for name, r in results.items():
+        line = f"{name:<24} {r['median_ms']:11.3f} {r['p99_ms']:9.3f}"
+        if name in baseline and baseline[name]["median_ms"] > 0:
+            line += f" {r['median_ms'] / baseline[name]['median_ms']:8.2f}x"
+        print(line)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"backend": os.getenv("MODEL_BACKEND", "keras"), "repeat": args.repeat,
+                       "results": results}, f, indent=2, ensure_ascii=False)
+    os._exit(0)  # threads d'arrière-plan de la page (préchauffage, inférence) : sortie immédiate
+
+
+if __name__ == "__main__":
+    main()
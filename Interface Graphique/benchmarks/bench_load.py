@@ -0,0 +1,233 @@
+"""
+Test de charge des endpoints de callbacks Dash (/_dash-update-component) :
+N clients simulés en parallèle, chacun alternant
+- update_graph_and_metrics : changement de symbole / période puis ticks de l'intervalle
+  (la clé de figure renvoyée est réutilisée, comme le navigateur) ; en mode CLIENTSIDE_PERIODS=1,
+  update_series_and_metrics, avec les versions de séries déjà reçues par le client
+- update_ticker            : rafraîchissement du bandeau (une requête sur --ticker-every)
+
+Sans --url, l'application est importée et servie dans ce processus (werkzeug multi-thread)
+avec TICKER_REPLAY=1 (cotations rejouées depuis les partitions ALL_CLEANED de Data/store) :
+aucun appel réseau.
+Avec --url, les requêtes visent un serveur déjà lancé (gunicorn, etc.).
+
+Rapport par endpoint : nombre de requêtes, erreurs, p50 / p99 (ms) et débit (req/s).
+--out écrit le rapport en JSON ; --baseline <fichier.json> affiche l'écart à une exécution précédente.
+
+Usage (depuis la racine du dépôt) :
+    MODEL_BACKEND=onnx python "Interface Graphique/benchmarks/bench_load.py" \\
+        [--clients 8] [--duration 20] [--url http://127.0.0.1:8050] [--out load.json]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(HERE)
+
+GRAPH_OUTPUT_PREFIX = "..stock-graph.figure...live-metrics.children"
+SERIES_OUTPUT_PREFIX = "..series-cache.data...series-versions.data...live-metrics.children"
+TICKER_OUTPUT = "ticker-inner.children"
+
+
+def serve_in_process(port: int) -> str:
+    """Importe app.py (cotations rejouées) et le sert dans un thread ; retourne l'URL."""
+    import logging
+
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # une ligne par requête sinon
+    sys.path.insert(0, APP_DIR)
+    # Source de cotations choisie à la création du service, dès l'import de app.py
+    os.environ["TICKER_REPLAY"] = "1"
+    import app as app_module
+
+    app_module.ticker_service.refresh()
+
+    server = make_server("127.0.0.1", port, app_module.app.server, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-server", daemon=True).start()
+    return f"http://127.0.0.1:{port}"
+
+
+def _outputs(output: str):
+    specs = [o.rsplit(".", 1) for o in output.strip(".").split("...")]
+    outputs = [{"id": o.split("@")[0], "property": p.split("@")[0]} for o, p in specs]
+    return outputs if output.startswith("..") else outputs[0]
+
+
+def _apply_patch(data, value):
+    """Applique la réponse d'une sortie (valeur complète ou Patch Dash) à l'état du client."""
+    if not isinstance(value, dict) or "__dash_patch_update" not in value:
+        return value
+    data = dict(data or {})
+    for op in value.get("operations", []):
+        if op["operation"] == "Assign" and len(op["location"]) == 1:
+            data[op["location"][0]] = op["params"]["value"]
+    return data
+
+
+def callback_payloads(session, url: str):
+    """
+    Gabarits de requêtes construits depuis /_dash-dependencies (identifiants réels des sorties).
+    Retourne aussi l'état renvoyé par le client à chaque requête (figure-key, ou series-versions
+    en mode CLIENTSIDE_PERIODS) et sa mise à jour depuis une réponse.
+    """
+    deps = session.get(f"{url}/_dash-dependencies", timeout=30).json()
+    graph = next(d for d in deps if d["output"].startswith((GRAPH_OUTPUT_PREFIX, SERIES_OUTPUT_PREFIX)))
+    ticker = next(d for d in deps if d["output"] == TICKER_OUTPUT)
+    clientside = graph["output"].startswith(SERIES_OUTPUT_PREFIX)
+    state_id = "series-versions" if clientside else "figure-key"
+
+    def graph_payload(n, symbol, period, state, changed):
+        inputs = [
+            {"id": "interval-graph-update", "property": "n_intervals", "value": n},
+            {"id": "selected-stock", "property": "data", "value": symbol},
+        ]
+        if not clientside:
+            # En mode CLIENTSIDE_PERIODS, la période est découpée dans le navigateur
+            inputs.append({"id": "period-dropdown", "property": "value", "value": period})
+        return {
+            "output": graph["output"], "outputs": _outputs(graph["output"]),
+            "inputs": inputs,
+            "state": [{"id": state_id, "property": "data", "value": state}],
+            "changedPropIds": [changed],
+        }
+
+    def graph_state(state, body):
+        value = body.get("response", {}).get(state_id, {}).get("data")
+        return state if value is None else _apply_patch(state, value)
+
+    def ticker_payload(n):
+        return {
+            "output": ticker["output"], "outputs": _outputs(ticker["output"]),
+            "inputs": [{"id": "interval-component", "property": "n_intervals", "value": n}],
+            "changedPropIds": ["interval-component.n_intervals"],
+        }
+
+    return graph_payload, graph_state, clientside, ticker_payload
+
+
+def run_client(client_id, url, graph_payload, graph_state, clientside, ticker_payload, symbols, periods,
+               deadline, ticker_every, latencies, errors, lock):
+    import requests
+
+    session = requests.Session()
+    graph_name = "update_series_and_metrics" if clientside else "update_graph_and_metrics"
+    state = None
+    n = 0
+    while time.perf_counter() < deadline:
+        # Un changement de sélection toutes les 5 requêtes, des ticks entre deux
+        if n % 5 == 0:
+            symbol = symbols[(client_id + n // 5) % len(symbols)]
+            period = periods[(client_id + n // 5) % len(periods)]
+            changed = "selected-stock.data"
+            if not clientside:
+                # Les séries déjà reçues restent en cache côté client ; la figure, elle, change
+                state = None
+        else:
+            changed = "interval-graph-update.n_intervals"
+        requests_to_send = [(graph_name, graph_payload(n, symbol, period, state, changed))]
+        if ticker_every and n % ticker_every == 0:
+            requests_to_send.append(("update_ticker", ticker_payload(n)))
+        for name, payload in requests_to_send:
+            t0 = time.perf_counter()
+            try:
+                resp = session.post(f"{url}/_dash-update-component", json=payload, timeout=60)
+                ok = resp.status_code in (200, 204)
+                body = resp.json() if resp.status_code == 200 else None
+            except Exception:
+                ok, body = False, None
+            elapsed = time.perf_counter() - t0
+            with lock:
+                latencies[name].append(elapsed)
+                if not ok:
+                    errors[name] += 1
+            if name == graph_name and body:
+                state = graph_state(state, body)
+        n += 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--symbols", default="AAPL,MSFT,NVDA,BTC-USD")
+    parser.add_argument("--periods", default="1y,2y,5y")
+    parser.add_argument("--ticker-every", type=int, default=10)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--baseline", default=None)
+    args = parser.parse_args()
+
+    import requests
+
+    url = args.url or serve_in_process(args.port)
+    symbols, periods = args.symbols.split(","), args.periods.split(",")
+    graph_payload, graph_state, clientside, ticker_payload = callback_payloads(requests.Session(), url)
+
+    # Préchauffage : modèle, prédictions, figures de chaque (symbole, période)
+    warm = requests.Session()
+    for symbol in symbols:
+        for period in periods:
+            for _ in range(2):
+                warm.post(f"{url}/_dash-update-component",
+                          json=graph_payload(0, symbol, period, None, "selected-stock.data"), timeout=120)
+    time.sleep(1.0)
+
+    latencies, errors, lock = defaultdict(list), defaultdict(int), threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    clients = [
+        threading.Thread(target=run_client, args=(i, url, graph_payload, graph_state, clientside, ticker_payload,
+                                                   symbols, periods, deadline, args.ticker_every,
+                                                   latencies, errors, lock))
+        for i in range(args.clients)
+    ]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    report = {}
+    for name, values in sorted(latencies.items()):
+        ms = np.array(values) * 1000
+        report[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "throughput_rps": len(values) / elapsed,
+        }
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["endpoints"]
+
+    print(f"{args.clients} clients, {elapsed:.1f} s, {url}")
+    print(f"{'endpoint':<26} {'requêtes':>9} {'erreurs':>8} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+    for name, r in report.items():
+        line = (f"{name:<26} {r['requests']:9d} {r['errors']:8d} {r['p50_ms']:9.1f} "
+                f"{r['p99_ms']:9.1f} {r['throughput_rps']:8.1f}")
+        if name in baseline:
+            b = baseline[name]
+            line += f"  (p99 {r['p99_ms'] / b['p99_ms']:.2f}x, débit {r['throughput_rps'] / b['throughput_rps']:.2f}x)"
+        print(line)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"clients": args.clients, "duration_s": elapsed, "url": url, "endpoints": report},
+                      f, indent=2, ensure_ascii=False)
+    os._exit(0)  # threads d'arrière-plan de l'application : sortie immédiate
+
+
+if __name__ == "__main__":
+    main()
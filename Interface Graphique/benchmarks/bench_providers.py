@@ -0,0 +1,76 @@
+"""
+Benchmark de la couche fournisseurs asynchrone (hors-ligne, ReplayProvider avec latence simulée) :
+- "séquentiel" : un symbole après l'autre (comportement de fetch_latest_candles)
+- "concurrent" : fetch_many_candles, tous les symboles en parallèle (cache et historique local
+  compris ; l'historique est désactivé pour ne pas y écrire les barres synthétiques)
+- "couverture" : fournisseur principal lent / en échec, secours lancé après --hedge secondes
+
+Usage (depuis la racine du dépôt) :
+    python "Interface Graphique/benchmarks/bench_providers.py" [--latency 0.3] [--hedge 0.5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from bench_features import SYMBOLS, synthetic_history  # noqa: E402
+
+
+class FailingProvider:
+    name = "failing"
+
+    def supports(self, symbol, interval):
+        return True
+
+    async def fetch(self, symbol, period='1d', interval='1m'):
+        await asyncio.sleep(0.05)
+        raise RuntimeError("fournisseur indisponible")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--hedge", type=float, default=0.5)
+    args = parser.parse_args()
+
+    os.environ["MARKET_HISTORY"] = "0"
+    from services.providers import ProviderRouter, ReplayProvider, fetch_many_candles
+
+    history = synthetic_history(1)
+    frames = {s: g.drop(columns="symbol").set_index("date") for s, g in history.groupby("symbol")}
+
+    fast = ReplayProvider(history=frames, delay=args.latency)
+    router = ProviderRouter([fast])
+
+    async def sequential():
+        return {s: await router.fetch(s, interval="1d") for s in SYMBOLS}
+
+    t0 = time.perf_counter()
+    asyncio.run(sequential())
+    t_seq = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results = fetch_many_candles(SYMBOLS, interval="1d", router=router)
+    t_conc = time.perf_counter() - t0
+    assert all(len(df) == len(frames[s]) for s, df in results.items())
+
+    print(f"{len(SYMBOLS)} symboles, latence simulée {args.latency * 1000:.0f} ms")
+    print(f"{'séquentiel':>12} : {t_seq * 1000:8.1f} ms")
+    print(f"{'concurrent':>12} : {t_conc * 1000:8.1f} ms  (x{t_seq / t_conc:.1f})")
+
+    slow = ReplayProvider(history=frames, delay=10.0)
+    for name, primary in [("lent", slow), ("en échec", FailingProvider())]:
+        hedged = ProviderRouter([primary, fast], hedge_delay=args.hedge)
+        t0 = time.perf_counter()
+        results = fetch_many_candles(SYMBOLS, interval="1d", router=hedged)
+        elapsed = time.perf_counter() - t0
+        ok = sum(not isinstance(r, Exception) for r in results.values())
+        print(f"principal {name:>9} : {elapsed * 1000:8.1f} ms  {ok}/{len(SYMBOLS)} réponses du secours")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,115 @@
-from dash import html, dcc, Input, Output, State, callback, register_page,no_update,ctx,ALL
+from dash import html, dcc, Input, Output, State, callback, clientside_callback, register_page,no_update,ctx,ALL,get_app,ClientsideFunction,Patch
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import pandas as pd
-import numpy as np
-from tensorflow.keras.models import load_model
+import os
+import threading
+
+from services.backtest import BacktestStore, format_backtest
+from services.data_store import load_partitions, load_table
+from services.forecast import ForecastStore
+from services.figures import FigureCache, compact_dates, compact_values, downsample_ohlc, series_payload
+from services.indicators import IndicatorEngine
+from services.inference import BatchInferenceServer
+from services.instrumentation import instrumented, register_cache, stage
+from services.model_backends import load_backend, served_path
+from services.model_inputs import SYMBOL_TO_ID, InputBuffers
+from services.model_registry import model_registry, register_model_routes
+from services.predictions import PredictionStore
+from services.providers import fetch_many_candles
+from services.streaming import CandlePoller, register_stream_routes
+from services.symbol_index import SymbolIndex
 
 register_page(__name__, path="/actions_page", name="Actions")
 
-df_report = pd.read_csv("Data/data_report.csv")
-df_cleaned = pd.read_csv("Data/ALL_CLEANED.csv", parse_dates=["date"])
-df_features = pd.read_csv("Data/ALL_FEATURES.csv", parse_dates=["date"])
-available_symbols = sorted(df_cleaned["symbol"].unique())
-
-lstm_model = load_model("Modèle IA/global_lstm_returns.keras")
-symbol_to_id = {
-    "AAPL": 0,
-    "AMZN": 1,
-    "BTC-USD": 2,
-    "GOOGL": 3,
-    "META": 4,
-    "MSFT": 5,
-    "NVDA": 6,
-    "TSLA": 7,
-}
-
-def prepare_lstm_inputs(df_features, symbol, n_timesteps=60):
-    """
-    Prépare les deux entrées pour le LSTM :
-    - Séquence temporelle (Close)
-    - ID du symbol
-    """
-    seq_input = df_features["Close"].tail(n_timesteps).values.reshape(1, n_timesteps, 1)
-
-    symbol_id = symbol_to_id[symbol]
-    extra_input = np.array([[symbol_id]])  # forme (1,1)
-
-    return [seq_input, extra_input]
+# Store colonnaire (Arrow memory-mappé, une partition triée par symbole, types compacts
+# de data_store.SCHEMAS : float32 pour prix et indicateurs), reconstruit automatiquement
+# si le CSV source est plus récent ou si le schéma a changé
+df_report = load_table("Data/data_report.csv", "data_report", partition_by=None)
+# Index par symbole : tranches triées par date, périodes résolues par searchsorted
+cleaned_index = SymbolIndex(load_partitions("Data/ALL_CLEANED.csv", "ALL_CLEANED", parse_dates=["date"]))
+features_index = SymbolIndex(load_partitions("Data/ALL_FEATURES.csv", "ALL_FEATURES", parse_dates=["date"]))
+available_symbols = cleaned_index.symbols()
+# Indicateurs techniques mémorisés par (symbole, indicateur, paramètres, dernière barre),
+# colonnes précalculées de ALL_FEATURES réutilisées
+indicator_engine = IndicatorEngine(cleaned_index, features_index)
+register_cache("indicators", indicator_engine)
+
+# STREAMING_MODE=1 : un seul poller serveur pousse les nouvelles barres (SSE) ;
+# le graphique est patché dans le navigateur au lieu d'être reconstruit à chaque tick.
+# Une connexion SSE occupe un worker : lancer gunicorn avec des workers gthread ou gevent
+# (sous des workers sync, /stream/candles répond 503, cf. services.streaming)
+STREAMING_MODE = os.getenv("STREAMING_MODE") == "1"
+# CLIENTSIDE_PERIODS=1 : l'historique complet de chaque symbole (courbes superposées et prévision
+# comprises) n'est envoyé qu'une fois par version dans le dcc.Store "series-cache" ; période et
+# changement de symbole sont rendus dans le navigateur (assets/periods.js) sans aller-retour serveur
+CLIENTSIDE_PERIODS = os.getenv("CLIENTSIDE_PERIODS") == "1"
+
+# Modèle chargé paresseusement : TensorFlow n'est importé qu'au premier usage
+# (ou au démarrage si MODEL_WARMUP=1), jamais à l'import de la page.
+# MODEL_BACKEND=onnx|tflite sert le modèle exporté sans TensorFlow (voir services/model_export)
+MODEL_PATH = "Modèle IA/global_lstm_returns.keras"
+# Rechargement à chaud : toute nouvelle version du fichier servi déposée dans "Modèle IA"
+# (global_lstm_returns*.keras, ou son export .onnx / .tflite selon MODEL_BACKEND, par renommage)
+# est chargée et préchauffée en arrière-plan puis échangée sans redémarrage.
+# MODEL_CANDIDATE_FRACTION > 0 : la nouvelle version ne reçoit que cette fraction des prédictions
+# jusqu'à sa promotion (POST /models/lstm/promote, activé par MODEL_ADMIN_TOKEN)
+lstm_model = model_registry.watch(
+    "lstm", MODEL_PATH, loader=load_backend, artifact=served_path,
+    candidate_fraction=float(os.getenv("MODEL_CANDIDATE_FRACTION", "0")),
+    poll_seconds=float(os.getenv("MODEL_WATCH_SECONDS", "30")),
+    warm_up=lambda model: model.predict_on_batch(input_buffers.inputs()[1]),
+)
 
-def predict_lstm(df_features_symbol, symbol):
+# Inférence regroupée : les requêtes concurrentes des callbacks partagent une même passe
+# (version active par défaut, ou version choisie par lstm_model.route)
+inference_server = BatchInferenceServer(lambda: lstm_model)
+# GET /models/lstm : versions servies, latence et distribution des prédictions par version
+register_model_routes(get_app().server, model_registry, ["lstm"], admin_token=os.getenv("MODEL_ADMIN_TOKEN"))
+
+# Tampons d'entrée du modèle : les dernières clôtures de chaque symbole (historique complet,
+# indépendant de la période affichée), transformées en rendements et servies en un batch
+input_buffers = InputBuffers(SYMBOL_TO_ID)
+input_buffers.load(cleaned_index)
+
+# Prédictions précalculées pour tous les symboles en un batch,
+# recalculées uniquement quand la dernière barre ou le modèle change
+prediction_store = PredictionStore(lstm_model.version, inference_server.predict, input_buffers,
+                                   route=lstm_model.route)
+# Backtest walk-forward : toutes les fenêtres d'un symbole en un seul batch, mémorisé par
+# (symbole, version du modèle, dernière date)
+backtest_store = BacktestStore(lstm_model.version, inference_server.predict, SYMBOL_TO_ID)
+# Prévision à N pas (FORECAST_STEPS, 0 = désactivée) : déroulé autorégressif de tous les symboles
+# en un batch par pas, avec bande d'incertitude Monte-Carlo
+forecast_store = ForecastStore(lstm_model.version, inference_server.predict, SYMBOL_TO_ID)
+
+_warm_up_started = threading.Event()
+
+def warm_up_predictions():
+    """Charge le modèle en arrière-plan puis précalcule les prédictions (une seule fois)."""
+    if _warm_up_started.is_set():
+        return
+    _warm_up_started.set()
+    model_registry.warm_up("lstm")
+    threading.Thread(target=_precompute, daemon=True).start()
+
+def _precompute():
+    prediction_store.refresh()
+    for symbol in features_index.symbols():
+        backtest_store.get(symbol, features_index)
+    forecast_store.refresh(cleaned_index)
+
+if os.getenv("MODEL_WARMUP") == "1":
+    warm_up_predictions()
+
+def predict_lstm(symbol):
     """
     Retourne signal, confiance et backtest
     """
-    inputs = prepare_lstm_inputs(df_features_symbol, symbol)
-    if inputs is None:
-        return "Pas assez de données", "N/A", "N/A"
-
-    # Prédiction
-    pred_price = lstm_model.predict(inputs)[0][0]
+    with stage("predict"):
+        pred_price = prediction_store.get(symbol)
+    if pred_price is None:
+        return "Pas assez de données", "N/A", "N/A", "N/A"
 
     # Signal simple
     signal = "Acheter" if pred_price > 0 else "Vendre"
@@ -53,29 +117,47 @@ def predict_lstm(df_features_symbol, symbol):
     # Confiance relative (en %)
     confidence = abs(pred_price)*1000
 
-    # Backtest statique (à adapter si tu as un vrai backtest)
-    backtest = "Gain moyen 6 mois : +3%"
+    # Backtest walk-forward sur tout l'historique du symbole
+    with stage("backtest"):
+        backtest = format_backtest(backtest_store.get(symbol, features_index))
 
     return signal, f"{confidence:.1f}%", backtest, pred_price
 
-def filter_period(df, period):
-    """Filtre df selon la période comme yfinance."""
-    days_map = {
-        "1mo": 30,
-        "2mo": 60,
-        "3mo": 90,
-        "6mo": 182,
-        "9mo": 273,
-        "1y": 365,
-        "2y": 730,
-        "3y": 1095,
-        "5y": 1825,
-    }
-    if period not in days_map:
-        return df
+PERIOD_DAYS = {
+    "1mo": 30,
+    "2mo": 60,
+    "3mo": 90,
+    "6mo": 182,
+    "9mo": 273,
+    "1y": 365,
+    "2y": 730,
+    "3y": 1095,
+    "5y": 1825,
+}
+
+# Budget de bougies par graphique : au-delà, agrégation hebdomadaire / mensuelle
+MAX_CANDLES = 400
+# Mise en page du graphique des prix (serveur et rendu navigateur)
+PRICE_LAYOUT = dict(
+    template="plotly_dark",
+    paper_bgcolor="rgba(0,0,0,0)",
+    plot_bgcolor="rgba(0,0,0,0)",
+    font=dict(color="#e6ffff"),
+    xaxis=dict(showgrid=True, gridcolor="rgba(0,240,255,0.1)"),
+    yaxis=dict(showgrid=True, gridcolor="rgba(0,240,255,0.1)"),
+    margin=dict(l=40, r=40, t=40, b=40),
+    height=500
+)
 
-    cutoff = pd.Timestamp.today() - pd.Timedelta(days=days_map[period])
-    return df[df["date"] >= cutoff]
+def bar_stamp(symbol):
+    """Dernière barre du symbole et révision de l'index (barres live fusionnées par le streaming)."""
+    return f"{cleaned_index.dates(symbol)[-1]}#{cleaned_index.revision(symbol)}"
+
+def period_cutoff(period):
+    """Date de début de la période (None si la période est inconnue)."""
+    if period not in PERIOD_DAYS:
+        return None
+    return pd.Timestamp.today() - pd.Timedelta(days=PERIOD_DAYS[period])
 
 symbol_to_name = {
     "AAPL": "Apple",
@@ -88,6 +170,32 @@ symbol_to_name = {
     "TSLA": "Tesla"
 }
 
+# Cases du panneau « Indicateurs Techniques »
+INDICATOR_OPTIONS = [
+    ("ma20", "MA 20"),
+    ("ma50", "MA 50"),
+    ("bollinger", "Bollinger (20, 2σ)"),
+    ("rsi", "RSI 14"),
+    ("macd", "MACD (12, 26, 9)"),
+    ("volatility", "Volatilité 10j"),
+]
+
+# Courbes superposées aux bougies (traces 1..n du graphique des prix, toujours présentes,
+# affichées ou masquées sans reconstruire la figure) : (case, indicateur, paramètres, série, libellé, style)
+PRICE_OVERLAYS = [
+    ("ma20", "ma", {"window": 20}, "value", "MA 20", dict(color="#ffb000", width=1.5)),
+    ("ma50", "ma", {"window": 50}, "value", "MA 50", dict(color="#b266ff", width=1.5)),
+    ("bollinger", "bollinger", {}, "upper", "Bollinger haut", dict(color="rgba(230,255,255,0.5)", width=1)),
+    ("bollinger", "bollinger", {}, "lower", "Bollinger bas", dict(color="rgba(230,255,255,0.5)", width=1)),
+]
+
+# Oscillateurs du graphique du panneau : case -> (indicateur, [(série, libellé, style)])
+OSCILLATORS = {
+    "rsi": ("rsi", [("value", "RSI 14", dict(color="#ffb000"))]),
+    "macd": ("macd", [("macd", "MACD", dict(color="#00f0ff")), ("signal", "Signal", dict(color="#ff7bd5"))]),
+    "volatility": ("volatility", [("value", "Volatilité 10j", dict(color="#7cffb2"))]),
+}
+
 stock_items = []
 for symbol in available_symbols:
     display_name = symbol_to_name.get(symbol, symbol)  # fallback au symbole si pas de nom
@@ -107,6 +215,22 @@ dropdown_options = [
 layout = html.Div(className="actions-page", children=[
     #Store permettant la valeur par défaut du graph
     dcc.Store(id="selected-stock", data="AAPL"),
+    # Clé de la figure affichée par ce client (évite de renvoyer une figure inchangée)
+    dcc.Store(id="figure-key"),
+    *([
+        # Séries par symbole et leurs versions (seules les versions remontent au serveur)
+        dcc.Store(id="series-cache", data={}),
+        dcc.Store(id="series-versions", data={}),
+        dcc.Store(id="chart-config", data={
+            "days": PERIOD_DAYS, "max_candles": MAX_CANDLES,
+            "layout": go.Layout(**PRICE_LAYOUT).to_plotly_json(),
+        }),
+        # Préchargement des autres symboles, une fois la page affichée
+        dcc.Interval(id="series-preload", interval=2000, max_intervals=1),
+        # Oscillateurs cochés du symbole sur tout son historique, et leur clé
+        dcc.Store(id="oscillator-series"),
+        dcc.Store(id="oscillator-key"),
+    ] if CLIENTSIDE_PERIODS else []),
 
     # Titre animé
     html.Div(className="page-title", children=[
@@ -189,13 +313,26 @@ layout = html.Div(className="actions-page", children=[
             ),
             dcc.Interval(
                 id='interval-graph-update',
-                interval=60*1000,
+                # En streaming, le tick ne rafraîchit plus que métriques et prédictions
+                interval=(5*60 if STREAMING_MODE else 60)*1000,
                 n_intervals=0
-            )
+            ),
+            *([
+                dcc.Store(id="stream-bars"),
+                html.Div(id="stream-status", style={"display": "none"}),
+            ] if STREAMING_MODE else [])
         ]),
         html.Div(className="text-panel", children=[
             html.H3("Indicateurs Techniques", className="panel-title"),
-            #Moyenne Mobile / RSI / Volatilité /
+            dcc.Checklist(
+                id="indicator-toggles",
+                options=[{"label": label, "value": value} for value, label in INDICATOR_OPTIONS],
+                value=["ma20"],
+                inline=True,
+                className="indicator-toggles"
+            ),
+            html.Div(id="indicator-values"),
+            dcc.Graph(id="indicator-graph", className="lux-graph", style={"display": "none"}),
         ]),
         # --- Footer ---
         html.Div(className="text-panel", children=[
@@ -203,12 +340,110 @@ layout = html.Div(className="actions-page", children=[
         ]),
     ])
 ])
+# === STREAMING ===
+candle_poller = None
+if STREAMING_MODE:
+    candle_poller = CandlePoller(period="5d", interval="1d", poll_seconds=60, fetch_many=fetch_many_candles)
+    for symbol in available_symbols:
+        candle_poller.set_history_end(symbol, pd.Timestamp(cleaned_index.dates(symbol)[-1]))
+    # Les nouvelles barres (ou la barre en cours, remplacée) sont fusionnées dans l'historique
+    # servi aux figures, indicateurs et prévisions : une figure reconstruite (période, symbole,
+    # nouveau jour) les contient déjà. Les tampons du modèle sont mis à jour sur place
+    candle_poller.add_listener(cleaned_index.update)
+    candle_poller.add_listener(input_buffers.update)
+    register_stream_routes(get_app().server, candle_poller, allowed_symbols=set(available_symbols))
+
+    clientside_callback(
+        ClientsideFunction(namespace="streaming", function_name="subscribe"),
+        Output("stream-status", "children"),
+        Input("selected-stock", "data"),
+    )
+    # Patch de la figure affichée, sans aller-retour serveur : nouvelles bougies ajoutées,
+    # dernière bougie (barre en cours ou bougie agrégée) remplacée à son indice
+    clientside_callback(
+        ClientsideFunction(namespace="streaming", function_name="extend"),
+        Output("stock-graph", "figure", allow_duplicate=True),
+        Input("stream-bars", "data"),
+        State("selected-stock", "data"),
+        State("stock-graph", "figure"),
+        prevent_initial_call=True
+    )
+
 def get_interval(period):
     if "y" in period:
         return "5d"
     else:
         return "1d"
     
+# === GRAPHIQUE ===
+figure_cache = FigureCache()
+register_cache("figures", figure_cache)
+
+def build_price_figure(hist_graph, ticker_symbol, forecast=None):
+    """Construit le graphique en chandeliers (sous-échantillonné) sous forme sérialisée."""
+    start = hist_graph["date"].iloc[0]
+    # Pas des courbes d'indicateurs : même budget de points que les bougies
+    stride = max(len(hist_graph) // MAX_CANDLES, 1)
+    hist_graph = downsample_ohlc(hist_graph, MAX_CANDLES)
+
+    fig = go.Figure()
+
+    # Couleurs simples : vert pour hausse, rouge pour baisse
+    increasing_color = "green"
+    decreasing_color = "red"
+
+    # Ajout du graphique (listes simples : le streaming patche la dernière bougie à son indice)
+    fig.add_trace(go.Candlestick(
+        **series_payload(hist_graph),
+        name=ticker_symbol,
+        increasing_line_color=increasing_color,
+        decreasing_line_color=decreasing_color,
+        increasing_fillcolor="rgba(0,255,0,0.6)",
+        decreasing_fillcolor="rgba(255,0,0,0.6)",
+        # Bougies agrégées (semaine / mois / trimestre) : le streaming y replie les barres journalières
+        meta={"resampled": hist_graph.attrs.get("rule", False)}
+    ))
+
+    # Indicateurs superposés : masqués par défaut, affichés par update_indicators (Patch)
+    for _, name, params, column, label, line in PRICE_OVERLAYS:
+        values = indicator_engine.window(ticker_symbol, name, start, **params).iloc[::stride]
+        fig.add_trace(go.Scatter(
+            x=values["date"], y=values[column], mode="lines", name=label,
+            line=line, visible=False, hoverinfo="x+y"
+        ))
+
+    # Prévision de l'IA : trajectoire centrale et bande 10-90 % (après la trace des bougies,
+    # qui reste la trace 0 prolongée par le streaming)
+    if forecast is not None:
+        # Départ de la dernière clôture affichée pour relier la prévision aux bougies
+        x = [hist_graph["date"].iloc[-1], *forecast["date"]]
+        last_close = hist_graph["Close"].iloc[-1]
+        fig.add_trace(go.Scatter(
+            x=x, y=[last_close, *forecast["upper"]], mode="lines",
+            line=dict(width=0), hoverinfo="skip", showlegend=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=x, y=[last_close, *forecast["lower"]], mode="lines",
+            line=dict(width=0), fill="tonexty", fillcolor="rgba(0,240,255,0.15)",
+            name="Intervalle 10-90 %"
+        ))
+        fig.add_trace(go.Scatter(
+            x=x, y=[last_close, *forecast["forecast"]], mode="lines",
+            line=dict(color="#00f0ff", dash="dash"), name="Prévision IA"
+        ))
+
+    fig.update_layout(**PRICE_LAYOUT)
+    return fig.to_dict()
+
+def error_outputs(message):
+    """Sorties complètes du callback quand aucune donnée n'est affichable."""
+    fig = go.Figure()
+    fig.add_annotation(text=message, x=0.5, y=0.5, showarrow=False)
+    return (
+        fig, [html.Div(message, className="metric-item error")],
+        "N/A", "metric-value", "N/A", "metric-value", "N/A", "N/A", None
+    )
+
 # === CALLBACKS ==
 @callback(
     Output("selected-stock", "data"),
@@ -217,6 +452,7 @@ def get_interval(period):
     State({"type": "stock-item", "index": ALL}, "id"),
     prevent_initial_call=True
 )
+@instrumented
 def select_single_stock(n_clicks, ids):
     if not ctx.triggered:
         return no_update, no_update
@@ -229,83 +465,8 @@ def select_single_stock(n_clicks, ids):
     ]
 
     return selected, classes
-@callback(
-    Output('stock-graph', 'figure'),
-    Output('live-metrics', 'children'),
-    Output('ai-signal', 'children'),
-    Output('ai-signal', 'className'),
-    Output('ai-predict', 'children'),
-    Output('ai-predict', 'className'),
-    Output('ai-confidence', 'children'),
-    Output('ai-backtest', 'children'),
-    Input('interval-graph-update', 'n_intervals'),
-    Input("selected-stock", "data"),
-    Input('period-dropdown', 'value'),
-)
-def update_graph_and_metrics(n, symbol, period):
-
-    fig = go.Figure()
-
-    metrics = []
-    ai_signal, ai_confidence, ai_backtest, ai_prediction = "N/A", "N/A", "N/A","N/A"
-
-    if not symbol:
-        fig.add_annotation(
-            text="Aucune action sélectionnée", x=0.5, y=0.5, showarrow=False
-        )
-        return fig, [html.Div("Aucune action sélectionnée", className="metric-item error")]
-
-    ticker_symbol = symbol
-    # Filtrer les données pour ce ticker
-    hist_graph = df_cleaned[df_cleaned["symbol"] == ticker_symbol].sort_values("date").copy()
-    if hist_graph.empty:
-        fig.add_annotation(
-            text=f"Aucune donnée pour {ticker_symbol}", x=0.5, y=0.5, showarrow=False
-        )
-        return fig, [html.Div(f"Aucune donnée pour {ticker_symbol}", className="metric-item error")]
-
-    # Filtrage par période
-    hist_graph = filter_period(hist_graph, period)
-    if hist_graph.empty:
-        fig.add_annotation(
-            text=f"Aucune donnée pour la période sélectionnée", x=0.5, y=0.5, showarrow=False
-        )
-        return fig, [html.Div("Aucune donnée pour la période sélectionnée", className="metric-item error")]
-
-    # Couleurs simples : vert pour hausse, rouge pour baisse
-    increasing_color = "green"
-    decreasing_color = "red"
-
-    # Ajout du graphique
-    fig.add_trace(go.Candlestick(
-        x=hist_graph["date"],
-        open=hist_graph["Open"],
-        high=hist_graph["High"],
-        low=hist_graph["Low"],
-        close=hist_graph["Close"],
-        name=ticker_symbol,
-        increasing_line_color=increasing_color,
-        decreasing_line_color=decreasing_color,
-        increasing_fillcolor="rgba(0,255,0,0.6)",
-        decreasing_fillcolor="rgba(255,0,0,0.6)"
-    ))
-
-    hist_metric = df_features[df_features["symbol"] == ticker_symbol].sort_values("date").copy()
-    if hist_metric.empty:
-        fig.add_annotation(
-            text=f"Aucune donnée pour {ticker_symbol}", x=0.5, y=0.5, showarrow=False
-        )
-        return fig, [html.Div(f"Aucune donnée pour {ticker_symbol}", className="metric-item error")]
-
-    # Filtrage par période
-    hist_metric = filter_period(hist_metric, period)
-    if hist_metric.empty:
-        fig.add_annotation(
-            text=f"Aucune donnée pour la période sélectionnée", x=0.5, y=0.5, showarrow=False
-        )
-        return fig, [html.Div("Aucune donnée pour la période sélectionnée", className="metric-item error")]
-
-    # Métriques
+def live_metrics(hist_metric, ticker_symbol):
+    """Tableau « Top Stats » : dernière barre et variation par rapport à la veille."""
     price = hist_metric["Close"].iloc[-1]
     high = hist_metric["High"].iloc[-1]
     low = hist_metric["Low"].iloc[-1]
@@ -317,7 +478,7 @@ def update_graph_and_metrics(n, symbol, period):
 
     company = symbol_to_name.get(ticker_symbol, ticker_symbol)
 
-    metrics = html.Div(className="text-panel", children=[
+    return html.Div(className="text-panel", children=[
         html.Table(
             className="lux-table split-table",
             children=[
@@ -351,21 +512,345 @@ def update_graph_and_metrics(n, symbol, period):
         )
     ])
 
-    ai_signal, ai_confidence, ai_backtest, ai_prediction = predict_lstm(hist_metric, symbol)
+def ai_outputs(symbol):
+    """Sorties du panneau IA : signal, classe, prédiction, classe, confiance, backtest."""
+    if model_registry.is_ready("lstm"):
+        ai_signal, ai_confidence, ai_backtest, ai_prediction = predict_lstm(symbol)
+    elif model_registry["lstm"].error is not None:
+        ai_signal, ai_confidence, ai_backtest, ai_prediction = "Modèle indisponible", "N/A", "N/A", "N/A"
+    else:
+        # Modèle en cours de chargement : affiché au prochain rafraîchissement
+        warm_up_predictions()
+        ai_signal = ai_confidence = ai_backtest = ai_prediction = "Chargement..."
 
     signal_class = "metric-value up" if ai_signal == "Acheter" else "metric-value down"
     predict_class = "metric-value up" if ai_signal == "Acheter" else "metric-value down"
 
+    return ai_signal, signal_class, ai_prediction, predict_class, ai_confidence, ai_backtest
+
+@instrumented
+def update_graph_and_metrics(n, symbol, period, client_figure_key):
+
+    if not symbol:
+        return error_outputs("Aucune action sélectionnée")
+
+    ticker_symbol = symbol
+    # Filtrer les données pour ce ticker
+    if ticker_symbol not in cleaned_index:
+        return error_outputs(f"Aucune donnée pour {ticker_symbol}")
+
+    # Filtrage par période (recherche dichotomique, vue sans copie)
+    cutoff = period_cutoff(period)
+    with stage("slice"):
+        hist_graph = cleaned_index.window(ticker_symbol, cutoff)
+    if hist_graph.empty:
+        return error_outputs("Aucune donnée pour la période sélectionnée")
+
+    # Prévision superposée dès qu'elle est calculée (en arrière-plan, jamais dans le callback)
+    with stage("forecast"):
+        forecast = forecast_store.get(ticker_symbol, cleaned_index, wait=False) if model_registry.is_ready("lstm") else None
+
+    # La figure ne dépend que du symbole, de la période et de la dernière barre (fusions live comprises)
+    # (et du jour, qui fait glisser le début de la période, et de la prévision affichée)
+    figure_key = [
+        ticker_symbol, period, bar_stamp(ticker_symbol), str(pd.Timestamp.today().date()),
+        lstm_model.version() if forecast is not None else ""
+    ]
+    if figure_key == client_figure_key:
+        # Le client affiche déjà cette figure : rien à renvoyer
+        fig = no_update
+    else:
+        with stage("figure"):
+            fig = figure_cache.get_or_build(
+                tuple(figure_key), lambda: build_price_figure(hist_graph, ticker_symbol, forecast)
+            )
 
+    if ticker_symbol not in features_index:
+        return error_outputs(f"Aucune donnée pour {ticker_symbol}")
+
+    # Filtrage par période
+    with stage("slice"):
+        hist_metric = features_index.window(ticker_symbol, cutoff)
+    if hist_metric.empty:
+        return error_outputs("Aucune donnée pour la période sélectionnée")
+
+    # Métriques
+    metrics = live_metrics(hist_metric, ticker_symbol)
+
+    return (fig, metrics, *ai_outputs(symbol), figure_key)
+
+# === SÉRIES CÔTÉ NAVIGATEUR (CLIENTSIDE_PERIODS=1) ===
+_series_payloads = {}  # symbol -> (last bar, payload)
+
+def series_entry(symbol):
+    """
+    Historique complet du symbole et courbes superposées (mêmes traces que build_price_figure),
+    mémorisés jusqu'à la prochaine barre.
+    """
+    hist = cleaned_index.get(symbol)
+    last = bar_stamp(symbol)
+    cached = _series_payloads.get(symbol)
+    if cached is not None and cached[0] == last:
+        return cached[1]
+    payload = series_payload(hist)
+    payload["overlays"] = [
+        compact_values(indicator_engine.series(symbol, name, **params)[column])
+        for _, name, params, column, _, _ in PRICE_OVERLAYS
+    ]
+    _series_payloads[symbol] = (last, payload)
+    return payload
+
+def forecast_entry(forecast):
+    if forecast is None:
+        return None
+    return {
+        "x": compact_dates(forecast["date"]),
+        **{col: compact_values(forecast[col]) for col in ("forecast", "upper", "lower")},
+    }
+
+def series_updates(symbols, client_versions):
+    """
+    Patchs de series-cache / series-versions pour les symboles dont le client n'a pas la
+    version courante : historique renvoyé à chaque nouvelle barre, prévision seule sinon.
+    """
+    cache_patch, versions_patch = Patch(), Patch()
+    client_versions = client_versions or {}
+    ready = model_registry.is_ready("lstm")
+    changed = False
+    for symbol in symbols:
+        with stage("forecast"):
+            forecast = forecast_store.get(symbol, cleaned_index, wait=False) if ready else None
+        version = [bar_stamp(symbol), lstm_model.version() if forecast is not None else ""]
+        client = client_versions.get(symbol)
+        if client == version:
+            continue
+        changed = True
+        with stage("series"):
+            if client is None or client[0] != version[0]:
+                cache_patch[symbol] = {
+                    "last": version[0], **series_entry(symbol),
+                    "forecast": forecast_entry(forecast), "forecast_version": version[1],
+                }
+            else:
+                cache_patch[symbol]["forecast"] = forecast_entry(forecast)
+                cache_patch[symbol]["forecast_version"] = version[1]
+        versions_patch[symbol] = version
+    if not changed:
+        return no_update, no_update
+    return cache_patch, versions_patch
+
+@instrumented
+def update_series_and_metrics(n, symbol, client_versions):
+    """
+    Aller-retour serveur du mode CLIENTSIDE_PERIODS : nouvelles barres / prévision du symbole
+    (si sa version a changé), métriques et prédictions. La période n'intervient pas.
+    """
+    if not symbol or symbol not in cleaned_index or symbol not in features_index:
+        message = "Aucune action sélectionnée" if not symbol else f"Aucune donnée pour {symbol}"
+        return (no_update, no_update, *error_outputs(message)[1:8])
+
+    cache_patch, versions_patch = series_updates([symbol], client_versions)
+    metrics = live_metrics(features_index.get(symbol), symbol)
+    return (cache_patch, versions_patch, metrics, *ai_outputs(symbol))
+
+@instrumented
+def preload_series(n, client_versions):
+    """Envoie en une fois les séries des symboles que le client n'a pas encore."""
+    return series_updates(available_symbols, client_versions)
+
+if CLIENTSIDE_PERIODS:
+    callback(
+        Output("series-cache", "data"),
+        Output("series-versions", "data"),
+        Output('live-metrics', 'children'),
+        Output('ai-signal', 'children'),
+        Output('ai-signal', 'className'),
+        Output('ai-predict', 'children'),
+        Output('ai-predict', 'className'),
+        Output('ai-confidence', 'children'),
+        Output('ai-backtest', 'children'),
+        Input('interval-graph-update', 'n_intervals'),
+        Input("selected-stock", "data"),
+        State("series-versions", "data"),
+    )(update_series_and_metrics)
+    callback(
+        Output("series-cache", "data", allow_duplicate=True),
+        Output("series-versions", "data", allow_duplicate=True),
+        Input("series-preload", "n_intervals"),
+        State("series-versions", "data"),
+        prevent_initial_call=True
+    )(preload_series)
+    # Rendu de la période dans le navigateur : tranche de la série en cache, agrégée au besoin,
+    # courbes superposées affichées selon les cases cochées (la clé affichée évite les rendus inutiles)
+    clientside_callback(
+        ClientsideFunction(namespace="periods", function_name="render"),
+        Output("stock-graph", "figure"),
+        Output("figure-key", "data"),
+        Input("series-cache", "data"),
+        Input("selected-stock", "data"),
+        Input("period-dropdown", "value"),
+        Input("indicator-toggles", "value"),
+        State("figure-key", "data"),
+        State("chart-config", "data"),
+    )
+else:
+    callback(
+        Output('stock-graph', 'figure'),
+        Output('live-metrics', 'children'),
+        Output('ai-signal', 'children'),
+        Output('ai-signal', 'className'),
+        Output('ai-predict', 'children'),
+        Output('ai-predict', 'className'),
+        Output('ai-confidence', 'children'),
+        Output('ai-backtest', 'children'),
+        Output('figure-key', 'data'),
+        Input('interval-graph-update', 'n_intervals'),
+        Input("selected-stock", "data"),
+        Input('period-dropdown', 'value'),
+        State('figure-key', 'data'),
+    )(update_graph_and_metrics)
+
+
+# === INDICATEURS TECHNIQUES ===
+def build_oscillator_figure(symbol, start, selected, compact=False):
+    """
+    Graphique des oscillateurs cochés (une ligne par oscillateur), séries mémorisées.
+    `compact` : dates ISO et valeurs en listes, découpables par période dans le navigateur.
+    """
+    fig = make_subplots(rows=len(selected), cols=1, shared_xaxes=True, vertical_spacing=0.08)
+    for row, key in enumerate(selected, start=1):
+        name, series = OSCILLATORS[key]
+        values = indicator_engine.window(symbol, name, start)
+        if compact:
+            values = {"date": compact_dates(values["date"]),
+                      **{col: compact_values(values[col]) for col in values.columns if col != "date"}}
+        for column, label, line in series:
+            fig.add_trace(go.Scatter(x=values["date"], y=values[column], mode="lines", name=label, line=line),
+                          row=row, col=1)
+        if name == "macd":
+            fig.add_trace(go.Bar(x=values["date"], y=values["histogram"], name="Histogramme",
+                                 marker_color="rgba(0,240,255,0.35)"), row=row, col=1)
     fig.update_layout(
         template="plotly_dark",
         paper_bgcolor="rgba(0,0,0,0)",
         plot_bgcolor="rgba(0,0,0,0)",
         font=dict(color="#e6ffff"),
-        xaxis=dict(showgrid=True, gridcolor="rgba(0,240,255,0.1)"),
-        yaxis=dict(showgrid=True, gridcolor="rgba(0,240,255,0.1)"),
-        margin=dict(l=40, r=40, t=40, b=40),
-        height=500
+        margin=dict(l=40, r=40, t=20, b=30),
+        height=160 * len(selected) + 60,
+        legend=dict(orientation="h")
     )
+    fig.update_xaxes(showgrid=True, gridcolor="rgba(0,240,255,0.1)")
+    fig.update_yaxes(showgrid=True, gridcolor="rgba(0,240,255,0.1)")
+    return fig.to_dict()
+
+def indicator_values(symbol):
+    """Dernières valeurs des indicateurs du symbole."""
+    close = cleaned_index.get(symbol)["Close"].iloc[-1]
+    ma20 = indicator_engine.latest(symbol, "ma", window=20)["value"]
+    ma50 = indicator_engine.latest(symbol, "ma", window=50)["value"]
+    rsi = indicator_engine.latest(symbol, "rsi")["value"]
+    bands = indicator_engine.latest(symbol, "bollinger")
+    macd = indicator_engine.latest(symbol, "macd")
+    vol = indicator_engine.latest(symbol, "volatility")["value"]
+    percent_b = (close - bands["lower"]) / (bands["upper"] - bands["lower"])
+    return html.Table(className="lux-table split-table", children=[
+        html.Thead(html.Tr([
+            html.Th("MA 20"), html.Th("MA 50"), html.Th("RSI 14"),
+            html.Th("Bollinger %B"), html.Th("MACD"), html.Th("Volatilité 10j"),
+        ])),
+        html.Tbody(html.Tr([
+            html.Td(f"{ma20:,.2f}", className="up" if close >= ma20 else "down"),
+            html.Td(f"{ma50:,.2f}", className="up" if close >= ma50 else "down"),
+            html.Td(f"{rsi:.1f}", className="down" if rsi >= 70 else "up" if rsi <= 30 else ""),
+            html.Td(f"{percent_b:.2f}"),
+            html.Td(f"{macd['macd']:+.2f}", className="up" if macd["histogram"] >= 0 else "down"),
+            html.Td(f"{vol:.2%}"),
+        ]))
+    ])
 
-    return fig, metrics, ai_signal,signal_class, ai_prediction,predict_class, ai_confidence, ai_backtest
\ No newline at end of file
+@instrumented
+def update_indicators(toggles, figure_key):
+    """
+    Cocher / décocher un indicateur ne renvoie que la visibilité des courbes (Patch)
+    et le petit graphique des oscillateurs, construit à partir des séries mémorisées.
+    """
+    if not figure_key:
+        return no_update, no_update, {"display": "none"}, None
+    # La clé de la figure affichée donne symbole, période et dernière barre : pas de State à relire
+    symbol, period, last_bar, day = figure_key[:4]
+    toggles = toggles or []
+
+    patch = Patch()
+    for i, overlay in enumerate(PRICE_OVERLAYS, start=1):
+        patch["data"][i]["visible"] = overlay[0] in toggles
+
+    selected = [key for key in OSCILLATORS if key in toggles]
+    if selected:
+        with stage("figure"):
+            fig = figure_cache.get_or_build(
+                ("indicators", symbol, period, last_bar, day, tuple(selected)),
+                lambda: build_oscillator_figure(symbol, period_cutoff(period), selected)
+            )
+        style = {"display": "block"}
+    else:
+        fig, style = no_update, {"display": "none"}
+    with stage("indicators"):
+        values = indicator_values(symbol)
+    return patch, fig, style, values
+
+@instrumented
+def update_oscillator_series(toggles, symbol, client_versions, current_key):
+    """
+    Mode CLIENTSIDE_PERIODS : oscillateurs cochés sur tout l'historique du symbole (découpés
+    par période dans le navigateur) et dernières valeurs. Rien n'est renvoyé tant que symbole,
+    dernière barre et cases cochées sont inchangés (mises à jour des autres symboles).
+    """
+    if not symbol or symbol not in cleaned_index:
+        return None, {"display": "none"}, None, None
+    selected = [key for key in OSCILLATORS if key in (toggles or [])]
+    last_bar = bar_stamp(symbol)
+    key = [symbol, last_bar, selected]
+    if key == current_key:
+        return no_update, no_update, no_update, no_update
+    if selected:
+        with stage("figure"):
+            fig = figure_cache.get_or_build(
+                ("indicators", symbol, last_bar, tuple(selected)),
+                lambda: build_oscillator_figure(symbol, None, selected, compact=True)
+            )
+        style = {"display": "block"}
+    else:
+        fig, style = None, {"display": "none"}
+    with stage("indicators"):
+        values = indicator_values(symbol)
+    return fig, style, values, key
+
+if CLIENTSIDE_PERIODS:
+    callback(
+        Output("oscillator-series", "data"),
+        Output("indicator-graph", "style"),
+        Output("indicator-values", "children"),
+        Output("oscillator-key", "data"),
+        Input("indicator-toggles", "value"),
+        Input("selected-stock", "data"),
+        Input("series-versions", "data"),
+        State("oscillator-key", "data"),
+    )(update_oscillator_series)
+    # Période appliquée dans le navigateur, comme pour le graphique des prix
+    clientside_callback(
+        ClientsideFunction(namespace="periods", function_name="oscillators"),
+        Output("indicator-graph", "figure"),
+        Input("oscillator-series", "data"),
+        Input("period-dropdown", "value"),
+        State("chart-config", "data"),
+    )
+else:
+    callback(
+        Output("stock-graph", "figure", allow_duplicate=True),
+        Output("indicator-graph", "figure"),
+        Output("indicator-graph", "style"),
+        Output("indicator-values", "children"),
+        Input("indicator-toggles", "value"),
+        Input("figure-key", "data"),
+        prevent_initial_call=True
+    )(update_indicators)
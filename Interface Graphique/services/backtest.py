@@ -0,0 +1,117 @@
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.model_inputs import N_TIMESTEPS, series_windows
+from services.symbol_index import SymbolIndex
+
+
+def bars_per_year(dates: np.ndarray) -> float:
+    """Fréquence annuelle observée (≈252 pour une action, ≈365 pour une crypto)."""
+    if len(dates) < 2:
+        return 252.0
+    days = (pd.Timestamp(dates[-1]) - pd.Timestamp(dates[0])).days
+    return (len(dates) - 1) / (days / 365.25) if days > 0 else 252.0
+
+
+def strategy_metrics(strategy: np.ndarray, periods_per_year: float) -> dict:
+    """Rendement cumulé, Sharpe annualisé et drawdown maximal d'une série de rendements par barre."""
+    if len(strategy) == 0:
+        return {"cumulative_return": 0.0, "sharpe": float("nan"), "max_drawdown": 0.0}
+    equity = np.cumprod(1.0 + strategy)
+    drawdown = equity / np.maximum.accumulate(equity) - 1.0
+    std = strategy.std(ddof=1) if len(strategy) > 1 else 0.0
+    return {
+        "cumulative_return": float(equity[-1] - 1.0),
+        "sharpe": float(strategy.mean() / std * np.sqrt(periods_per_year)) if std > 0 else float("nan"),
+        "max_drawdown": float(drawdown.min()),
+    }
+
+
+def backtest_metrics(preds: np.ndarray, target: np.ndarray, next_return: np.ndarray,
+                     periods_per_year: float) -> dict:
+    """
+    Métriques vectorisées d'une stratégie long/short suivant le signe de la prédiction :
+    - réussite : signe prédit == signe de target_3_days
+    - rendements journaliers : position(t) * daily_return(t + 1), capitalisés
+    """
+    position = np.sign(preds)
+    decided = target != 0
+    hit_rate = float(np.mean(position[decided] == np.sign(target[decided]))) if decided.any() else float("nan")
+
+    valid = ~np.isnan(next_return)
+    result = {"n_signals": len(preds), "hit_rate": hit_rate}
+    result.update(strategy_metrics(position[valid] * next_return[valid], periods_per_year))
+    result["buy_hold_return"] = float(np.prod(1.0 + next_return[valid]) - 1.0)
+    # Rendement moyen d'une position tenue sur l'horizon de la cible (3 jours)
+    result["avg_trade_return"] = float(np.mean(position * target))
+    return result
+
+
+def run_backtest(features: pd.DataFrame, symbol_id: int,
+                 predict_batch: Callable[[List[np.ndarray]], np.ndarray],
+                 n_timesteps: int = N_TIMESTEPS) -> Optional[dict]:
+    """
+    Backtest walk-forward d'un symbole : chaque fenêtre ne voit que les barres passées,
+    toutes les fenêtres sont évaluées en un seul appel au modèle.
+    """
+    windows, end = series_windows(features["Close"].to_numpy(), n_timesteps)
+    # Au moins une barre après la première fenêtre pour mesurer un rendement
+    if len(windows) < 2:
+        return None
+    ids = np.full((len(windows), 1), symbol_id)
+    preds = np.asarray(predict_batch([windows, ids]), dtype=np.float64).reshape(len(windows), -1)[:, 0]
+
+    target = features["target_3_days"].to_numpy(dtype=np.float64)[end:]
+    daily = features["daily_return"].to_numpy(dtype=np.float64)
+    # Rendement de la barre suivante (inconnu pour la dernière fenêtre)
+    next_return = np.append(daily[end + 1:], np.nan)
+
+    dates = features["date"].to_numpy()
+    result = backtest_metrics(preds, target, next_return, bars_per_year(dates))
+    result["start"] = pd.Timestamp(dates[end])
+    result["end"] = pd.Timestamp(dates[-1])
+    return result
+
+
+def format_backtest(result: Optional[dict]) -> str:
+    if result is None:
+        return "Pas assez de données"
+    return (
+        f"Réussite {result['hit_rate']:.0%} | Rendement {result['cumulative_return']:+.1%} "
+        f"(B&H {result['buy_hold_return']:+.1%}) | Sharpe {result['sharpe']:.2f} | "
+        f"Drawdown {result['max_drawdown']:.1%} — {result['n_signals']} signaux depuis "
+        f"{result['start']:%d/%m/%Y}"
+    )
+
+
+class BacktestStore:
+    """Résultats de backtest mémorisés par (symbole, hash du modèle, dernière date)."""
+
+    def __init__(self, model_hash: Callable[[], str],
+                 predict_batch: Callable[[List[np.ndarray]], np.ndarray],
+                 symbol_to_id: Dict[str, int], n_timesteps: int = N_TIMESTEPS):
+        self.model_hash = model_hash
+        self.predict_batch = predict_batch
+        self.symbol_to_id = symbol_to_id
+        self.n_timesteps = n_timesteps
+        self._entries: Dict[str, tuple] = {}  # symbol -> (key, result)
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, index: SymbolIndex) -> Optional[dict]:
+        if symbol not in index or symbol not in self.symbol_to_id:
+            return None
+        dates = index.dates(symbol)
+        key = (symbol, self.model_hash(), dates[-1] if len(dates) else None)
+        entry = self._entries.get(symbol)
+        if entry is not None and entry[0] == key:
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None or entry[0] != key:
+                result = run_backtest(index.get(symbol), self.symbol_to_id[symbol],
+                                      self.predict_batch, self.n_timesteps)
+                entry = self._entries[symbol] = (key, result)
+        return entry[1]
@@ -0,0 +1,119 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional
+
+import pandas as pd
+
+
+def estimate_size(value: Any) -> int:
+    """Taille approximative en octets d'une valeur mise en cache."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    return sys.getsizeof(value)
+
+
+class TTLCache:
+    """
+    Cache mémoire thread-safe :
+    - expiration par entrée (TTL)
+    - éviction LRU sous un plafond mémoire en octets
+    - un seul chargement en vol par clé, partagé par les appelants concurrents
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, sizeof: Callable[[Any], int] = estimate_size):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._inflight: dict = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def current_bytes(self) -> int:
+        return self._bytes
+
+    def _pop(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._pop(key)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: float) -> Any:
+        """Retourne la valeur en cache ou la charge une seule fois pour tous les appelants."""
+        _missing = object()
+        value = self.get(key, _missing)
+        if value is not _missing:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
@@ -0,0 +1,218 @@
+import os
+import glob
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except Exception:
+    pa = None
+
+STORE_DIR = os.getenv("DATA_STORE_DIR", os.path.join("Data", "store"))
+
+# === SCHÉMAS ===
+# Types compacts des tables de marché : float32 pour les prix et indicateurs (7 chiffres
+# significatifs, au-delà de la précision des cotations), int64 conservé pour les volumes
+# (BTC dépasse 2^31), int8 pour la cible binaire. Les colonnes absentes du schéma gardent
+# leur type ; DATA_STORE_SCHEMA=0 désactive la conversion (store en float64 d'origine).
+_FLOAT32 = [
+    "Open", "High", "Low", "Close",
+    "daily_return", "volatility_10", "MA_5", "MA_20", "MA_50", "RSI_14",
+    "volume_MA_5", "volume_ratio", "target_3_days", "overnight_gap",
+]
+MARKET_SCHEMA: Dict[str, str] = {
+    **{column: "float32" for column in _FLOAT32},
+    "Volume": "int64",
+    "target_direction": "int8",
+}
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    "ALL_CLEANED": MARKET_SCHEMA,
+    "ALL_FEATURES": MARKET_SCHEMA,
+}
+SCHEMA_ENABLED = os.getenv("DATA_STORE_SCHEMA", "1") != "0"
+_SCHEMA_KEY = b"store_schema"
+
+
+def table_schema(table: str) -> Dict[str, str]:
+    """Types appliqués à la table dans le store ({} si aucun schéma ou schémas désactivés)."""
+    return SCHEMAS.get(table, {}) if SCHEMA_ENABLED else {}
+
+
+def _schema_tag(table: str) -> bytes:
+    # Empreinte du schéma écrite dans les métadonnées Arrow : un store construit avec
+    # d'autres types est considéré comme périmé et reconstruit
+    schema = json.dumps(table_schema(table), sort_keys=True).encode()
+    return hashlib.sha1(schema).hexdigest()[:12].encode()
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """Convertit les colonnes présentes ; un entier contenant des valeurs manquantes reste tel quel."""
+    dtypes = {}
+    for column, dtype in schema.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        if np.issubdtype(np.dtype(dtype), np.integer) and df[column].isna().any():
+            continue
+        dtypes[column] = dtype
+    return df.astype(dtypes) if dtypes else df
+
+
+def read_csv(csv_path: str, table: str, parse_dates: Optional[List[str]] = None,
+             partition_by: Optional[str] = "symbol") -> pd.DataFrame:
+    """pd.read_csv avec le schéma de la table (et le symbole en catégorie, non répété en objet)."""
+    df = pd.read_csv(csv_path, parse_dates=parse_dates,
+                     dtype={partition_by: "category"} if partition_by else None)
+    return apply_schema(df, table_schema(table))
+
+
+def _table_dir(table: str) -> str:
+    return os.path.join(STORE_DIR, table)
+
+
+def _partition_path(table: str, symbol: Optional[str] = None) -> str:
+    name = f"symbol={symbol}.arrow" if symbol is not None else "all.arrow"
+    return os.path.join(_table_dir(table), name)
+
+
+def _list_partitions(table: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(_table_dir(table), "*.arrow")))
+
+
+def _write_arrow(df: pd.DataFrame, path: str, metadata: Optional[Dict[bytes, bytes]] = None):
+    # Écriture dans un fichier temporaire puis renommage atomique :
+    # plusieurs workers peuvent reconstruire le store en même temps
+    arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+    if metadata:
+        arrow_table = arrow_table.replace_schema_metadata({**(arrow_table.schema.metadata or {}), **metadata})
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with ipc.new_file(tmp_path, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    os.replace(tmp_path, path)
+
+
+def _read_arrow(path: str) -> pd.DataFrame:
+    # Lecture memory-mappée : les colonnes numériques sont des vues sur le fichier,
+    # les pages sont donc partagées entre processus au lieu d'être copiées
+    with pa.memory_map(path) as source:
+        arrow_table = ipc.open_file(source).read_all()
+    return arrow_table.to_pandas(split_blocks=True)
+
+
+def _stored_schema_tag(path: str) -> Optional[bytes]:
+    with pa.memory_map(path) as source:
+        metadata = ipc.open_file(source).schema.metadata or {}
+    return metadata.get(_SCHEMA_KEY)
+
+
+def is_stale(table: str, csv_path: str) -> bool:
+    """
+    Vrai si le CSV source est plus récent qu'une des partitions, si une partition a été
+    écrite avec un autre schéma de types, ou si le store est vide.
+    """
+    partitions = _list_partitions(table)
+    if not partitions:
+        return True
+    if pa is not None and any(_stored_schema_tag(p) != _schema_tag(table) for p in partitions):
+        return True
+    if not os.path.exists(csv_path):
+        return False
+    csv_mtime = os.path.getmtime(csv_path)
+    return any(os.path.getmtime(p) < csv_mtime for p in partitions)
+
+
+def write_partitions(df: pd.DataFrame, table: str, partition_by: str = "symbol",
+                     sort_by: Optional[str] = "date") -> List[str]:
+    """
+    Écrit une partition par valeur de `partition_by` (utilisable depuis plusieurs workers),
+    colonnes converties selon le schéma de la table.
+    """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed. Please install pyarrow.")
+    os.makedirs(_table_dir(table), exist_ok=True)
+    schema = table_schema(table)
+    metadata = {_SCHEMA_KEY: _schema_tag(table)}
+    written = []
+    for symbol, part in df.groupby(partition_by, sort=True, observed=True):
+        part = apply_schema(part.drop(columns=[partition_by]), schema)
+        if sort_by in part.columns:
+            part = part.sort_values(sort_by, kind="stable")
+        path = _partition_path(table, symbol)
+        _write_arrow(part.reset_index(drop=True), path, metadata)
+        written.append(path)
+    return written
+
+
+def prune_partitions(table: str, keep: List[str]):
+    """Supprime les partitions de symboles qui ne sont plus présents."""
+    keep = set(keep)
+    for path in _list_partitions(table):
+        if path not in keep:
+            os.remove(path)
+
+
+def build_store(csv_path: str, table: str, parse_dates: Optional[List[str]] = None,
+                partition_by: Optional[str] = "symbol"):
+    """Convertit un CSV en partitions Arrow (une par symbole, triée par date)."""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed. Please install pyarrow.")
+    df = read_csv(csv_path, table, parse_dates=parse_dates, partition_by=partition_by)
+    os.makedirs(_table_dir(table), exist_ok=True)
+
+    if partition_by is None:
+        path = _partition_path(table)
+        _write_arrow(df, path, {_SCHEMA_KEY: _schema_tag(table)})
+        written = [path]
+    else:
+        sort_by = (parse_dates or [None])[0]
+        written = write_partitions(df, table, partition_by=partition_by, sort_by=sort_by)
+
+    prune_partitions(table, written)
+
+
+def _ensure_store(csv_path: str, table: str, parse_dates: Optional[List[str]],
+                  partition_by: Optional[str]):
+    if not _list_partitions(table) and not os.path.exists(csv_path):
+        raise FileNotFoundError(csv_path)
+    if is_stale(table, csv_path):
+        build_store(csv_path, table, parse_dates=parse_dates, partition_by=partition_by)
+
+
+def load_partitions(csv_path: str, table: str, parse_dates: Optional[List[str]] = None,
+                    partition_by: str = "symbol") -> Dict[str, pd.DataFrame]:
+    """Retourne {symbole: DataFrame} memory-mappés, reconstruits si le CSV est plus récent."""
+    _ensure_store(csv_path, table, parse_dates, partition_by)
+    prefix = f"{partition_by}="
+    partitions = {}
+    for path in _list_partitions(table):
+        symbol = os.path.basename(path)[len(prefix):-len(".arrow")]
+        partitions[symbol] = _read_arrow(path)
+    return partitions
+
+
+def load_table(csv_path: str, table: str, parse_dates: Optional[List[str]] = None,
+               partition_by: Optional[str] = "symbol") -> pd.DataFrame:
+    """
+    Équivalent de pd.read_csv(csv_path) servi depuis le store colonnaire, aux types du schéma.
+    Les lignes de chaque symbole sont contiguës (rangées par symbole puis par date) et la
+    colonne `partition_by` est une catégorie (code int8, ordre alphabétique comme les
+    identifiants de model_export et du sweep).
+    """
+    if partition_by is None:
+        _ensure_store(csv_path, table, parse_dates, partition_by)
+        return _read_arrow(_partition_path(table))
+
+    partitions = load_partitions(csv_path, table, parse_dates=parse_dates, partition_by=partition_by)
+    if not partitions:
+        return read_csv(csv_path, table, parse_dates=parse_dates, partition_by=partition_by)
+    categories = sorted(partitions)
+    parts = []
+    for code, symbol in enumerate(categories):
+        part = partitions[symbol]
+        codes = np.full(len(part), code, dtype=np.int8 if len(categories) <= 127 else np.int16)
+        parts.append(part.assign(**{partition_by: pd.Categorical.from_codes(codes, categories=categories)}))
+    return pd.concat(parts, ignore_index=True)
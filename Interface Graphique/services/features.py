@@ -0,0 +1,483 @@
+"""
+Features de ALL_FEATURES.csv : calcul vectorisé (build_features) et mise à jour incrémentale
+barre par barre (FeatureEngine) à partir des dernières bougies du marché.
+
+Mise à jour du CSV (depuis la racine du dépôt) :
+    PYTHONPATH="Interface Graphique" python -m services.features [--symbols AAPL,MSFT]
+"""
+import argparse
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.data_store import prune_partitions, write_partitions
+from services.history_store import period_start
+from services.market_data import fetch_latest_candles
+
+CLEANED_CSV = "Data/ALL_CLEANED.csv"
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+FEATURES_CSV = "Data/ALL_FEATURES.csv"
+
+FEATURE_COLUMNS = [
+    "date", "Open", "High", "Low", "Close", "Volume", "symbol",
+    "daily_return", "volatility_10", "MA_5", "MA_20", "MA_50", "RSI_14",
+    "volume_MA_5", "volume_ratio", "target_3_days", "target_direction", "overnight_gap",
+]
+
+# Horizon de la cible : une ligne n'est complète (et écrite) que 3 barres plus tard
+TARGET_HORIZON = 3
+# Nombre de barres à rejouer pour reconstituer l'état glissant (MA_50 + clôture précédente)
+WARMUP_BARS = 51
+
+
+class _RollingWindow:
+    """Fenêtre glissante de taille fixe ; somme et somme des carrés maintenues en O(1)."""
+
+    __slots__ = ("size", "values", "sum", "sumsq", "_pushes")
+
+    # Recalcul périodique des sommes pour borner la dérive numérique
+    RESUM_EVERY = 10_000
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self._pushes = 0
+
+    def push(self, x: float) -> Optional[float]:
+        """Ajoute x ; retourne la valeur sortie de la fenêtre (None si elle n'était pas pleine)."""
+        old = None
+        self.values.append(x)
+        self.sum += x
+        self.sumsq += x * x
+        if len(self.values) > self.size:
+            old = self.values.popleft()
+            self.sum -= old
+            self.sumsq -= old * old
+        self._pushes += 1
+        if self._pushes % self.RESUM_EVERY == 0:
+            self._resum()
+        return old
+
+    def undo(self, old: Optional[float]):
+        """Annule le dernier push (`old` : valeur qu'il avait fait sortir)."""
+        x = self.values.pop()
+        self.sum -= x
+        self.sumsq -= x * x
+        if old is not None:
+            self.values.appendleft(old)
+            self.sum += old
+            self.sumsq += old * old
+        self._pushes -= 1
+        if self._pushes % self.RESUM_EVERY == 0:
+            self._resum()
+
+    def _resum(self):
+        self.sum = math.fsum(self.values)
+        self.sumsq = math.fsum(v * v for v in self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self) -> float:
+        return self.sum / self.size if self.full else math.nan
+
+    def std(self) -> float:
+        # Écart-type d'échantillon (ddof=1), comme pandas rolling().std()
+        if not self.full:
+            return math.nan
+        var = (self.sumsq - self.sum * self.sum / self.size) / (self.size - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class SymbolFeatureState:
+    """
+    État glissant d'un symbole : une nouvelle barre est traitée en O(1).
+
+    La dernière barre reste provisoire (barre du jour encore en formation) : une barre de
+    même date la remplace, après annulation de sa contribution aux fenêtres ; elle n'est
+    validée qu'à l'arrivée d'une date strictement postérieure (ou par commit). Les cibles
+    ne sont calculées qu'à partir de clôtures validées.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.prev_close: Optional[float] = None
+        self.last_date: Optional[pd.Timestamp] = None
+        self.closes = {n: _RollingWindow(n) for n in (5, 20, 50)}
+        self.returns = _RollingWindow(10)
+        self.gains = _RollingWindow(14)
+        self.losses = _RollingWindow(14)
+        self.volumes = _RollingWindow(5)
+        self.pending = deque()  # lignes en attente de leur cible (la dernière est provisoire)
+        # Annulation de la barre provisoire : (fenêtre, valeur sortie) de chaque push,
+        # clôture précédente et date d'avant la barre ; None si la dernière barre est validée
+        self._undo: Optional[tuple] = None
+
+    def update(self, bar: dict) -> Optional[dict]:
+        """
+        Ajoute (ou remplace) la barre provisoire ; retourne la ligne devenue complète
+        (cible connue) si la barre provisoire précédente vient d'être validée.
+        """
+        date = pd.Timestamp(bar["date"])
+        done = None
+        if self.last_date is not None and date <= self.last_date:
+            if date < self.last_date or self._undo is None:
+                return None  # barre déjà validée
+            self._rollback()
+        else:
+            done = self.commit()
+
+        close = float(bar["Close"])
+        volume = float(bar["Volume"])
+        prev = self.prev_close
+        pushes = []
+
+        daily_return = close / prev - 1 if prev else math.nan
+        overnight_gap = float(bar["Open"]) / prev - 1 if prev else math.nan
+        if prev is not None:
+            delta = close - prev
+            for window, x in ((self.returns, daily_return), (self.gains, max(delta, 0.0)),
+                              (self.losses, max(-delta, 0.0))):
+                pushes.append((window, window.push(x)))
+        for window in self.closes.values():
+            pushes.append((window, window.push(close)))
+        pushes.append((self.volumes, self.volumes.push(volume)))
+
+        # RSI à moyennes simples sur 14 barres (définition utilisée dans ALL_FEATURES.csv)
+        rsi = math.nan
+        if self.gains.full:
+            avg_gain, avg_loss = self.gains.mean(), self.losses.mean()
+            if avg_loss > 0:
+                rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+            elif avg_gain > 0:
+                rsi = 100.0
+        volume_ma = self.volumes.mean()
+
+        row = {
+            "date": date,
+            "Open": float(bar["Open"]),
+            "High": float(bar["High"]),
+            "Low": float(bar["Low"]),
+            "Close": close,
+            "Volume": bar["Volume"],
+            "symbol": self.symbol,
+            "daily_return": daily_return,
+            "volatility_10": self.returns.std(),
+            "MA_5": self.closes[5].mean(),
+            "MA_20": self.closes[20].mean(),
+            "MA_50": self.closes[50].mean(),
+            "RSI_14": rsi,
+            "volume_MA_5": volume_ma,
+            "volume_ratio": volume / volume_ma if volume_ma else math.nan,
+            "target_3_days": math.nan,
+            "target_direction": None,
+            "overnight_gap": overnight_gap,
+        }
+        self._undo = (pushes, prev, self.last_date)
+        self.prev_close = close
+        self.last_date = date
+        self.pending.append(row)
+        return done
+
+    def _rollback(self):
+        pushes, self.prev_close, self.last_date = self._undo
+        for window, old in reversed(pushes):
+            window.undo(old)
+        self.pending.pop()
+        self._undo = None
+
+    def commit(self) -> Optional[dict]:
+        """Valide la barre provisoire ; retourne la ligne dont elle complète la cible."""
+        if self._undo is None:
+            return None
+        self._undo = None
+        if len(self.pending) <= TARGET_HORIZON:
+            return None
+        done = self.pending.popleft()
+        done["target_3_days"] = self.pending[-1]["Close"] / done["Close"] - 1
+        done["target_direction"] = int(done["target_3_days"] > 0)
+        return done
+
+    def latest(self) -> Optional[dict]:
+        """Ligne provisoire de la dernière barre (cible encore inconnue)."""
+        return dict(self.pending[-1]) if self.pending else None
+
+
+def _normalize_candles(candles: pd.DataFrame) -> pd.DataFrame:
+    """Accepte les bougies de services/market_data (index Date) ou une table avec colonne date."""
+    if "date" not in candles.columns:
+        candles = candles.reset_index()
+        candles = candles.rename(columns={candles.columns[0]: "date"})
+    dates = pd.to_datetime(candles["date"])
+    if dates.dt.tz is not None:
+        # yfinance renvoie des dates avec fuseau : on garde l'heure locale, comme dans les CSV
+        candles = candles.assign(date=dates.dt.tz_localize(None))
+    return candles.sort_values("date")
+
+
+class FeatureEngine:
+    """
+    Maintient les indicateurs de ALL_FEATURES.csv barre par barre pour chaque symbole.
+    Les lignes ne sont produites qu'une fois leur cible à 3 barres connue (ajout seul).
+    """
+
+    def __init__(self):
+        self.states: Dict[str, SymbolFeatureState] = {}
+
+    @classmethod
+    def from_history(cls, history: pd.DataFrame, warmup: int = WARMUP_BARS + TARGET_HORIZON) -> "FeatureEngine":
+        """
+        Reconstitue l'état à partir de l'historique OHLCV (colonnes date, symbol, Open..Volume).
+        Seules les dernières `warmup` barres de chaque symbole sont rejouées ; elles sont
+        toutes validées (l'historique ne contient que des séances closes).
+        """
+        engine = cls()
+        for symbol, part in history.sort_values(["symbol", "date"]).groupby("symbol", sort=True):
+            state = engine.states.setdefault(symbol, SymbolFeatureState(symbol))
+            for bar in part.tail(warmup).to_dict("records"):
+                state.update(bar)
+            state.commit()
+        return engine
+
+    def update(self, symbol: str, bar: dict) -> Optional[dict]:
+        state = self.states.setdefault(symbol, SymbolFeatureState(symbol))
+        return state.update(bar)
+
+    def commit(self, symbol: str) -> Optional[dict]:
+        state = self.states.get(symbol)
+        return state.commit() if state else None
+
+    def ingest(self, symbol: str, candles: pd.DataFrame) -> pd.DataFrame:
+        """
+        Intègre les nouvelles bougies (les barres validées sont ignorées, la barre provisoire
+        est remplacée), retourne les lignes complètes.
+        """
+        rows = []
+        for bar in _normalize_candles(candles).to_dict("records"):
+            row = self.update(symbol, bar)
+            if row is not None:
+                rows.append(row)
+        return pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+
+    def latest(self, symbol: str) -> Optional[dict]:
+        state = self.states.get(symbol)
+        return state.latest() if state else None
+
+
+def append_features(csv_path: str, rows: pd.DataFrame):
+    """Ajoute les lignes au CSV de features (en-tête écrit si le fichier n'existe pas)."""
+    if rows.empty:
+        return
+    header = not os.path.exists(csv_path)
+    rows[FEATURE_COLUMNS].to_csv(csv_path, mode="a", header=header, index=False)
+
+
+def refresh_from_market(engine: FeatureEngine, symbols: Iterable[str], csv_path: str,
+                        period: str = "5d", interval: str = "1d",
+                        written: Optional[Dict[str, pd.Timestamp]] = None) -> pd.DataFrame:
+    """
+    Récupère les dernières bougies quotidiennes, met à jour l'état et ajoute les lignes complètes
+    au CSV. `written` : dernière date déjà présente dans le CSV par symbole (lignes ignorées).
+    """
+    new_rows = []
+    for symbol in symbols:
+        rows = engine.ingest(symbol, fetch_latest_candles(symbol, period=period, interval=interval))
+        if written and symbol in written:
+            rows = rows[rows["date"] > written[symbol]]
+        if not rows.empty:
+            new_rows.append(rows)
+    if not new_rows:
+        return pd.DataFrame(columns=FEATURE_COLUMNS)
+    new_rows = pd.concat(new_rows, ignore_index=True)
+    append_features(csv_path, new_rows)
+    return new_rows
+
+
+def recompute_features(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Recalcul complet (mode vérification) avec les fenêtres glissantes de pandas.
+    Les lignes dont la cible à 3 barres est inconnue sont retirées, comme dans ALL_FEATURES.csv.
+    """
+    frames = []
+    for symbol, g in history.sort_values(["symbol", "date"]).groupby("symbol", sort=True):
+        g = g.reset_index(drop=True).copy()
+        close, volume = g["Close"], g["Volume"]
+        g["symbol"] = symbol
+        g["daily_return"] = close.pct_change()
+        g["volatility_10"] = g["daily_return"].rolling(10).std()
+        for n in (5, 20, 50):
+            g[f"MA_{n}"] = close.rolling(n).mean()
+        delta = close.diff()
+        gain = delta.clip(lower=0).rolling(14).mean()
+        loss = (-delta.clip(upper=0)).rolling(14).mean()
+        g["RSI_14"] = 100 - 100 / (1 + gain / loss)
+        g["volume_MA_5"] = volume.rolling(5).mean()
+        g["volume_ratio"] = volume / g["volume_MA_5"]
+        g["target_3_days"] = close.shift(-TARGET_HORIZON) / close - 1
+        g["target_direction"] = (g["target_3_days"] > 0).astype(int)
+        g["overnight_gap"] = g["Open"] / close.shift(1) - 1
+        frames.append(g.iloc[:-TARGET_HORIZON] if len(g) > TARGET_HORIZON else g.iloc[:0])
+    return pd.concat(frames, ignore_index=True)[FEATURE_COLUMNS]
+
+
+def _rolling_sum(x: np.ndarray, n: int, pos: np.ndarray) -> np.ndarray:
+    """
+    Somme glissante sur n lignes par différence de sommes cumulées.
+    `pos` est la position de chaque ligne dans son symbole : les fenêtres
+    qui chevaucheraient deux symboles (ou incomplètes) valent NaN.
+    """
+    valid = ~np.isnan(x)
+    cs = np.concatenate(([0.0], np.cumsum(np.where(valid, x, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    idx = np.arange(len(x))
+    lo = np.maximum(idx + 1 - n, 0)
+    out = cs[idx + 1] - cs[lo]
+    complete = (pos >= n - 1) & (counts[idx + 1] - counts[lo] == n)
+    return np.where(complete, out, np.nan)
+
+
+def build_features(history: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcul vectorisé de tous les indicateurs pour tous les symboles en une passe :
+    un seul tri (symbole, date), fenêtres glissantes par sommes cumulées, aucune boucle par ligne.
+    Même résultat que recompute_features.
+    """
+    df = history.sort_values(["symbol", "date"], kind="stable").reset_index(drop=True)
+    n_rows = len(df)
+    codes = pd.factorize(df["symbol"], sort=True)[0]
+    new_group = np.empty(n_rows, dtype=bool)
+    new_group[:1] = True
+    new_group[1:] = codes[1:] != codes[:-1]
+    group_start = np.maximum.accumulate(np.where(new_group, np.arange(n_rows), 0))
+    pos = np.arange(n_rows) - group_start
+    group_size = np.bincount(codes)[codes]
+    remaining = group_size - pos - 1  # lignes restantes dans le symbole
+
+    close = df["Close"].to_numpy(dtype=np.float64)
+    volume = df["Volume"].to_numpy(dtype=np.float64)
+    prev_close = np.where(pos >= 1, np.roll(close, 1), np.nan)
+
+    daily_return = close / prev_close - 1
+    ret_sum = _rolling_sum(daily_return, 10, pos)
+    ret_sumsq = _rolling_sum(daily_return * daily_return, 10, pos)
+    volatility = np.sqrt(np.maximum((ret_sumsq - ret_sum * ret_sum / 10) / 9, 0.0))
+
+    delta = close - prev_close
+    gain = _rolling_sum(np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0)), 14, pos) / 14
+    loss = _rolling_sum(np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0)), 14, pos) / 14
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + gain / loss)
+        volume_ma = _rolling_sum(volume, 5, pos) / 5
+        volume_ratio = volume / volume_ma
+
+    future_close = np.where(remaining >= TARGET_HORIZON, np.roll(close, -TARGET_HORIZON), np.nan)
+    target = future_close / close - 1
+
+    out = df[["date", "Open", "High", "Low", "Close", "Volume", "symbol"]].copy()
+    out["daily_return"] = daily_return
+    out["volatility_10"] = volatility
+    for n in (5, 20, 50):
+        out[f"MA_{n}"] = _rolling_sum(close, n, pos) / n
+    out["RSI_14"] = rsi
+    out["volume_MA_5"] = volume_ma
+    out["volume_ratio"] = volume_ratio
+    out["target_3_days"] = target
+    out["target_direction"] = (target > 0).astype(int)
+    out["overnight_gap"] = df["Open"].to_numpy(dtype=np.float64) / prev_close - 1
+    # Comme ALL_FEATURES.csv : lignes sans cible (3 dernières barres de chaque symbole) retirées
+    return out[remaining >= TARGET_HORIZON].reset_index(drop=True)[FEATURE_COLUMNS]
+
+
+def _build_and_write(history: pd.DataFrame, table: str) -> list:
+    return write_partitions(build_features(history), table)
+
+
+def build_features_store(history: pd.DataFrame, table: str = "ALL_FEATURES", workers: int = 1) -> int:
+    """
+    Construit les features et les écrit directement dans le store colonnaire
+    (services/data_store). Avec workers > 1, les symboles sont répartis entre processus,
+    chacun écrivant ses propres partitions.
+    """
+    symbols = sorted(history["symbol"].unique())
+    if workers <= 1:
+        written = _build_and_write(history, table)
+    else:
+        chunks = [symbols[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_build_and_write, history[history["symbol"].isin(chunk)], table)
+                for chunk in chunks if chunk
+            ]
+            written = [path for future in futures for path in future.result()]
+    prune_partitions(table, written)
+    return len(written)
+
+
+def verify(incremental: pd.DataFrame, full: pd.DataFrame, columns: Optional[Iterable[str]] = None,
+           atol: float = 1e-8) -> Dict[str, float]:
+    """Écart maximal par colonne entre les lignes incrémentales et le recalcul complet."""
+    columns = list(columns or [c for c in FEATURE_COLUMNS if c not in ("date", "symbol")])
+    merged = incremental.merge(full, on=["symbol", "date"], suffixes=("_inc", "_full"))
+    errors = {}
+    for col in columns:
+        a = merged[f"{col}_inc"].to_numpy(dtype=float)
+        b = merged[f"{col}_full"].to_numpy(dtype=float)
+        both_nan = np.isnan(a) & np.isnan(b)
+        errors[col] = float(np.nanmax(np.where(both_nan, 0.0, np.abs(a - b)), initial=0.0))
+    bad = {col: err for col, err in errors.items() if not err <= atol}
+    if bad:
+        raise AssertionError(f"Features incrémentales divergentes : {bad}")
+    return errors
+
+
+# Périodes yfinance, de la plus courte à la plus longue
+_REFRESH_PERIODS = ["5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "max"]
+
+
+def refresh_period(last_date: pd.Timestamp, now: Optional[pd.Timestamp] = None) -> str:
+    """Plus courte période yfinance couvrant les barres parues depuis `last_date`."""
+    now = now or pd.Timestamp.now()
+    for period in _REFRESH_PERIODS[:-1]:
+        if period_start(period, now) < last_date:
+            return period
+    return "max"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", default=CLEANED_CSV)
+    parser.add_argument("--out", default=FEATURES_CSV)
+    parser.add_argument("--symbols", default=None, help="liste séparée par des virgules (défaut : tous)")
+    args = parser.parse_args()
+
+    from services.data_store import load_partitions
+
+    frames = load_partitions(args.history, "ALL_CLEANED", parse_dates=["date"])
+    features = load_partitions(args.out, "ALL_FEATURES", parse_dates=["date"])
+    symbols = [s for s in (args.symbols.split(",") if args.symbols else sorted(frames)) if s in frames]
+    if not symbols:
+        parser.error(f"aucun historique pour {args.symbols}")
+    history = pd.concat([frames[s][["date", *OHLCV]].assign(symbol=s) for s in symbols], ignore_index=True)
+
+    engine = FeatureEngine.from_history(history)
+    # Toutes les barres parues depuis la fin de l'historique : l'état glissant reste continu
+    period = refresh_period(min(frames[s]["date"].max() for s in symbols))
+    written = {s: df["date"].max() for s, df in features.items()}
+    rows = refresh_from_market(engine, symbols, args.out, period=period, written=written)
+    print(f"{len(rows)} ligne(s) ajoutée(s) à {args.out} (période {period})")
+    for symbol in symbols:
+        latest = engine.latest(symbol)
+        if latest is not None:
+            print(f"  {symbol} : dernière barre du {latest['date']:%Y-%m-%d}, clôture {latest['Close']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from typing import Callable, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.cache import TTLCache, estimate_size
+
+# Fréquences d'agrégation essayées dans l'ordre jusqu'à tenir le budget de points
+# (bougies étiquetées au début de la semaine / du mois / du trimestre)
+DOWNSAMPLE_RULES = ["W-MON", "MS", "QS"]
+
+OHLC_AGG = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+
+def downsample_ohlc(df: pd.DataFrame, max_points: int = 400, date_col: str = "date") -> pd.DataFrame:
+    """
+    Agrège les bougies en bougies hebdomadaires / mensuelles / trimestrielles
+    pour ne pas dépasser `max_points` (ouverture = première, clôture = dernière,
+    plus haut = max, plus bas = min, volume = somme). La règle retenue est
+    dans `attrs["rule"]` du résultat.
+    """
+    if len(df) <= max_points:
+        return df
+    agg = {col: how for col, how in OHLC_AGG.items() if col in df.columns}
+    indexed = df.set_index(date_col)[list(agg)]
+    for rule in DOWNSAMPLE_RULES:
+        resampled = indexed.resample(rule, label="left", closed="left").agg(agg).dropna(subset=["Close"])
+        if len(resampled) <= max_points:
+            break
+    resampled = resampled.reset_index()
+    resampled.attrs["rule"] = rule
+    return resampled
+
+
+def compact_values(values, decimals: int = 4) -> List[Optional[float]]:
+    """Valeurs arrondies pour le JSON envoyé au navigateur (NaN -> null)."""
+    values = np.round(np.asarray(values, dtype=np.float64), decimals)
+    return [None if v != v else v for v in values.tolist()]
+
+
+def compact_dates(dates) -> List[str]:
+    """Dates au format ISO (jour seul si toutes les dates sont à minuit)."""
+    dates = pd.DatetimeIndex(dates)
+    daily = (dates == dates.normalize()).all()
+    return list(dates.strftime("%Y-%m-%d" if daily else "%Y-%m-%dT%H:%M:%S"))
+
+
+def series_payload(df: pd.DataFrame, date_col: str = "date", decimals: int = 4) -> dict:
+    """
+    Série OHLC en colonnes (x, open, high, low, close) pour un rendu côté navigateur :
+    dates ISO et prix arrondis, sans les clés répétées d'une liste d'enregistrements.
+    """
+    return {
+        "x": compact_dates(df[date_col]),
+        **{col.lower(): compact_values(df[col], decimals) for col in ("Open", "High", "Low", "Close")},
+    }
+
+
+def figure_size(fig: dict) -> int:
+    """Taille approximative d'une figure sérialisée (tableaux des traces + mise en page)."""
+    size = len(repr(fig.get("layout", {})))
+    for trace in fig.get("data", []):
+        size += sum(estimate_size(value) for value in trace.values())
+    return size
+
+
+class FigureCache:
+    """Figures déjà construites et sérialisées, par clé (symbole, période, dernière barre, ...)."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._cache = TTLCache(max_bytes=max_bytes, sizeof=figure_size)
+
+    def get_or_build(self, key: Hashable, build: Callable[[], dict]) -> dict:
+        return self._cache.get_or_load(key, build, ttl=self.ttl)
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
@@ -0,0 +1,134 @@
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.backtest import bars_per_year
+from services.model_inputs import N_TIMESTEPS, to_model_input, window_closes
+from services.symbol_index import SymbolIndex
+
+FORECAST_STEPS = int(os.getenv("FORECAST_STEPS", "30"))
+FORECAST_SAMPLES = int(os.getenv("FORECAST_SAMPLES", "64"))
+# Horizon de la cible du modèle (target_3_days) : une prédiction = rendement sur 3 barres
+TARGET_HORIZON = 3
+
+
+def rollout(windows: np.ndarray, symbol_ids: np.ndarray, volatility: np.ndarray,
+            predict_batch: Callable[[List[np.ndarray]], np.ndarray], steps: int = FORECAST_STEPS,
+            n_samples: int = FORECAST_SAMPLES, transform: Callable[[np.ndarray], np.ndarray] = to_model_input,
+            horizon: int = TARGET_HORIZON, quantiles=(0.1, 0.9), seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Prévision autorégressive sur `steps` barres pour tous les symboles à la fois.
+
+    Chaque symbole a 1 trajectoire centrale (sans bruit) + `n_samples` trajectoires Monte-Carlo
+    (rendement prédit + bruit gaussien de la volatilité du symbole). Toutes les trajectoires
+    forment un seul batch : un appel au modèle par pas. Les fenêtres sont des vues
+    glissantes d'un tampon (batch, n + steps), sans décalage des données à chaque pas.
+    """
+    n_symbols, n = windows.shape
+    per_symbol = n_samples + 1
+    batch = n_symbols * per_symbol
+    rng = np.random.default_rng(seed)
+
+    buffer = np.empty((batch, n + steps), dtype=np.float64)
+    buffer[:, :n] = np.repeat(windows, per_symbol, axis=0)
+    ids = np.repeat(np.asarray(symbol_ids).reshape(-1), per_symbol).reshape(-1, 1)
+    sigma = np.repeat(np.asarray(volatility, dtype=np.float64), per_symbol)
+    sigma[::per_symbol] = 0.0
+
+    for k in range(steps):
+        preds = np.asarray(predict_batch([transform(buffer[:, k:k + n]), ids]), dtype=np.float64)
+        preds = np.clip(preds.reshape(batch, -1)[:, 0], -0.99, None)
+        # Rendement sur l'horizon de la cible ramené à une barre
+        step_return = (1.0 + preds) ** (1.0 / horizon) - 1.0 + sigma * rng.standard_normal(batch)
+        buffer[:, n + k] = buffer[:, n + k - 1] * (1.0 + step_return)
+
+    paths = buffer[:, n:].reshape(n_symbols, per_symbol, steps)
+    samples = paths[:, 1:] if n_samples else paths
+    return {
+        "forecast": paths[:, 0],
+        "lower": np.quantile(samples, quantiles[0], axis=1),
+        "upper": np.quantile(samples, quantiles[1], axis=1),
+    }
+
+
+def recent_volatility(close: np.ndarray, bars: int = 20) -> float:
+    """Écart-type des rendements des `bars` dernières barres : amplitude du bruit Monte-Carlo."""
+    close = np.asarray(close, dtype=np.float64)[-(bars + 1):]
+    return float(np.nanstd(np.diff(close) / close[:-1])) if len(close) > 2 else 0.0
+
+
+def future_dates(dates: np.ndarray, steps: int) -> pd.DatetimeIndex:
+    """Dates des barres prévues : jours calendaires pour une crypto, jours ouvrés sinon."""
+    freq = "D" if bars_per_year(dates) > 300 else "B"
+    return pd.date_range(pd.Timestamp(dates[-1]), periods=steps + 1, freq=freq)[1:]
+
+
+class ForecastStore:
+    """
+    Prévisions de tous les symboles, recalculées ensemble (un batch par pas)
+    quand le modèle ou la dernière barre d'un symbole change.
+    """
+
+    def __init__(self, model_hash: Callable[[], str],
+                 predict_batch: Callable[[List[np.ndarray]], np.ndarray],
+                 symbol_to_id: Dict[str, int], steps: int = FORECAST_STEPS,
+                 n_samples: int = FORECAST_SAMPLES, n_timesteps: int = N_TIMESTEPS,
+                 transform: Callable[[np.ndarray], np.ndarray] = to_model_input):
+        self.model_hash = model_hash
+        self.predict_batch = predict_batch
+        self.symbol_to_id = symbol_to_id
+        self.steps = steps
+        self.n_samples = n_samples
+        self.n_timesteps = n_timesteps
+        self.transform = transform
+        self._key = None
+        self._forecasts: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+        self._pending: Optional[threading.Thread] = None
+
+    def _current_key(self, index: SymbolIndex) -> tuple:
+        last = tuple((s, index.dates(s)[-1], index.revision(s)) for s in index.symbols() if len(index.dates(s)))
+        return self.model_hash(), last
+
+    def refresh(self, index: SymbolIndex):
+        with self._lock:
+            key = self._current_key(index)
+            if key == self._key:
+                return
+            symbols = [s for s in index.symbols()
+                       if s in self.symbol_to_id and len(index.dates(s)) >= window_closes(self.n_timesteps)]
+            forecasts = {}
+            if symbols:
+                frames = [index.get(s) for s in symbols]
+                size = window_closes(self.n_timesteps)
+                windows = np.stack([f["Close"].to_numpy(dtype=np.float64)[-size:] for f in frames])
+                volatility = np.array([recent_volatility(f["Close"].to_numpy()) for f in frames])
+                result = rollout(windows, np.array([self.symbol_to_id[s] for s in symbols]), volatility,
+                                 self.predict_batch, steps=self.steps, n_samples=self.n_samples,
+                                 transform=self.transform)
+                for i, (symbol, frame) in enumerate(zip(symbols, frames)):
+                    forecasts[symbol] = pd.DataFrame({
+                        "date": future_dates(frame["date"].to_numpy(), self.steps),
+                        "forecast": result["forecast"][i],
+                        "lower": result["lower"][i],
+                        "upper": result["upper"][i],
+                    })
+            self._forecasts = forecasts
+            self._key = key
+
+    def get(self, symbol: str, index: SymbolIndex, wait: bool = True) -> Optional[pd.DataFrame]:
+        """
+        Prévision du symbole. wait=False (callbacks) : renvoie la dernière prévision connue
+        et lance le recalcul en arrière-plan si elle est périmée (None tant qu'aucune n'existe).
+        """
+        if self.steps <= 0:
+            return None
+        if wait:
+            self.refresh(index)
+        elif self._current_key(index) != self._key and (self._pending is None or not self._pending.is_alive()):
+            self._pending = threading.Thread(target=self.refresh, args=(index,), daemon=True)
+            self._pending.start()
+        return self._forecasts.get(symbol)
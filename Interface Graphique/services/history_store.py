@@ -0,0 +1,224 @@
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+HISTORY_DB = os.getenv("MARKET_HISTORY_DB", os.path.join("Data", "store", "market_history.sqlite"))
+
+_OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+# Durée d'une barre par intervalle yfinance
+BAR_DURATION = {
+    '1m': pd.Timedelta(minutes=1),
+    '2m': pd.Timedelta(minutes=2),
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '30m': pd.Timedelta(minutes=30),
+    '60m': pd.Timedelta(hours=1),
+    '90m': pd.Timedelta(minutes=90),
+    '1h': pd.Timedelta(hours=1),
+    '1d': pd.Timedelta(days=1),
+    '5d': pd.Timedelta(days=5),
+    '1wk': pd.Timedelta(weeks=1),
+    '1mo': pd.Timedelta(days=31),
+    '3mo': pd.Timedelta(days=92),
+}
+
+_PERIOD_UNITS = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_key ON coverage (symbol, interval);
+CREATE TABLE IF NOT EXISTS series (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    tz TEXT,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+
+def bar_duration(interval: str) -> pd.Timedelta:
+    return BAR_DURATION.get(interval, pd.Timedelta(minutes=1))
+
+
+def period_start(period: str, now: pd.Timestamp) -> Optional[pd.Timestamp]:
+    """Début de la fenêtre demandée pour une période yfinance ('5d', '1mo', 'ytd', 'max'...)."""
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return now.normalize().replace(month=1, day=1)
+    for suffix, unit in _PERIOD_UNITS.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return now - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Période inconnue : {period}")
+
+
+def _to_epoch(ts: pd.Timestamp) -> int:
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return int(ts.as_unit('s').asm8.astype(np.int64))
+
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class HistoryStore:
+    """
+    Historique OHLCV local, en ajout seul, par (symbole, intervalle) :
+    - table `candles` indexée par (symbol, interval, ts), horodatages en secondes UTC
+    - table `coverage` : plages déjà demandées au fournisseur (même si elles ne contenaient
+      aucune barre : week-ends, fermetures), pour ne redemander que les trous
+    """
+
+    def __init__(self, path: str = HISTORY_DB):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._write_lock:
+            self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # Une connexion par thread (callbacks Dash, poller, workers)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def missing_ranges(self, symbol: str, interval: str, start: Optional[pd.Timestamp],
+                       end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Plages de [start, end] jamais demandées au fournisseur (start=None : depuis l'origine, epoch 0)."""
+        cursor = _to_epoch(start) if start is not None else 0
+        hi = _to_epoch(end)
+        rows = self._conn().execute(
+            "SELECT start_ts, end_ts FROM coverage WHERE symbol = ? AND interval = ?", (symbol, interval)
+        ).fetchall()
+        # Trous plus courts qu'une barre ignorés : ils ne peuvent contenir aucune barre complète
+        min_gap = bar_duration(interval).total_seconds()
+        missing = []
+        for c_start, c_end in _merge_ranges(rows):
+            if c_end <= cursor:
+                continue
+            if c_start >= hi:
+                break
+            if c_start - cursor >= min_gap:
+                missing.append((cursor, c_start))
+            cursor = max(cursor, c_end)
+        if hi - cursor >= min_gap:
+            missing.append((cursor, hi))
+        return [(pd.Timestamp(a, unit='s', tz='UTC'), pd.Timestamp(b, unit='s', tz='UTC')) for a, b in missing]
+
+    def append(self, symbol: str, interval: str, candles: pd.DataFrame,
+               covered: Tuple[Optional[pd.Timestamp], pd.Timestamp]) -> int:
+        """
+        Ajoute (ou remplace, pour la dernière barre encore en formation) des bougies et la plage
+        couverte, bornée à la dernière barre reçue. Réponse vide (yfinance renvoie un tableau vide
+        en cas de limitation ou d'échec passager) : aucune plage n'est marquée couverte.
+        """
+        if candles.empty:
+            return 0
+        index = pd.DatetimeIndex(candles.index)
+        tz = str(index.tz) if index.tz is not None else None
+        if tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        ts = index.as_unit('s').asi8
+        values = candles[_OHLCV].to_numpy(dtype=np.float64)
+        rows = [(symbol, interval, int(t), *map(float, v)) for t, v in zip(ts, values)]
+
+        start, end = covered
+        cov_start = _to_epoch(start) if start is not None else 0
+        cov_end = min(_to_epoch(end), int(ts.max()))
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                if cov_end >= cov_start:
+                    conn.execute("INSERT INTO coverage VALUES (?, ?, ?, ?)", (symbol, interval, cov_start, cov_end))
+                conn.execute(
+                    "INSERT INTO series VALUES (?, ?, ?) ON CONFLICT (symbol, interval) "
+                    "DO UPDATE SET tz = excluded.tz", (symbol, interval, tz)
+                )
+                self._compact_coverage(conn, symbol, interval)
+        return len(rows)
+
+    @staticmethod
+    def _compact_coverage(conn: sqlite3.Connection, symbol: str, interval: str):
+        rows = conn.execute(
+            "SELECT start_ts, end_ts FROM coverage WHERE symbol = ? AND interval = ?", (symbol, interval)
+        ).fetchall()
+        merged = _merge_ranges(rows)
+        if len(merged) < len(rows):
+            conn.execute("DELETE FROM coverage WHERE symbol = ? AND interval = ?", (symbol, interval))
+            conn.executemany("INSERT INTO coverage VALUES (?, ?, ?, ?)",
+                             [(symbol, interval, a, b) for a, b in merged])
+
+    def load(self, symbol: str, interval: str, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        conn = self._conn()
+        lo = _to_epoch(start) if start is not None else -2 ** 62
+        rows = conn.execute(
+            "SELECT ts, open, high, low, close, volume FROM candles "
+            "WHERE symbol = ? AND interval = ? AND ts >= ? ORDER BY ts", (symbol, interval, lo)
+        ).fetchall()
+        tz_row = conn.execute(
+            "SELECT tz FROM series WHERE symbol = ? AND interval = ?", (symbol, interval)
+        ).fetchone()
+        data = np.array(rows, dtype=np.float64).reshape(-1, 6)
+        index = pd.DatetimeIndex(pd.to_datetime(data[:, 0].astype(np.int64), unit='s'), name='Date')
+        if tz_row is not None and tz_row[0]:
+            index = index.tz_localize('UTC').tz_convert(tz_row[0])
+        return pd.DataFrame(data[:, 1:], index=index, columns=_OHLCV)
+
+    def tail(self, symbol: str, interval: str, span: Optional[pd.Timedelta] = None) -> pd.DataFrame:
+        """Barres des `span` dernières secondes avant la dernière barre connue (tout si span=None)."""
+        if span is None:
+            return self.load(symbol, interval)
+        last = self._conn().execute(
+            "SELECT MAX(ts) FROM candles WHERE symbol = ? AND interval = ?", (symbol, interval)
+        ).fetchone()[0]
+        if last is None:
+            return self.load(symbol, interval)
+        return self.load(symbol, interval, start=pd.Timestamp(last - int(span.total_seconds()), unit='s'))
+
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+
+def history_store() -> Optional[HistoryStore]:
+    """Store partagé ; MARKET_HISTORY=0 le désactive (retour au téléchargement complet)."""
+    global _store
+    if os.getenv("MARKET_HISTORY", "1") == "0":
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+    return _store
@@ -0,0 +1,207 @@
+"""
+Indicateurs techniques vectorisés (NumPy) du panneau « Indicateurs Techniques ».
+
+Chaque série est calculée une fois sur tout l'historique du symbole et mémorisée par
+(symbole, indicateur, paramètres, dernière barre) : une période n'est qu'une vue
+(recherche dichotomique), et afficher / masquer une courbe ne recalcule rien.
+Les colonnes déjà présentes dans ALL_FEATURES (MA_5/20/50, RSI_14, volatility_10)
+sont reprises telles quelles sur les dates qu'elles couvrent ; seules les autres barres
+sont calculées.
+"""
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from services.symbol_index import SymbolIndex
+
+
+# === CALCULS (tableaux complets, NaN tant que la fenêtre n'est pas remplie) ===
+def moving_average(close: np.ndarray, window: int = 20) -> Dict[str, np.ndarray]:
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    if len(close) >= window:
+        csum = np.cumsum(np.insert(close, 0, 0.0))
+        out[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return {"value": out}
+
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    # Écart-type d'échantillon (ddof=1), comme pandas rolling().std()
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window).std(axis=-1, ddof=1)
+    return out
+
+
+def _returns(close: np.ndarray) -> np.ndarray:
+    close = np.asarray(close, dtype=np.float64)
+    returns = np.full(len(close), np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1
+    return returns
+
+
+def rsi(close: np.ndarray, window: int = 14) -> Dict[str, np.ndarray]:
+    """RSI à moyennes simples sur `window` variations (définition de RSI_14 dans ALL_FEATURES)."""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    if len(close) > window:
+        delta = np.diff(close)
+        gains = sliding_window_view(np.maximum(delta, 0.0), window).mean(axis=-1)
+        losses = sliding_window_view(np.maximum(-delta, 0.0), window).mean(axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = 100 - 100 / (1 + gains / losses)
+        value = np.where(losses > 0, value, np.where(gains > 0, 100.0, np.nan))
+        out[window:] = value
+    return {"value": out}
+
+
+def bollinger(close: np.ndarray, window: int = 20, k: float = 2.0) -> Dict[str, np.ndarray]:
+    close = np.asarray(close, dtype=np.float64)
+    middle = moving_average(close, window)["value"]
+    std = _rolling_std(close, window)
+    return {"middle": middle, "upper": middle + k * std, "lower": middle - k * std}
+
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    # Récurrence exécutée en C par pandas (pas de boucle Python par barre)
+    return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    close = np.asarray(close, dtype=np.float64)
+    line = _ema(close, fast) - _ema(close, slow)
+    # Valeurs non significatives avant que la moyenne lente ait vu `slow` barres
+    line[:slow - 1] = np.nan
+    signal_line = np.full(len(close), np.nan)
+    if len(close) >= slow:
+        signal_line[slow - 1:] = _ema(line[slow - 1:], signal)
+    return {"macd": line, "signal": signal_line, "histogram": line - signal_line}
+
+
+def volatility(close: np.ndarray, window: int = 10) -> Dict[str, np.ndarray]:
+    """Écart-type des rendements journaliers sur `window` barres (volatility_10 dans ALL_FEATURES)."""
+    returns = _returns(close)
+    out = np.full(len(returns), np.nan)
+    if len(returns) > window:
+        out[window:] = _rolling_std(returns[1:], window)[window - 1:]
+    return {"value": out}
+
+
+# Indicateur -> (fonction, paramètres par défaut)
+INDICATORS: Dict[str, Tuple[Callable[..., Dict[str, np.ndarray]], dict]] = {
+    "ma": (moving_average, {"window": 20}),
+    "rsi": (rsi, {"window": 14}),
+    "bollinger": (bollinger, {"window": 20, "k": 2.0}),
+    "macd": (macd, {"fast": 12, "slow": 26, "signal": 9}),
+    "volatility": (volatility, {"window": 10}),
+}
+
+# Colonnes de ALL_FEATURES équivalentes : (indicateur, fenêtre) -> colonne
+PRECOMPUTED = {
+    ("ma", 5): "MA_5",
+    ("ma", 20): "MA_20",
+    ("ma", 50): "MA_50",
+    ("rsi", 14): "RSI_14",
+    ("volatility", 10): "volatility_10",
+}
+
+
+def _params(name: str, params: dict) -> Tuple[Tuple[str, object], ...]:
+    if name not in INDICATORS:
+        raise ValueError(f"Indicateur inconnu : {name} (attendu : {', '.join(INDICATORS)})")
+    merged = dict(INDICATORS[name][1])
+    unknown = set(params) - set(merged)
+    if unknown:
+        raise ValueError(f"Paramètres inconnus pour {name} : {', '.join(sorted(unknown))}")
+    merged.update(params)
+    return tuple(sorted(merged.items()))
+
+
+class IndicatorEngine:
+    """
+    Séries d'indicateurs mémorisées par (symbole, indicateur, paramètres) et invalidées
+    quand la dernière barre du symbole change ou que des barres live y sont fusionnées. `features` (optionnel) : index de ALL_FEATURES
+    dont les colonnes précalculées sont réutilisées.
+    """
+
+    def __init__(self, index: SymbolIndex, features: Optional[SymbolIndex] = None):
+        self.index = index
+        self.features = features
+        self._entries: Dict[tuple, tuple] = {}  # (symbol, name, params) -> ((last bar, révision), series)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _precomputed(self, symbol: str, name: str, params: dict, close: np.ndarray) -> Optional[np.ndarray]:
+        column = PRECOMPUTED.get((name, params.get("window")))
+        if column is None or self.features is None or symbol not in self.features:
+            return None
+        frame = self.features.get(symbol)
+        if column not in frame.columns or frame.empty:
+            return None
+        # ALL_FEATURES couvre une plage contiguë de l'historique affiché (en pratique les derniers
+        # mois d'un historique qui remonte à 1980) : alignement par date sur l'index
+        dates = self.index.dates(symbol)
+        feature_dates = self.features.dates(symbol).astype(dates.dtype)
+        start = int(np.searchsorted(dates, feature_dates[0]))
+        n_pre = min(len(feature_dates), len(dates) - start)
+        if n_pre <= 0 or not np.array_equal(feature_dates[:n_pre], dates[start:start + n_pre]):
+            return None
+        precomputed = frame[column].to_numpy(dtype=np.float64)[:n_pre]
+        if np.isnan(precomputed).any():
+            # Colonne non préchauffée : calcul complet
+            return None
+        end = start + n_pre
+        fn = INDICATORS[name][0]
+        values = np.empty(len(close))
+        if start:
+            # Barres antérieures à ALL_FEATURES : la valeur en i ne dépend que des barres <= i
+            values[:start] = fn(close[:start], **params)["value"]
+        values[start:end] = precomputed
+        if len(close) > end:
+            # Barres plus récentes que ALL_FEATURES : calcul sur la seule fenêtre nécessaire
+            lookback = params["window"] + 1
+            tail_start = max(end - lookback, 0)
+            values[end:] = fn(close[tail_start:], **params)["value"][end - tail_start:]
+        return values
+
+    def _compute(self, symbol: str, name: str, params: dict) -> Dict[str, np.ndarray]:
+        close = self.index.get(symbol)["Close"].to_numpy(dtype=np.float64)
+        precomputed = self._precomputed(symbol, name, params, close)
+        if precomputed is not None:
+            return {"value": precomputed}
+        return INDICATORS[name][0](close, **params)
+
+    def series(self, symbol: str, name: str, **params) -> Dict[str, np.ndarray]:
+        """Séries complètes de l'indicateur (alignées sur les dates de l'index)."""
+        params = _params(name, params)
+        key = (symbol, name, params)
+        dates = self.index.dates(symbol)
+        last = (dates[-1] if len(dates) else None, self.index.revision(symbol))
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == last:
+            self.hits += 1
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != last:
+                self.misses += 1
+                entry = self._entries[key] = (last, self._compute(symbol, name, dict(params)))
+        return entry[1]
+
+    def window(self, symbol: str, name: str, start: Optional[pd.Timestamp] = None, **params) -> pd.DataFrame:
+        """Indicateur sur la période commençant à `start` (colonne date + une colonne par série)."""
+        series = self.series(symbol, name, **params)
+        dates = self.index.dates(symbol)
+        i = 0
+        if start is not None:
+            i = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start).to_datetime64()).astype(dates.dtype)))
+        return pd.DataFrame({"date": dates[i:], **{key: values[i:] for key, values in series.items()}})
+
+    def latest(self, symbol: str, name: str, **params) -> Dict[str, float]:
+        """Dernière valeur de chaque série de l'indicateur."""
+        return {key: float(values[-1]) if len(values) else float("nan")
+                for key, values in self.series(symbol, name, **params).items()}
@@ -0,0 +1,109 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class BatchInferenceServer:
+    """
+    Serveur d'inférence en thread :
+    - le modèle est chargé une seule fois par le thread de travail
+    - les requêtes arrivées dans une courte fenêtre sont regroupées en une seule passe
+      (une passe par modèle si des requêtes en désignent un autre, cf. VersionedModel.route)
+    - chaque appelant récupère ses lignes de sortie via un Future
+    """
+
+    def __init__(self, model_loader: Callable[[], Any], max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.model_loader = model_loader
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.model = None
+        self.batches = 0
+        self.samples = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="lstm-inference", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._queue.put(None)
+
+    def submit(self, inputs: Sequence[np.ndarray], model: Any = None) -> Future:
+        """
+        Soumet une liste d'entrées (première dimension = batch), retourne un Future.
+        `model` : modèle (predict_on_batch) servant cette requête, sinon celui de model_loader.
+        """
+        self.start()
+        future = Future()
+        inputs = [np.asarray(x) for x in inputs]
+        self._queue.put((inputs, len(inputs[0]), future, model))
+        return future
+
+    def predict(self, inputs: Sequence[np.ndarray], timeout: Optional[float] = None, model: Any = None) -> np.ndarray:
+        """Équivalent bloquant de model.predict(inputs) pour un appelant."""
+        return self.submit(inputs, model).result(timeout)
+
+    def _collect(self, first) -> List[tuple]:
+        batch = [first]
+        size = first[1]
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+            size += item[1]
+        return batch
+
+    def _run(self):
+        try:
+            self.model = self.model_loader()
+        except BaseException as e:
+            # Modèle indisponible : toutes les requêtes échouent avec l'erreur de chargement
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                item[2].set_exception(e)
+
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            groups: Dict[int, List[tuple]] = {}
+            for item in self._collect(first):
+                groups.setdefault(id(item[3]), []).append(item)
+            for batch in groups.values():
+                self._run_batch(batch[0][3] if batch[0][3] is not None else self.model, batch)
+
+    def _run_batch(self, model, batch: List[tuple]):
+        n_inputs = len(batch[0][0])
+        try:
+            stacked = [np.concatenate([item[0][i] for item in batch]) for i in range(n_inputs)]
+            outputs = np.asarray(model.predict_on_batch(stacked))
+        except BaseException as e:
+            for item in batch:
+                item[2].set_exception(e)
+            return
+        self.batches += 1
+        self.samples += len(outputs)
+        offset = 0
+        for _, n, future, _ in batch:
+            future.set_result(outputs[offset:offset + n])
+            offset += n
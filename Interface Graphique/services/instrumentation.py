@@ -0,0 +1,361 @@
+"""
+Instrumentation de l'application (sans dépendance) :
+- histogrammes de durée par callback Dash et par étape (découpage, figure, prédiction, sérialisation...)
+- compteurs des appels fournisseurs de données (succès / erreurs, par fournisseur)
+- taux de succès des caches, lus au moment de la collecte
+- exposition au format texte Prometheus sur /metrics (boucle locale uniquement par défaut)
+- profileur par échantillonnage optionnel (PROFILE_SAMPLING=1), piles agrégées sur /metrics/profile
+"""
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter as _Counts
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bornes des histogrammes de durée (secondes)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[Tuple[str, ...], list] = {}  # key -> [compteurs par borne, somme, nombre]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels[n]) for n in self.labelnames))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, n) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, c in zip(self.buckets, counts):
+                    cumulative += c
+                    le = 'le="' + _number(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    """Métriques de l'application + collecteurs appelés à chaque lecture de /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[str]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for collector in list(self._collectors):
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                lines.append(f"# collecteur en échec : {_escape(repr(e))}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+CALLBACK_SECONDS = metrics.histogram(
+    "dash_callback_seconds", "Durée totale des callbacks Dash", ["callback"])
+CALLBACK_ERRORS = metrics.counter(
+    "dash_callback_errors_total", "Exceptions levées par les callbacks Dash", ["callback"])
+STAGE_SECONDS = metrics.histogram(
+    "dash_callback_stage_seconds", "Durée des étapes d'un callback Dash", ["callback", "stage"])
+FETCH_SECONDS = metrics.histogram(
+    "market_data_fetch_seconds", "Durée des appels aux fournisseurs de données", ["provider"])
+FETCH_REQUESTS = metrics.counter(
+    "market_data_requests_total", "Appels aux fournisseurs de données par résultat", ["provider", "outcome"])
+
+_current = threading.local()
+
+
+# === CALLBACKS ===
+def instrumented(fn: Callable) -> Callable:
+    """Décorateur de callback Dash (à placer sous @callback) : durée totale et erreurs."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        previous = getattr(_current, "callback", None)
+        _current.callback = name
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            # PreventUpdate n'est pas une erreur
+            if type(e).__name__ != "PreventUpdate":
+                CALLBACK_ERRORS.inc(callback=name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - t0
+            CALLBACK_SECONDS.observe(elapsed, callback=name)
+            _current.callback = previous
+            _remember_callback(name, elapsed)
+
+    return wrapper
+
+
+def _remember_callback(name: str, elapsed: float):
+    # Lu par le hook after_request pour isoler la sérialisation de la réponse
+    try:
+        from flask import g, has_request_context
+    except Exception:
+        return
+    if has_request_context():
+        g.instrumented_callback = (name, elapsed)
+
+
+@contextmanager
+def stage(name: str, callback: Optional[str] = None):
+    """Mesure une étape du callback en cours : `with stage("figure"): ...`."""
+    callback = callback or getattr(_current, "callback", None) or "hors_callback"
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, callback=callback, stage=name)
+
+
+# === FOURNISSEURS DE DONNÉES ===
+@contextmanager
+def track_fetch(provider: str):
+    """Mesure un appel fournisseur et compte son résultat (ok / error)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        FETCH_REQUESTS.inc(provider=provider, outcome="error")
+        raise
+    else:
+        FETCH_REQUESTS.inc(provider=provider, outcome="ok")
+    finally:
+        FETCH_SECONDS.observe(time.perf_counter() - t0, provider=provider)
+
+
+# === CACHES ===
+_CACHE_FAMILIES = [
+    ("cache_hits_total", "counter", "Lectures servies par le cache"),
+    ("cache_misses_total", "counter", "Lectures ayant nécessité un calcul ou un chargement"),
+    ("cache_hit_ratio", "gauge", "Part des lectures servies par le cache"),
+]
+_caches: Dict[str, object] = {}
+
+
+def register_cache(name: str, cache) -> None:
+    """Expose les compteurs hits / misses d'un cache (lus à la collecte, aucun coût par accès)."""
+    _caches[name] = cache
+
+
+def _collect_caches() -> List[str]:
+    # Un seul collecteur : chaque famille forme un groupe contigu (HELP, TYPE puis ses échantillons)
+    samples = {family: [] for family, _, _ in _CACHE_FAMILIES}
+    for name, cache in list(_caches.items()):
+        hits, misses = int(cache.hits), int(cache.misses)
+        ratio = hits / (hits + misses) if hits + misses else 0.0
+        label = f'{{cache="{_escape(name)}"}}'
+        samples["cache_hits_total"].append(f"cache_hits_total{label} {hits}")
+        samples["cache_misses_total"].append(f"cache_misses_total{label} {misses}")
+        samples["cache_hit_ratio"].append(f"cache_hit_ratio{label} {ratio!r}")
+    lines: List[str] = []
+    for family, kind, help in _CACHE_FAMILIES:
+        lines += [f"# HELP {family} {help}", f"# TYPE {family} {kind}"] + samples[family]
+    return lines
+
+
+metrics.add_collector(_collect_caches)
+
+
+# === PROFILEUR PAR ÉCHANTILLONNAGE ===
+# Cadres terminaux d'un thread en attente (pollers, serveur au repos) : ignorés par défaut
+IDLE_FRAMES = ("threading.py:wait", "selectors.py:select", "_reloader.py:run")
+
+
+class SamplingProfiler:
+    """
+    Relève périodiquement la pile de chaque thread (sys._current_frames) et agrège
+    les piles identiques : format « replié » (une ligne `cadre;cadre;... n`),
+    lisible par flamegraph.pl / speedscope. Coût proportionnel à la fréquence, pas au trafic.
+    """
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64, include_idle: bool = False):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.include_idle = include_idle
+        self._stacks: _Counts = _Counts()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+
+    def _sample(self):
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            frames = []
+            while frame is not None and len(frames) < self.max_depth:
+                code = frame.f_code
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if not self.include_idle and frames and frames[0] in IDLE_FRAMES:
+                continue
+            stacks.append(";".join([names.get(ident, str(ident))] + frames[::-1]))
+        with self._lock:
+            self._stacks.update(stacks)
+            self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def folded(self, top: Optional[int] = None) -> str:
+        with self._lock:
+            stacks = self._stacks.most_common(top)
+        return "\n".join(f"{stack} {count}" for stack, count in stacks) + "\n"
+
+
+profiler: Optional[SamplingProfiler] = None
+
+
+# === EXPOSITION HTTP ===
+def register_metrics_routes(server, allow_remote: Optional[bool] = None):
+    """
+    /metrics (texte Prometheus) et, si PROFILE_SAMPLING=1, /metrics/profile (piles repliées,
+    ?top=N, ?reset=1). Réservés à la boucle locale sauf METRICS_ALLOW_REMOTE=1.
+    Mesure aussi, pour chaque requête de callback, le temps hors callback (désérialisation,
+    sérialisation JSON de la réponse, dispatch Dash).
+    """
+    global profiler
+    from flask import Response, abort, g, request
+
+    if allow_remote is None:
+        allow_remote = os.getenv("METRICS_ALLOW_REMOTE") == "1"
+
+    def _check_local():
+        if not allow_remote and request.remote_addr not in ("127.0.0.1", "::1"):
+            abort(403)
+
+    @server.before_request
+    def _start_timer():
+        g.instrumentation_start = time.perf_counter()
+
+    @server.after_request
+    def _record_serialization(response):
+        info = getattr(g, "instrumented_callback", None)
+        start = getattr(g, "instrumentation_start", None)
+        if info is not None and start is not None:
+            name, elapsed = info
+            total = time.perf_counter() - start
+            STAGE_SECONDS.observe(max(total - elapsed, 0.0), callback=name, stage="serialize")
+        return response
+
+    @server.route("/metrics")
+    def prometheus_metrics():
+        _check_local()
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    if os.getenv("PROFILE_SAMPLING") == "1":
+        profiler = SamplingProfiler(interval=float(os.getenv("PROFILE_INTERVAL_MS", "10")) / 1000)
+        profiler.start()
+
+        @server.route("/metrics/profile")
+        def sampling_profile():
+            _check_local()
+            top = request.args.get("top", type=int)
+            body = profiler.folded(top)
+            if request.args.get("reset") == "1":
+                profiler.reset()
+            return Response(body, mimetype="text/plain")
@@ -1,25 +1,43 @@
+import io
 import os
-from typing import Optional
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Optional
+import numpy as np
 import pandas as pd
-import datetime as dt
 import time
 
+from services.cache import TTLCache
+from services.history_store import bar_duration, history_store, period_start
+from services.instrumentation import register_cache, track_fetch
+
 try:
     import requests  # for Alpha Vantage fallback
+    from requests.adapters import HTTPAdapter
 except Exception:
     requests = None
 
+try:
+    import pyarrow as pa  # conversions chaînes -> float et lecture CSV rapides
+except Exception:
+    pa = None
+
 try:
     import yfinance as yf  # lightweight polling, near real-time for popular tickers
 except Exception:
     yf = None
 
 
-def fetch_candles_yf(symbol: str, period: str = '1d', interval: str = '1m') -> pd.DataFrame:
+def fetch_candles_yf(symbol: str, period: str = '1d', interval: str = '1m',
+                     start: Optional[pd.Timestamp] = None, end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
     if yf is None:
         raise RuntimeError("yfinance is not installed. Please install yfinance.")
     ticker = yf.Ticker(symbol)
-    df = ticker.history(period=period, interval=interval, auto_adjust=False)
+    if start is not None:
+        # Plage explicite (complément incrémental de l'historique local)
+        df = ticker.history(start=start, end=end, interval=interval, auto_adjust=False)
+    else:
+        df = ticker.history(period=period, interval=interval, auto_adjust=False)
     df = df.rename(columns={
         'Open': 'Open', 'High': 'High', 'Low': 'Low', 'Close': 'Close', 'Volume': 'Volume'
     })
@@ -32,7 +50,7 @@ def fetch_candles_yf(symbol: str, period: str = '1d', interval: str = '1m') -> p
         df = df.rename(columns={'index': 'Date'})
     df = df.set_index('Date')
     df = df.sort_index()
-    return df[['Open', 'High', 'Low', 'Close']]
+    return df[['Open', 'High', 'Low', 'Close', 'Volume']]
 
 
 def _map_interval_to_alpha_vantage(interval: str) -> Optional[str]:
@@ -45,53 +63,155 @@ def _map_interval_to_alpha_vantage(interval: str) -> Optional[str]:
     return mapping.get(interval)
 
 
-def fetch_candles_alpha_vantage(symbol: str, interval: str, api_key: str) -> pd.DataFrame:
-    if requests is None:
-        raise RuntimeError("requests n'est pas installé. Veuillez installer requests.")
-    av_interval = _map_interval_to_alpha_vantage(interval) or '1min'
-    params = {
+ALPHA_VANTAGE_URL = 'https://www.alphavantage.co/query'
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+
+_session = None
+
+
+def http_session():
+    """Session requests partagée : connexions keep-alive réutilisées entre appels."""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _session = session
+    return _session
+
+
+# CSV : lu directement par le parseur C de pandas ; JSON : conversion colonnaire en bloc
+ALPHA_VANTAGE_DATATYPE = os.getenv('ALPHAVANTAGE_DATATYPE', 'csv')
+_AV_FIELDS = ('1. open', '2. high', '3. low', '4. close', '5. volume')
+_OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def alpha_vantage_params(symbol: str, interval: str, api_key: str, outputsize: str = 'compact',
+                         datatype: str = ALPHA_VANTAGE_DATATYPE) -> dict:
+    return {
         'function': 'TIME_SERIES_INTRADAY',
         'symbol': symbol,
-        'interval': av_interval,
+        'interval': _map_interval_to_alpha_vantage(interval) or '1min',
         'apikey': api_key,
-        'outputsize': 'compact'
+        'outputsize': outputsize,
+        'datatype': datatype
     }
-    url = 'https://www.alphavantage.co/query'
-    resp = requests.get(url, params=params, timeout=15)
+
+
+def fetch_candles_alpha_vantage(symbol: str, interval: str, api_key: str, outputsize: str = 'compact') -> pd.DataFrame:
+    if requests is None:
+        raise RuntimeError("requests n'est pas installé. Veuillez installer requests.")
+    params = alpha_vantage_params(symbol, interval, api_key, outputsize=outputsize)
+    resp = http_session().get(ALPHA_VANTAGE_URL, params=params, timeout=15)
     resp.raise_for_status()
-    data = resp.json()
+    if params['datatype'] == 'csv':
+        return parse_alpha_vantage_csv(resp.text)
+    return parse_alpha_vantage(resp.json(), params['interval'])
+
+
+def _strings_to_float(strings: list) -> np.ndarray:
+    if pa is not None:
+        return pa.array(strings, type=pa.string()).cast(pa.float64()).to_numpy()
+    return np.fromiter(map(float, strings), dtype=np.float64, count=len(strings))
+
+
+def _ohlcv_frame(index: pd.DatetimeIndex, values: np.ndarray) -> pd.DataFrame:
+    index = index.as_unit('us')
+    # Alpha Vantage renvoie les barres de la plus récente à la plus ancienne
+    if len(index) > 1 and not index.is_monotonic_increasing:
+        if index.is_monotonic_decreasing:
+            index, values = index[::-1], values[::-1]
+        else:
+            order = np.argsort(index.values, kind='stable')
+            index, values = index[order], values[order]
+    return pd.DataFrame(values, index=index.rename('Date'), columns=_OHLCV)
+
+
+def parse_alpha_vantage(data: dict, av_interval: str) -> pd.DataFrame:
     key = f'Time Series ({av_interval})'
     if key not in data:
         # Alpha Vantage rate limit or unsupported symbol
         raise RuntimeError(f"Alpha Vantage réponse invalide: {list(data.keys())[:3]}")
     ts = data[key]
-    rows = []
-    for ts_str, ohlc in ts.items():
-        # parse timestamps as local naive datetime
-        try:
-            ts_dt = dt.datetime.fromisoformat(ts_str)
-        except Exception:
-            # fallback format
-            ts_dt = dt.datetime.strptime(ts_str, '%Y-%m-%d %H:%M:%S')
-        rows.append({
-            'Date': ts_dt,
-            'Open': float(ohlc['1. open']),
-            'High': float(ohlc['2. high']),
-            'Low': float(ohlc['3. low']),
-            'Close': float(ohlc['4. close'])
-        })
-    df = pd.DataFrame(rows).set_index('Date').sort_index()
-    return df[['Open', 'High', 'Low', 'Close']]
-
-
-def fetch_latest_candles(symbol: str, period: str = '1d', interval: str = '1m') -> pd.DataFrame:
-    # If Alpha Vantage key is present and symbol looks supported, try AV first
-    av_key = os.getenv('ALPHAVANTAGE_API_KEY')
-    # Simple heuristic: AV does not support indices like ^GSPC, ^FCHI directly
+    # Un seul passage pour extraire les chaînes, puis conversions vectorisées :
+    # pas de dict ni de float() par ligne, horodatages parsés en bloc
+    strings = list(chain.from_iterable(map(itemgetter(*_AV_FIELDS), ts.values())))
+    values = _strings_to_float(strings).reshape(-1, len(_AV_FIELDS))
+    index = pd.DatetimeIndex(pd.to_datetime(list(ts.keys()), format='ISO8601', cache=False))
+    return _ohlcv_frame(index, values)
+
+
+def parse_alpha_vantage_csv(text: str) -> pd.DataFrame:
+    """Réponse datatype=csv (timestamp,open,high,low,close,volume)."""
+    if text.lstrip().startswith('{'):
+        # Les erreurs (rate limit, symbole inconnu) restent renvoyées en JSON
+        raise RuntimeError(f"Alpha Vantage réponse invalide: {text.strip()[:120]}")
+    # Moteur pyarrow (multithread, horodatages natifs) si disponible, sinon parseur C de pandas
+    df = pd.read_csv(io.BytesIO(text.encode()), engine='pyarrow' if pa is not None else 'c')
+    df = df.set_index(df.columns[0]).astype(np.float64)
+    index = df.index
+    if not isinstance(index, pd.DatetimeIndex):
+        index = pd.DatetimeIndex(pd.to_datetime(index, format='ISO8601', cache=False))
+    return _ohlcv_frame(index, df[['open', 'high', 'low', 'close', 'volume']].to_numpy())
+
+
+# Alpha Vantage : horodatages intraday naïfs, en heure de New York
+ALPHA_VANTAGE_TZ = 'America/New_York'
+# outputsize='compact' renvoie les 100 dernières barres
+ALPHA_VANTAGE_COMPACT_BARS = 100
+
+
+# Durée de vie des bougies en cache selon l'intervalle (secondes)
+_INTERVAL_TTL = {
+    '1m': 30,
+    '2m': 60,
+    '5m': 120,
+    '15m': 300,
+    '30m': 600,
+    '60m': 900,
+    '90m': 900,
+    '1h': 900,
+    '1d': 4 * 3600,
+    '5d': 6 * 3600,
+    '1wk': 12 * 3600,
+    '1mo': 12 * 3600,
+    '3mo': 12 * 3600,
+}
+
+_candle_cache = TTLCache(max_bytes=int(os.getenv('MARKET_DATA_CACHE_MB', '64')) * 1024 * 1024)
+register_cache('candles', _candle_cache)
+
+
+def ttl_for_interval(interval: str) -> float:
+    return _INTERVAL_TTL.get(interval, 60)
+
+
+def _select_provider(symbol: str, interval: str) -> str:
+    # Simple heuristic: AV does not support indices like ^GSPC, ^FCHI directly,
+    # and only intraday intervals are mapped (same rule as providers.AlphaVantageProvider.supports)
     looks_index = symbol.startswith('^')
-    if av_key and not looks_index:
+    if os.getenv('ALPHAVANTAGE_API_KEY') and not looks_index \
+            and _map_interval_to_alpha_vantage(interval) is not None:
+        return 'alpha_vantage'
+    return 'yfinance'
+
+
+def _fetch_latest_candles_uncached(symbol: str, period: str, interval: str, provider: str,
+                                   start: Optional[pd.Timestamp] = None,
+                                   end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    # Plage partant de l'origine (epoch 0) : équivalent de period='max'
+    if start is not None and start <= pd.Timestamp(0, tz='UTC'):
+        period, start, end = 'max', None, None
+    # If Alpha Vantage key is present and symbol looks supported, try AV first
+    if provider == 'alpha_vantage':
+        outputsize = 'compact'
+        if start is None or (end - start) > bar_duration(interval) * ALPHA_VANTAGE_COMPACT_BARS:
+            outputsize = 'full'
         try:
-            return fetch_candles_alpha_vantage(symbol, interval=interval, api_key=av_key)
+            with track_fetch('alpha_vantage'):
+                return fetch_candles_alpha_vantage(symbol, interval=interval,
+                                                   api_key=os.getenv('ALPHAVANTAGE_API_KEY'), outputsize=outputsize)
         except Exception:
             # fall back to yfinance below
             pass
@@ -99,7 +219,8 @@ def fetch_latest_candles(symbol: str, period: str = '1d', interval: str = '1m')
     last_err = None
     for _ in range(2):
         try:
-            return fetch_candles_yf(symbol, period=period, interval=interval)
+            with track_fetch('yfinance'):
+                return fetch_candles_yf(symbol, period=period, interval=interval, start=start, end=end)
         except Exception as e:
             last_err = e
             time.sleep(1.0)
@@ -107,3 +228,54 @@ def fetch_latest_candles(symbol: str, period: str = '1d', interval: str = '1m')
     raise last_err if last_err else RuntimeError('Unknown data fetch error')
 
 
+def _fetch_with_history(symbol: str, period: str, interval: str, provider: str,
+                        source: Optional[Callable[..., pd.DataFrame]] = None) -> pd.DataFrame:
+    """
+    Sert la fenêtre demandée depuis l'historique local : seules les plages jamais
+    demandées (typiquement les barres apparues depuis le dernier appel) vont au fournisseur.
+    `source(symbol, period=..., interval=...)` remplace le téléchargement direct (ProviderRouter).
+    """
+    def download(start=None, end=None) -> pd.DataFrame:
+        if source is not None:
+            # Le routeur sert la fenêtre `period` entière : la plage manquante y est incluse
+            return source(symbol, period=period, interval=interval)
+        return _fetch_latest_candles_uncached(symbol, period, interval, provider, start=start, end=end)
+
+    store = history_store()
+    if store is None:
+        return download()
+    now = pd.Timestamp.now(tz='UTC')
+    start = period_start(period, now)
+    for gap_start, gap_end in store.missing_ranges(symbol, interval, start, now):
+        candles = download(gap_start, gap_end)
+        if candles.empty:
+            # Pas de barre (limitation, échec passager) : la plage reste à demander
+            continue
+        if candles.index.tz is None:
+            candles = candles.tz_localize(ALPHA_VANTAGE_TZ)
+        # La dernière barre est encore en formation : elle sera redemandée (et remplacée) au prochain appel ;
+        # la couverture est de plus bornée à la dernière barre reçue (HistoryStore.append)
+        covered_end = max(gap_start, min(gap_end, now - bar_duration(interval)))
+        store.append(symbol, interval, candles, covered=(gap_start, covered_end))
+    # Fenêtre ancrée sur la dernière barre connue (comme yfinance : '1d' = dernière séance, même le week-end)
+    return store.tail(symbol, interval, span=None if start is None else now - start)
+
+
+def fetch_latest_candles(symbol: str, period: str = '1d', interval: str = '1m', use_cache: bool = True,
+                         source: Optional[Callable[..., pd.DataFrame]] = None) -> pd.DataFrame:
+    """
+    Point d'entrée unique des bougies récentes : cache TTL (requêtes dédupliquées) puis
+    historique local. `source` (ex. ProviderRouter.fetch_blocking) remplace la sélection
+    Alpha Vantage / yfinance ; elle fait partie de la clé de cache.
+    """
+    provider = source if source is not None else _select_provider(symbol, interval)
+    if not use_cache:
+        return _fetch_with_history(symbol, period, interval, provider, source)
+    # Requêtes identiques dédupliquées : un seul appel fournisseur par clé et par TTL
+    key = (symbol, period, interval, provider)
+    df = _candle_cache.get_or_load(
+        key,
+        lambda: _fetch_with_history(symbol, period, interval, provider, source),
+        ttl=ttl_for_interval(interval)
+    )
+    return df.copy()
@@ -0,0 +1,109 @@
+import os
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from services.model_registry import load_keras_model
+
+try:
+    import onnxruntime as ort
+except Exception:
+    ort = None
+
+
+def _load_tflite_interpreter(path: str):
+    # Runtime léger en priorité, TensorFlow complet en dernier recours
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except Exception:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except Exception:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path)
+
+
+class OnnxBackend:
+    """Exécution du LSTM exporté (.onnx) avec ONNX Runtime, batch dynamique."""
+
+    def __init__(self, path: str):
+        if ort is None:
+            raise RuntimeError("onnxruntime is not installed. Please install onnxruntime.")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = int(os.getenv("MODEL_THREADS", "1"))
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        # Ordre des entrées du modèle Keras : séquence (rang 3) puis identifiant du symbole
+        self.input_names = [i.name for i in sorted(self.session.get_inputs(), key=lambda i: -len(i.shape))]
+
+    def predict_on_batch(self, inputs: Sequence[np.ndarray]) -> np.ndarray:
+        feed = {name: np.asarray(x, dtype=np.float32) for name, x in zip(self.input_names, inputs)}
+        return self.session.run(None, feed)[0]
+
+
+class TFLiteBackend:
+    """Exécution du LSTM exporté (.tflite), batch fixe : les entrées sont complétées ou découpées."""
+
+    def __init__(self, path: str):
+        self.interpreter = _load_tflite_interpreter(path)
+        self.interpreter.allocate_tensors()
+        details = self.interpreter.get_input_details()
+        # Ordre des entrées du modèle Keras : séquence (rang 3) puis identifiant du symbole
+        self.input_details = sorted(details, key=lambda d: -len(d["shape"]))
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self.batch_size = int(self.input_details[0]["shape"][0])
+
+    def _invoke(self, chunk: List[np.ndarray]) -> np.ndarray:
+        for detail, x in zip(self.input_details, chunk):
+            self.interpreter.set_tensor(detail["index"], x)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index).copy()
+
+    def predict_on_batch(self, inputs: Sequence[np.ndarray]) -> np.ndarray:
+        inputs = [np.asarray(x, dtype=np.float32) for x in inputs]
+        n = len(inputs[0])
+        outputs = []
+        for start in range(0, n, self.batch_size):
+            chunk = [x[start:start + self.batch_size] for x in inputs]
+            size = len(chunk[0])
+            if size < self.batch_size:
+                chunk = [np.concatenate([x, np.zeros((self.batch_size - size,) + x.shape[1:], np.float32)])
+                         for x in chunk]
+            outputs.append(self._invoke(chunk)[:size])
+        return np.concatenate(outputs)
+
+
+BACKEND_SUFFIX = {
+    "keras": ".keras",
+    "onnx": ".onnx",
+    "tflite": ".tflite",
+}
+
+
+def backend_path(keras_path: str, backend: str) -> str:
+    """Chemin du modèle exporté pour un backend (même nom, extension différente)."""
+    return os.path.splitext(keras_path)[0] + BACKEND_SUFFIX[backend]
+
+
+def served_path(keras_path: str, backend: Optional[str] = None) -> str:
+    """Fichier effectivement chargé par load_backend (MODEL_BACKEND par défaut)."""
+    return backend_path(keras_path, backend or os.getenv("MODEL_BACKEND", "keras"))
+
+
+def load_backend(keras_path: str, backend: Optional[str] = None):
+    """
+    Charge le modèle pour le backend demandé (MODEL_BACKEND=keras|onnx|tflite).
+    Tous les backends exposent predict_on_batch([séquences, ids]).
+    """
+    backend = backend or os.getenv("MODEL_BACKEND", "keras")
+    if backend not in BACKEND_SUFFIX:
+        raise ValueError(f"Backend inconnu : {backend} (attendu : {', '.join(BACKEND_SUFFIX)})")
+    if backend == "keras":
+        return load_keras_model(keras_path)
+    path = backend_path(keras_path, backend)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"{path} introuvable. Exporter le modèle : "
+            f"PYTHONPATH='Interface Graphique' python -m services.model_export --format {backend}"
+        )
+    return OnnxBackend(path) if backend == "onnx" else TFLiteBackend(path)
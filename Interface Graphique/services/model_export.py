@@ -0,0 +1,125 @@
+"""
+Export du LSTM Keras vers ONNX / TFLite, avec contrôle de parité
+sur les fenêtres d'entrée de Data/ALL_FEATURES.csv (celles servies en production).
+
+Usage (depuis la racine du dépôt) :
+    PYTHONPATH="Interface Graphique" python -m services.model_export --format all
+"""
+import argparse
+import json
+import os
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from services.data_store import load_partitions
+from services.model_backends import backend_path, load_backend
+from services.model_inputs import N_TIMESTEPS, SYMBOL_TO_ID, series_windows
+from services.model_registry import load_keras_model
+
+MODEL_PATH = "Modèle IA/global_lstm_returns.keras"
+FEATURES_CSV = "Data/ALL_FEATURES.csv"
+
+
+def _input_specs(batch_size=None, n_timesteps: int = N_TIMESTEPS):
+    import tensorflow as tf
+    return [
+        tf.TensorSpec([batch_size, n_timesteps, 1], tf.float32, name="sequence"),
+        tf.TensorSpec([batch_size, 1], tf.float32, name="symbol_id"),
+    ]
+
+
+def export_onnx(keras_path: str = MODEL_PATH, out_path: str = None, opset: int = 17) -> str:
+    """Export ONNX à batch dynamique (nécessite tf2onnx)."""
+    import tensorflow as tf
+    import tf2onnx
+
+    model = load_keras_model(keras_path)
+    out_path = out_path or backend_path(keras_path, "onnx")
+
+    @tf.autograph.experimental.do_not_convert
+    def forward(sequence, symbol_id):
+        return model([sequence, symbol_id], training=False)
+
+    tf2onnx.convert.from_function(
+        tf.function(forward), input_signature=_input_specs(), opset=opset, output_path=out_path
+    )
+    return out_path
+
+
+def export_tflite(keras_path: str = MODEL_PATH, out_path: str = None, batch_size: int = 8) -> str:
+    """
+    Export TFLite. Les boucles LSTM n'acceptent pas de batch dynamique une fois converties :
+    le modèle est figé sur `batch_size` (8 = un batch pour tous les symboles).
+    """
+    import tensorflow as tf
+
+    model = load_keras_model(keras_path)
+    out_path = out_path or backend_path(keras_path, "tflite")
+    with tempfile.TemporaryDirectory() as saved_model_dir:
+        model.export(saved_model_dir, input_signature=[_input_specs(batch_size)], verbose=False)
+        tflite_model = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir).convert()
+    with open(out_path, "wb") as f:
+        f.write(tflite_model)
+    return out_path
+
+
+def feature_windows(csv_path: str = FEATURES_CSV, n_timesteps: int = N_TIMESTEPS) -> List[np.ndarray]:
+    """
+    Toutes les fenêtres d'entrée du modèle par symbole, construites comme en production
+    (model_inputs.series_windows : rendements journaliers, MODEL_INPUT_TRANSFORM).
+    Identifiants de model_inputs.SYMBOL_TO_ID (symboles inconnus du modèle ignorés).
+    """
+    frames = load_partitions(csv_path, "ALL_FEATURES", parse_dates=["date"])
+    sequences, ids = [], []
+    for symbol, symbol_id in SYMBOL_TO_ID.items():
+        if symbol not in frames:
+            continue
+        windows, _ = series_windows(frames[symbol]["Close"].to_numpy(), n_timesteps)
+        if not len(windows):
+            continue
+        sequences.append(windows)
+        ids.append(np.full((len(windows), 1), symbol_id, dtype=np.float32))
+    return [np.concatenate(sequences), np.concatenate(ids)]
+
+
+def parity_check(keras_path: str, backend: str, windows: List[np.ndarray]) -> Dict[str, float]:
+    """Écart entre les sorties Keras et celles du backend exporté sur les mêmes fenêtres."""
+    reference = np.asarray(load_keras_model(keras_path).predict(windows, verbose=0)).ravel()
+    candidate = np.asarray(load_backend(keras_path, backend).predict_on_batch(windows)).ravel()
+    err = np.abs(reference - candidate)
+    return {
+        "backend": backend,
+        "windows": int(len(reference)),
+        "max_abs_err": float(err.max()),
+        "mean_abs_err": float(err.mean()),
+        "sign_agreement": float(np.mean(np.sign(reference) == np.sign(candidate))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--format", choices=["onnx", "tflite", "all"], default="all")
+    parser.add_argument("--tflite-batch", type=int, default=8)
+    args = parser.parse_args()
+
+    formats = ["onnx", "tflite"] if args.format == "all" else [args.format]
+    windows = feature_windows()
+    report = {}
+    for fmt in formats:
+        if fmt == "onnx":
+            path = export_onnx(args.model)
+        else:
+            path = export_tflite(args.model, batch_size=args.tflite_batch)
+        report[fmt] = dict(parity_check(args.model, fmt, windows), path=path)
+        print(json.dumps(report[fmt]))
+
+    report_path = os.path.splitext(args.model)[0] + ".parity.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
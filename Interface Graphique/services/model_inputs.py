@@ -0,0 +1,159 @@
+"""
+Préparation des entrées du LSTM, commune aux prédictions, au backtest, aux prévisions et au balayage.
+
+Le modèle (global_lstm_returns) attend des séquences de rendements journaliers
+(pct_change de Close, comme la colonne daily_return de ALL_FEATURES), sans couche
+de normalisation : les prix bruts (≈92 000 pour BTC-USD) sont hors distribution.
+MODEL_INPUT_TRANSFORM=close rétablit l'ancienne entrée (clôtures brutes).
+"""
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from services.symbol_index import SymbolIndex
+
+N_TIMESTEPS = 60
+# Identifiants de symbole appris par le modèle (entrée `ids`) : figés à l'entraînement,
+# indépendants des partitions présentes sur le disque
+SYMBOL_TO_ID: Dict[str, int] = {
+    "AAPL": 0,
+    "AMZN": 1,
+    "BTC-USD": 2,
+    "GOOGL": 3,
+    "META": 4,
+    "MSFT": 5,
+    "NVDA": 6,
+    "TSLA": 7,
+}
+INPUT_TRANSFORM = os.getenv("MODEL_INPUT_TRANSFORM", "returns")
+
+# Clôtures supplémentaires nécessaires par transformation (un rendement = deux clôtures)
+_EXTRA_CLOSES = {"returns": 1, "close": 0}
+
+
+def window_closes(n_timesteps: int = N_TIMESTEPS, transform: str = INPUT_TRANSFORM) -> int:
+    """Nombre de clôtures nécessaires pour une séquence de `n_timesteps` pas."""
+    return n_timesteps + _EXTRA_CLOSES[transform]
+
+
+def to_model_input(closes: np.ndarray, transform: str = INPUT_TRANSFORM) -> np.ndarray:
+    """Clôtures (batch, window_closes) -> séquence (batch, n_timesteps, 1) float32."""
+    closes = np.asarray(closes, dtype=np.float64)
+    if transform == "returns":
+        seq = np.diff(closes, axis=-1) / closes[..., :-1]
+    else:
+        seq = closes
+    return seq.astype(np.float32)[..., np.newaxis]
+
+
+def series_windows(close: np.ndarray, n_timesteps: int = N_TIMESTEPS,
+                   transform: str = INPUT_TRANSFORM) -> Tuple[np.ndarray, int]:
+    """
+    Toutes les fenêtres d'une série de clôtures, forme (n_windows, n_timesteps, 1),
+    en vues glissantes (sans copie) sur la série transformée.
+    Retourne aussi l'indice de la barre où se termine la première fenêtre.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if transform == "returns":
+        series = np.diff(close) / close[:-1]
+    else:
+        series = close
+    first_end = n_timesteps - 1 + _EXTRA_CLOSES[transform]
+    if len(series) < n_timesteps:
+        return np.empty((0, n_timesteps, 1), dtype=np.float32), first_end
+    series = np.ascontiguousarray(series, dtype=np.float32)
+    return sliding_window_view(series, n_timesteps)[..., np.newaxis], first_end
+
+
+class InputBuffers:
+    """
+    Tampon de clôtures par symbole, indépendant de la période affichée :
+    les `window_closes` dernières clôtures de chaque symbole dans un tableau
+    (n_symboles, window_closes) préalloué, mis à jour sur place à l'arrivée des barres.
+    Les entrées de tous les symboles sont produites en un seul batch.
+    """
+
+    def __init__(self, symbol_to_id: Dict[str, int], n_timesteps: int = N_TIMESTEPS,
+                 transform: str = INPUT_TRANSFORM):
+        self.symbol_to_id = dict(symbol_to_id)
+        self.n_timesteps = n_timesteps
+        self.transform = transform
+        self.symbols = sorted(self.symbol_to_id)
+        self._row = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._closes = np.full((len(self.symbols), window_closes(n_timesteps, transform)), np.nan)
+        self._count = np.zeros(len(self.symbols), dtype=np.int64)
+        self._last_date: Dict[str, pd.Timestamp] = {}
+        self._lock = threading.Lock()
+        # Incrémentés à chaque modification (global / par symbole) : clés de cache des consommateurs
+        self.version = 0
+        self._versions = np.zeros(len(self.symbols), dtype=np.int64)
+
+    def load(self, index: SymbolIndex):
+        """Remplit les tampons depuis l'historique complet de chaque symbole."""
+        with self._lock:
+            for symbol in self.symbols:
+                if symbol not in index:
+                    continue
+                close = index.get(symbol)["Close"].to_numpy(dtype=np.float64)[-self._closes.shape[1]:]
+                row = self._row[symbol]
+                self._closes[row] = np.nan
+                if len(close):
+                    self._closes[row, -len(close):] = close
+                    self._last_date[symbol] = pd.Timestamp(index.dates(symbol)[-1])
+                self._count[row] = len(close)
+                self._versions[row] += 1
+            self.version += 1
+
+    def push(self, symbol: str, date, close: float):
+        """Nouvelle barre (ou mise à jour de la barre en cours si même date)."""
+        if symbol not in self._row:
+            return
+        date = pd.Timestamp(date)
+        with self._lock:
+            row = self._closes[self._row[symbol]]
+            last = self._last_date.get(symbol)
+            if last is not None and date < last:
+                return
+            if last is None or date > last:
+                # Décalage sur place d'une position (window_closes valeurs)
+                row[:-1] = row[1:]
+                self._count[self._row[symbol]] = min(self._count[self._row[symbol]] + 1, len(row))
+                self._last_date[symbol] = date
+            row[-1] = close
+            self._versions[self._row[symbol]] += 1
+            self.version += 1
+
+    def update(self, symbol: str, candles: pd.DataFrame):
+        """Ajoute des bougies (index daté, colonne Close), par exemple poussées par le CandlePoller."""
+        index = pd.DatetimeIndex(candles.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        for date, close in zip(index, candles["Close"].to_numpy(dtype=np.float64)):
+            self.push(symbol, date, close)
+
+    def last_date(self, symbol: str) -> Optional[pd.Timestamp]:
+        return self._last_date.get(symbol)
+
+    def symbol_version(self, symbol: str) -> int:
+        return int(self._versions[self._row[symbol]]) if symbol in self._row else 0
+
+    def ready(self, symbol: str) -> bool:
+        return symbol in self._row and self._count[self._row[symbol]] >= self._closes.shape[1]
+
+    def closes(self, symbols: Iterable[str]) -> np.ndarray:
+        """Copie des tampons de clôtures des symboles demandés, forme (k, window_closes)."""
+        with self._lock:
+            return self._closes[[self._row[s] for s in symbols]].copy()
+
+    def inputs(self, symbols: Optional[Iterable[str]] = None) -> Tuple[List[str], List[np.ndarray]]:
+        """Entrées [séquences (k, n, 1), ids (k, 1)] de tous les symboles prêts, en un batch."""
+        symbols = [s for s in (symbols if symbols is not None else self.symbols) if self.ready(s)]
+        if not symbols:
+            return [], []
+        seq = to_model_input(self.closes(symbols), self.transform)
+        ids = np.array([[self.symbol_to_id[s]] for s in symbols])
+        return symbols, [seq, ids]
@@ -0,0 +1,400 @@
+import fnmatch
+import hashlib
+import hmac
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+def load_keras_model(path: str):
+    # Import différé : TensorFlow n'est initialisé qu'au premier chargement de modèle
+    from tensorflow.keras.models import load_model
+    return load_model(path)
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def _signature(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class LazyModel:
+    """Modèle chargé au premier usage ou par un thread de préchauffage."""
+
+    def __init__(self, path: str, loader: Callable[[str], Any] = load_keras_model):
+        self.path = path
+        self.loader = loader
+        self._model = None
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self._error is None
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self._error
+
+    def _load(self):
+        with self._lock:
+            if self._ready.is_set():
+                return
+            try:
+                self._model = self.loader(self.path)
+            except BaseException as e:
+                self._error = e
+            self._ready.set()
+
+    def warm_up(self):
+        """Lance le chargement en arrière-plan (sans effet s'il est déjà lancé)."""
+        if self._ready.is_set() or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._load, name=f"warm-up {self.path}", daemon=True)
+        self._thread.start()
+
+    def get(self, timeout: Optional[float] = None):
+        """Retourne le modèle, en le chargeant si besoin."""
+        if not self._ready.is_set():
+            if timeout is None:
+                self._load()
+            else:
+                self.warm_up()
+            if not self._ready.wait(timeout):
+                raise TimeoutError(f"Modèle {self.path} non chargé après {timeout}s")
+        if self._error is not None:
+            raise self._error
+        return self._model
+
+
+class VersionMetrics:
+    """Latence et distribution des prédictions d'une version (fenêtre glissante pour les quantiles)."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.batches = 0
+        self.samples = 0
+        self.errors = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def record(self, latency: float, outputs: np.ndarray):
+        values = np.asarray(outputs, dtype=np.float64).reshape(len(outputs), -1)[:, 0]
+        with self._lock:
+            self._latencies.append(latency)
+            self.batches += 1
+            self.samples += len(values)
+            self._sum += float(values.sum())
+            self._sum_sq += float(np.square(values).sum())
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            n = self.samples
+            mean = self._sum / n if n else float("nan")
+            std = np.sqrt(max(self._sum_sq / n - mean ** 2, 0.0)) if n else float("nan")
+            return {
+                "batches": self.batches,
+                "samples": n,
+                "errors": self.errors,
+                "latency_p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+                "latency_p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+                "prediction_mean": mean,
+                "prediction_std": float(std),
+            }
+
+
+class ModelVersion:
+    """
+    Une version d'un modèle : fichier, chargement paresseux et métriques propres.
+    `artifact` : fichier réellement servi pour `path` (ex. l'export .onnx d'un .keras),
+    dont l'empreinte nomme la version.
+    """
+
+    def __init__(self, path: str, loader: Callable[[str], Any] = load_keras_model,
+                 artifact: Optional[Callable[[str], str]] = None):
+        self.path = path
+        served = artifact(path) if artifact is not None else path
+        stem = os.path.splitext(os.path.basename(path))[0]
+        try:
+            self.signature = _signature(served)
+            self.name = f"{stem}@{file_hash(served)[:8]}"
+        except OSError:
+            # Fichier absent : l'erreur sera levée au chargement, comme pour LazyModel
+            self.signature, self.name = None, f"{stem}@absent"
+        self.lazy = LazyModel(path, loader)
+        self.metrics = VersionMetrics()
+
+    def predict_on_batch(self, inputs: Sequence[np.ndarray]) -> np.ndarray:
+        model = self.lazy.get()
+        t0 = time.perf_counter()
+        try:
+            outputs = np.asarray(model.predict_on_batch(inputs))
+        except BaseException:
+            self.metrics.record_error()
+            raise
+        self.metrics.record(time.perf_counter() - t0, outputs)
+        return outputs
+
+
+class VersionedModel:
+    """
+    Modèle rechargé à chaud depuis un répertoire surveillé :
+    - au démarrage, la version servie est `path` (chargée paresseusement, comme LazyModel)
+    - tout fichier correspondant à `pattern`, nouveau ou modifié, est chargé et préchauffé
+      en arrière-plan puis échangé atomiquement : les requêtes en cours finissent sur l'ancienne version
+    - `artifact` donne le fichier réellement servi pour un chemin de modèle (export .onnx / .tflite
+      d'un .keras) : c'est lui qui est surveillé et dont l'empreinte nomme la version
+    - un fichier n'est marqué vu qu'une fois chargé : un chargement en échec est retenté
+    - si candidate_fraction > 0, la nouvelle version devient candidate et reçoit cette fraction
+      des requêtes routées (route()) jusqu'à promote() ou rollback()
+
+    Les fichiers doivent être déposés par renommage (écriture dans un fichier temporaire puis os.replace).
+    """
+
+    def __init__(self, path: str, loader: Callable[[str], Any] = load_keras_model,
+                 directory: Optional[str] = None, pattern: Optional[str] = None,
+                 candidate_fraction: float = 0.0, poll_seconds: float = 30.0,
+                 warm_up: Optional[Callable[[Any], None]] = None, settle_seconds: float = 2.0,
+                 artifact: Optional[Callable[[str], str]] = None):
+        self.loader = loader
+        self.artifact = artifact
+        self.directory = directory or os.path.dirname(path) or "."
+        stem, self._model_ext = os.path.splitext(os.path.basename(path))
+        served_ext = os.path.splitext(artifact(path) if artifact is not None else path)[1]
+        self.pattern = pattern or f"{stem}*{served_ext}"
+        self.candidate_fraction = candidate_fraction
+        self.poll_seconds = poll_seconds
+        self.warm_up_model = warm_up
+        self.settle_seconds = settle_seconds
+        # (active, candidate) : remplacé d'un bloc, lu sans verrou
+        self._state: Tuple[ModelVersion, Optional[ModelVersion]] = (ModelVersion(path, loader, artifact), None)
+        # Fichiers déjà servis ou rejetés : seul un nouveau fichier (ou une nouvelle signature) est chargé
+        self._seen = {p: sig for p, sig in self._scan()}
+        self.last_error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- Interface de LazyModel (version active) ---
+    @property
+    def ready(self) -> bool:
+        return self._state[0].lazy.ready
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self._state[0].lazy.error
+
+    def warm_up(self):
+        self._state[0].lazy.warm_up()
+        self.start()
+
+    def get(self, timeout: Optional[float] = None):
+        return self._state[0].lazy.get(timeout)
+
+    # --- Versions ---
+    def active(self) -> ModelVersion:
+        return self._state[0]
+
+    def candidate(self) -> Optional[ModelVersion]:
+        return self._state[1]
+
+    def version(self) -> str:
+        """Nom de la version active : clé de cache des résultats qui en dépendent."""
+        return self._state[0].name
+
+    def predict_on_batch(self, inputs: Sequence[np.ndarray]) -> np.ndarray:
+        """Inférence sur la version active (utilisable comme modèle par BatchInferenceServer)."""
+        return self._state[0].predict_on_batch(inputs)
+
+    def route(self) -> ModelVersion:
+        """Version qui sert une requête : la candidate pour candidate_fraction des appels."""
+        active, candidate = self._state
+        if candidate is not None and candidate.lazy.ready and random.random() < self.candidate_fraction:
+            return candidate
+        return active
+
+    def promote(self) -> bool:
+        with self._lock:
+            active, candidate = self._state
+            if candidate is None:
+                return False
+            self._state = (candidate, None)
+            return True
+
+    def rollback(self) -> bool:
+        with self._lock:
+            active, candidate = self._state
+            self._state = (active, None)
+            return candidate is not None
+
+    # --- Surveillance du répertoire ---
+    def _scan(self) -> List[Tuple[str, Tuple[int, int]]]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        found = []
+        for name in fnmatch.filter(names, self.pattern):
+            path = os.path.join(self.directory, name)
+            try:
+                found.append((path, _signature(path)))
+            except FileNotFoundError:
+                continue
+        return found
+
+    def poll(self) -> Optional[ModelVersion]:
+        """Charge le plus récent des fichiers nouveaux ou modifiés ; retourne la version installée."""
+        now_ns = time.time_ns()
+        fresh = [(sig, served) for served, sig in self._scan()
+                 if self._seen.get(served) != sig and now_ns - sig[0] >= self.settle_seconds * 1e9]
+        if not fresh:
+            return None
+        sig, served = max(fresh)
+        # Chemin passé au loader (le .keras dont `served` est l'export)
+        path = os.path.splitext(served)[0] + self._model_ext
+        try:
+            version = ModelVersion(path, self.loader, self.artifact)
+            model = version.lazy.get()
+            if self.warm_up_model is not None:
+                # Première inférence payée ici, pas par la première requête après l'échange
+                self.warm_up_model(model)
+        except BaseException as e:
+            # Non marqué vu : retenté au prochain passage (export encore absent, fichier incomplet)
+            self.last_error = e
+            return None
+        # Versions plus anciennes détectées au même passage : remplacées par celle-ci
+        for other_sig, other in fresh:
+            self._seen[other] = other_sig
+        with self._lock:
+            active, _ = self._state
+            self._state = (active, version) if self.candidate_fraction > 0 else (version, None)
+        return version
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.poll()
+
+    def start(self):
+        """Démarre la surveillance du répertoire (sans effet si poll_seconds <= 0)."""
+        if self.poll_seconds <= 0:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"model-watch {self.pattern}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> dict:
+        active, candidate = self._state
+        versions = {active.name: dict(role="active", path=active.path, loaded=active.lazy.ready,
+                                      **active.metrics.snapshot())}
+        if candidate is not None:
+            versions[candidate.name] = dict(role="candidate", path=candidate.path, loaded=candidate.lazy.ready,
+                                            **candidate.metrics.snapshot())
+        return {
+            "candidate_fraction": self.candidate_fraction,
+            "versions": versions,
+            "last_error": repr(self.last_error) if self.last_error is not None else None,
+        }
+
+
+class ModelRegistry:
+    """Registre des modèles de l'application, chargés paresseusement."""
+
+    def __init__(self):
+        self._models: Dict[str, Union[LazyModel, VersionedModel]] = {}
+
+    def register(self, name: str, path: str, loader: Callable[[str], Any] = load_keras_model) -> LazyModel:
+        self._models[name] = LazyModel(path, loader)
+        return self._models[name]
+
+    def watch(self, name: str, path: str, loader: Callable[[str], Any] = load_keras_model,
+              **options) -> VersionedModel:
+        """Comme register, avec rechargement à chaud et routage A/B (options de VersionedModel)."""
+        self._models[name] = VersionedModel(path, loader, **options)
+        return self._models[name]
+
+    def __getitem__(self, name: str) -> Union[LazyModel, VersionedModel]:
+        return self._models[name]
+
+    def get(self, name: str, timeout: Optional[float] = None):
+        return self._models[name].get(timeout)
+
+    def is_ready(self, name: str) -> bool:
+        return self._models[name].ready
+
+    def warm_up(self, name: Optional[str] = None):
+        for key in ([name] if name else list(self._models)):
+            self._models[key].warm_up()
+
+
+def register_model_routes(server, registry: ModelRegistry, names: Sequence[str], admin_token: Optional[str] = None,
+                          allow_remote: Optional[bool] = None):
+    """
+    Expose sur le serveur Flask :
+    - GET  /models/<name>            : versions servies et métriques par version
+    - POST /models/<name>/promote    : la candidate devient active
+    - POST /models/<name>/rollback   : abandon de la candidate
+    Le GET est réservé, comme /metrics, à la boucle locale sauf METRICS_ALLOW_REMOTE=1
+    ou jeton d'administration valide. Les POST ne sont enregistrés que si `admin_token`
+    est défini (en-tête X-Admin-Token).
+    """
+    from flask import abort, jsonify, request
+
+    if allow_remote is None:
+        allow_remote = os.getenv("METRICS_ALLOW_REMOTE") == "1"
+
+    def _model(name):
+        if name not in names or not isinstance(registry[name], VersionedModel):
+            abort(404)
+        return registry[name]
+
+    def _has_token():
+        # Comparaison à temps constant : pas de fuite du jeton par le temps de réponse
+        return bool(admin_token) and hmac.compare_digest(
+            request.headers.get("X-Admin-Token", "").encode(), admin_token.encode()
+        )
+
+    @server.route("/models/<name>")
+    def model_status(name):
+        if not (allow_remote or request.remote_addr in ("127.0.0.1", "::1") or _has_token()):
+            abort(403)
+        return jsonify(_model(name).status())
+
+    if admin_token:
+        @server.route("/models/<name>/<action>", methods=["POST"])
+        def model_action(name, action):
+            model = _model(name)
+            if not _has_token():
+                abort(403)
+            if action not in ("promote", "rollback"):
+                abort(404)
+            changed = model.promote() if action == "promote" else model.rollback()
+            return jsonify({"changed": changed, **model.status()})
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,74 @@
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+from services.model_inputs import InputBuffers
+
+
+class PredictionStore:
+    """
+    Prédictions précalculées par symbole, clé = (symbole, dernière date, version du tampon, version du modèle).
+    Les symboles périmés sont recalculés ensemble en un seul batch ; la lecture est en O(1).
+    Les entrées viennent des tampons InputBuffers (indépendants de la période affichée).
+
+    `route` (optionnel, cf. VersionedModel.route) choisit la version du modèle à chaque lecture :
+    les prédictions sont alors mémorisées par version, et calculées par la version choisie.
+    """
+
+    def __init__(self, model_hash: Callable[[], str],
+                 predict_batch: Callable[..., np.ndarray],
+                 buffers: InputBuffers, route: Optional[Callable[[], Any]] = None):
+        self.model_hash = model_hash
+        self.predict_batch = predict_batch
+        self.buffers = buffers
+        self.route = route
+        self._entries: Dict[tuple, tuple] = {}  # (symbol, version) -> (key, prediction)
+        self._lock = threading.Lock()
+
+    def _version(self):
+        """(nom de version, modèle à passer à predict_batch ou None pour le modèle par défaut)."""
+        if self.route is None:
+            return self.model_hash(), None
+        model = self.route()
+        return model.name, model
+
+    def _key(self, symbol: str, model_hash: str) -> tuple:
+        return symbol, self.buffers.last_date(symbol), self.buffers.symbol_version(symbol), model_hash
+
+    def refresh(self, symbols: Optional[Iterable[str]] = None, version=None):
+        """Recalcule en un seul appel au modèle tous les symboles dont la clé a changé."""
+        with self._lock:
+            model_hash, model = version or self._version()
+            stale = {}
+            for symbol in (symbols or self.buffers.symbols):
+                key = self._key(symbol, model_hash)
+                entry = self._entries.get((symbol, model_hash))
+                if entry is not None and entry[0] == key:
+                    continue
+                if not self.buffers.ready(symbol):
+                    self._entries[(symbol, model_hash)] = (key, None)
+                    continue
+                # Clé lue avant les entrées : une barre arrivée entre-temps déclenchera un recalcul
+                stale[symbol] = key
+            if not stale:
+                return
+            symbols, inputs = self.buffers.inputs(stale)
+            if model is None:
+                preds = np.asarray(self.predict_batch(inputs))
+            else:
+                preds = np.asarray(self.predict_batch(inputs, model=model))
+            for symbol, pred in zip(symbols, preds):
+                self._entries[(symbol, model_hash)] = (stale[symbol], float(np.ravel(pred)[0]))
+
+    def get(self, symbol: str) -> Optional[float]:
+        """Prédiction courante du symbole (None si pas assez de données)."""
+        if symbol not in self.buffers.symbol_to_id:
+            return None
+        version = self._version()
+        key = self._key(symbol, version[0])
+        entry = self._entries.get((symbol, version[0]))
+        if entry is None or entry[0] != key:
+            self.refresh(version=version)
+            entry = self._entries.get((symbol, version[0]))
+        return entry[1] if entry is not None else None
@@ -0,0 +1,338 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import json
+from abc import ABC, abstractmethod
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from services.instrumentation import track_fetch
+from services.market_data import (
+    ALPHA_VANTAGE_URL,
+    HTTP_POOL_SIZE,
+    _map_interval_to_alpha_vantage,
+    alpha_vantage_params,
+    fetch_candles_yf,
+    fetch_latest_candles,
+    http_session,
+    parse_alpha_vantage,
+    parse_alpha_vantage_csv,
+)
+
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+
+
+# === LIMITATION DE DÉBIT ET REPRISES ===
+class AsyncRateLimiter:
+    """Seau à jetons : `rate` requêtes par seconde, rafales jusqu'à `burst`, sans bloquer de thread."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def retry_with_backoff(call, retries: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+    """Rejoue `call()` avec un délai exponentiel (avec gigue) : asyncio.sleep, pas time.sleep."""
+    for attempt in range(retries):
+        try:
+            return await call()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if attempt == retries - 1:
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt)
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+
+# === SESSION HTTP ===
+class HttpSession:
+    """
+    Session HTTP partagée par tous les appels d'un fournisseur (connexions keep-alive) :
+    aiohttp si disponible, sinon la session requests poolée de market_data exécutée dans un thread.
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, timeout: float = 15.0):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session = None
+
+    def _client(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def get_json(self, url: str, params: dict) -> dict:
+        if aiohttp is None:
+            return json.loads(await asyncio.to_thread(self._get_text_sync, url, params))
+        async with self._client().get(url, params=params) as resp:
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def get_text(self, url: str, params: dict) -> str:
+        if aiohttp is None:
+            return await asyncio.to_thread(self._get_text_sync, url, params)
+        async with self._client().get(url, params=params) as resp:
+            resp.raise_for_status()
+            return await resp.text()
+
+    def _get_text_sync(self, url: str, params: dict) -> str:
+        resp = http_session().get(url, params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.text
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+# === FOURNISSEURS ===
+class Provider(ABC):
+    """Interface commune : fetch(symbol, period, interval) -> DataFrame OHLCV indexé par date."""
+
+    name = "provider"
+
+    def __init__(self, rate_limiter: Optional[AsyncRateLimiter] = None, retries: int = 3,
+                 base_delay: float = 0.5):
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.base_delay = base_delay
+
+    def supports(self, symbol: str, interval: str) -> bool:
+        return True
+
+    @abstractmethod
+    async def _fetch(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        """Une requête au fournisseur (sans limitation de débit ni reprise)."""
+
+    async def fetch(self, symbol: str, period: str = '1d', interval: str = '1m') -> pd.DataFrame:
+        async def attempt():
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            with track_fetch(self.name):
+                return await self._fetch(symbol, period, interval)
+        return await retry_with_backoff(attempt, retries=self.retries, base_delay=self.base_delay)
+
+
+class AlphaVantageProvider(Provider):
+    name = "alpha_vantage"
+
+    def __init__(self, api_key: str, session: Optional[HttpSession] = None,
+                 requests_per_minute: float = 5.0, **kwargs):
+        # Offre gratuite : 5 requêtes / minute
+        kwargs.setdefault("rate_limiter", AsyncRateLimiter(requests_per_minute / 60.0, burst=int(requests_per_minute)))
+        super().__init__(**kwargs)
+        self.api_key = api_key
+        self.session = session or HttpSession()
+
+    def supports(self, symbol: str, interval: str) -> bool:
+        # AV ne couvre pas les indices (^GSPC, ^FCHI) et n'a que des intervalles intraday ici
+        return bool(self.api_key) and not symbol.startswith('^') \
+            and _map_interval_to_alpha_vantage(interval) is not None
+
+    async def _fetch(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        params = alpha_vantage_params(symbol, interval, self.api_key)
+        if params['datatype'] == 'csv':
+            return parse_alpha_vantage_csv(await self.session.get_text(ALPHA_VANTAGE_URL, params))
+        return parse_alpha_vantage(await self.session.get_json(ALPHA_VANTAGE_URL, params), params['interval'])
+
+
+class YFinanceProvider(Provider):
+    name = "yfinance"
+
+    def __init__(self, requests_per_second: float = 2.0, **kwargs):
+        kwargs.setdefault("rate_limiter", AsyncRateLimiter(requests_per_second, burst=4))
+        super().__init__(**kwargs)
+
+    async def _fetch(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        # yfinance est synchrone : exécuté dans le pool de threads de la boucle
+        return await asyncio.to_thread(fetch_candles_yf, symbol, period, interval)
+
+
+class ReplayProvider(Provider):
+    """
+    Fournisseur hors-ligne : relit des bougies enregistrées dans `directory`
+    (<symbole>.csv au format OHLCV, ou <symbole>.json = réponse Alpha Vantage brute).
+    `delay` simule la latence réseau.
+    """
+
+    name = "replay"
+
+    def __init__(self, directory: Optional[str] = None, history: Optional[Dict[str, pd.DataFrame]] = None,
+                 delay: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.delay = delay
+        self._frames: Dict[str, pd.DataFrame] = dict(history or {})
+
+    def _path(self, symbol: str, ext: str) -> str:
+        return os.path.join(self.directory or "", f"{symbol}.{ext}")
+
+    def supports(self, symbol: str, interval: str) -> bool:
+        return symbol in self._frames or (self.directory is not None and (
+            os.path.exists(self._path(symbol, "csv")) or os.path.exists(self._path(symbol, "json"))))
+
+    def _load(self, symbol: str, interval: str) -> pd.DataFrame:
+        json_path = self._path(symbol, "json")
+        if os.path.exists(json_path):
+            with open(json_path) as f:
+                return parse_alpha_vantage(json.load(f), _map_interval_to_alpha_vantage(interval) or '1min')
+        df = pd.read_csv(self._path(symbol, "csv"))
+        date_col = df.columns[0]
+        return df.set_index(pd.DatetimeIndex(pd.to_datetime(df.pop(date_col)), name='Date')).sort_index()
+
+    async def _fetch(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if symbol not in self._frames:
+            self._frames[symbol] = await asyncio.to_thread(self._load, symbol, interval)
+        return self._frames[symbol][['Open', 'High', 'Low', 'Close', 'Volume']].copy()
+
+
+# === ROUTAGE ET REQUÊTES CONCURRENTES ===
+class ProviderRouter:
+    """
+    Essaie les fournisseurs par ordre de préférence en les « couvrant » :
+    si le premier n'a pas répondu après `hedge_delay` secondes (ou a échoué),
+    le suivant est lancé en parallèle et la première réponse valide gagne.
+    """
+
+    def __init__(self, providers: Sequence[Provider], hedge_delay: float = 2.0):
+        self.providers = list(providers)
+        self.hedge_delay = hedge_delay
+
+    async def fetch(self, symbol: str, period: str = '1d', interval: str = '1m') -> pd.DataFrame:
+        remaining = [p for p in self.providers if p.supports(symbol, interval)]
+        if not remaining:
+            raise RuntimeError(f"Aucun fournisseur pour {symbol} ({interval})")
+        pending = set()
+        last_err: Optional[BaseException] = None
+        try:
+            while remaining or pending:
+                if remaining:
+                    provider = remaining.pop(0)
+                    pending.add(asyncio.ensure_future(provider.fetch(symbol, period=period, interval=interval)))
+                done, pending = await asyncio.wait(
+                    pending, timeout=self.hedge_delay if remaining else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_err = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_err
+
+    async def fetch_many(self, symbols: Iterable[str], period: str = '1d',
+                         interval: str = '1m') -> Dict[str, Union[pd.DataFrame, Exception]]:
+        """Tous les symboles en parallèle : durée ≈ la plus lente des requêtes, pas leur somme."""
+        symbols = list(symbols)
+        results = await asyncio.gather(
+            *(self.fetch(symbol, period=period, interval=interval) for symbol in symbols),
+            return_exceptions=True
+        )
+        return dict(zip(symbols, results))
+
+    def fetch_blocking(self, symbol: str, period: str = '1d', interval: str = '1m') -> pd.DataFrame:
+        """fetch depuis un thread hors boucle (source de market_data.fetch_latest_candles)."""
+        return _loop_thread.run(self.fetch(symbol, period=period, interval=interval))
+
+
+def default_providers() -> List[Provider]:
+    """REPLAY_DATA_DIR=<dossier> : mode hors-ligne ; sinon Alpha Vantage (si clé) puis yfinance."""
+    replay_dir = os.getenv('REPLAY_DATA_DIR')
+    if replay_dir:
+        return [ReplayProvider(replay_dir)]
+    providers: List[Provider] = []
+    api_key = os.getenv('ALPHAVANTAGE_API_KEY')
+    if api_key:
+        providers.append(AlphaVantageProvider(api_key))
+    providers.append(YFinanceProvider())
+    return providers
+
+
+# === PONT SYNCHRONE ===
+class _LoopThread:
+    """Boucle asyncio dédiée (thread démon) pour les appelants synchrones (callbacks Dash, poller)."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _ensure(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="providers-loop", daemon=True).start()
+            return self._loop
+
+    def run(self, coro, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure()).result(timeout)
+
+
+_loop_thread = _LoopThread()
+# Threads de fetch_many_candles : ils attendent surtout le réseau (via la boucle partagée),
+# le pool par défaut d'asyncio (CPU + 4) sérialiserait les symboles sur une petite machine
+_fetch_pool = ThreadPoolExecutor(max_workers=int(os.getenv('PROVIDER_FETCH_THREADS', '32')),
+                                 thread_name_prefix="providers-fetch")
+_router: Optional[ProviderRouter] = None
+
+
+def default_router() -> ProviderRouter:
+    global _router
+    if _router is None:
+        _router = ProviderRouter(default_providers(), hedge_delay=float(os.getenv('PROVIDER_HEDGE_SECONDS', '2')))
+    return _router
+
+
+def fetch_many_candles(symbols: Iterable[str], period: str = '1d', interval: str = '1m',
+                       router: Optional[ProviderRouter] = None,
+                       timeout: Optional[float] = None) -> Dict[str, Union[pd.DataFrame, Exception]]:
+    """
+    Tous les symboles en parallèle via le routeur, chacun passant par fetch_latest_candles
+    (cache TTL et historique local) : même chemin que les appels unitaires.
+    """
+    router = router or default_router()
+    symbols = list(symbols)
+
+    async def fetch_all():
+        # Le cache et l'historique sont synchrones : un thread par symbole,
+        # les requêtes fournisseur repassent par la boucle partagée
+        loop = asyncio.get_running_loop()
+        fetch = partial(fetch_latest_candles, period=period, interval=interval, source=router.fetch_blocking)
+        return await asyncio.gather(
+            *(loop.run_in_executor(_fetch_pool, fetch, symbol) for symbol in symbols),
+            return_exceptions=True
+        )
+
+    return dict(zip(symbols, _loop_thread.run(fetch_all(), timeout)))
@@ -0,0 +1,243 @@
+import json
+import queue
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set
+
+import pandas as pd
+
+from services.market_data import fetch_latest_candles
+
+# Nombre maximal de barres live gardées par symbole (renvoyées à chaque nouvel abonné)
+BACKLOG_BARS = 500
+OHLCV = ("Open", "High", "Low", "Close", "Volume")
+
+
+def candles_payload(symbol: str, candles: pd.DataFrame) -> dict:
+    """Format compact envoyé aux clients : colonnes parallèles, appliquées telles quelles par le Patch du navigateur."""
+    return {
+        "symbol": symbol,
+        "x": [ts.isoformat() for ts in candles.index],
+        "open": candles["Open"].round(6).tolist(),
+        "high": candles["High"].round(6).tolist(),
+        "low": candles["Low"].round(6).tolist(),
+        "close": candles["Close"].round(6).tolist(),
+    }
+
+
+def _normalize_index(candles: pd.DataFrame) -> pd.DataFrame:
+    index = pd.DatetimeIndex(candles.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return candles.set_axis(index)
+
+
+def _bar_values(candles: pd.DataFrame, i: int) -> tuple:
+    """Valeurs OHLCV arrondies d'une barre (détection des mises à jour de la barre en cours)."""
+    return tuple(round(float(candles[col].iloc[i]), 6) for col in OHLCV if col in candles.columns)
+
+
+class CandlePoller:
+    """
+    Un seul thread serveur interroge le fournisseur pour les symboles suivis
+    et pousse uniquement les nouvelles barres aux abonnés (une file par client).
+    La barre en cours de formation est renvoyée (même date : remplacement) tant que
+    ses valeurs OHLCV changent.
+    """
+
+    def __init__(self, fetch: Callable[..., pd.DataFrame] = fetch_latest_candles,
+                 period: str = '5d', interval: str = '1d', poll_seconds: float = 60.0,
+                 fetch_many: Optional[Callable[..., Dict[str, object]]] = None):
+        self.fetch = fetch
+        # fetch_many(symbols, period, interval) -> {symbole: DataFrame | Exception} :
+        # tous les symboles suivis en une passe concurrente (cf. services.providers)
+        self.fetch_many = fetch_many
+        self.period = period
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self._subscribers: Dict[str, Set[queue.Queue]] = {}
+        self._last_ts: Dict[str, pd.Timestamp] = {}
+        self._last_bar: Dict[str, tuple] = {}  # valeurs de la dernière barre diffusée
+        self._backlog: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Appelés avec (symbole, nouvelles barres) depuis le thread de polling ; une barre
+        # de même date que la dernière diffusée la remplace
+        self._listeners: List[Callable[[str, pd.DataFrame], None]] = []
+        self.bytes_sent = 0
+
+    def set_history_end(self, symbol: str, last_ts: pd.Timestamp):
+        """Les barres antérieures ou égales à `last_ts` sont déjà dans le graphique initial."""
+        with self._lock:
+            current = self._last_ts.get(symbol)
+            if current is None or last_ts > current:
+                self._last_ts[symbol] = pd.Timestamp(last_ts)
+
+    def add_listener(self, listener: Callable[[str, pd.DataFrame], None]):
+        """Consommateur serveur des nouvelles barres (ex. tampons d'entrée du modèle)."""
+        self._listeners.append(listener)
+
+    def subscribe(self, symbol: str) -> queue.Queue:
+        q: queue.Queue = queue.Queue(maxsize=1000)
+        with self._lock:
+            self._subscribers.setdefault(symbol, set()).add(q)
+            backlog = list(self._backlog.get(symbol, ()))
+        if backlog:
+            q.put(self._merge(symbol, backlog))
+        self.start()
+        return q
+
+    def unsubscribe(self, symbol: str, q: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[symbol]
+
+    @staticmethod
+    def _merge(symbol: str, payloads: List[dict]) -> dict:
+        # Une barre par date : la dernière version d'une barre remplacée l'emporte
+        bars: Dict[str, tuple] = {}
+        for payload in payloads:
+            for i, x in enumerate(payload["x"]):
+                bars[x] = tuple(payload[key][i] for key in ("open", "high", "low", "close"))
+        merged = {"symbol": symbol, "x": list(bars)}
+        for k, key in enumerate(("open", "high", "low", "close")):
+            merged[key] = [values[k] for values in bars.values()]
+        return merged
+
+    def _fetch_all(self, symbols: List[str]) -> Dict[str, object]:
+        if self.fetch_many is not None:
+            try:
+                return self.fetch_many(symbols, period=self.period, interval=self.interval)
+            except Exception as e:
+                return {symbol: e for symbol in symbols}
+        results = {}
+        for symbol in symbols:
+            try:
+                results[symbol] = self.fetch(symbol, period=self.period, interval=self.interval)
+            except Exception as e:
+                results[symbol] = e
+        return results
+
+    def poll_once(self):
+        """
+        Une passe de polling : une requête par symbole suivi, diffusion des nouvelles barres
+        et de la dernière barre diffusée si ses valeurs ont changé.
+        """
+        with self._lock:
+            symbols = list(self._subscribers)
+        if not symbols:
+            return
+        for symbol, candles in self._fetch_all(symbols).items():
+            if isinstance(candles, Exception):
+                continue
+            candles = _normalize_index(candles)
+            with self._lock:
+                last_ts = self._last_ts.get(symbol)
+                new = candles if last_ts is None else candles[candles.index >= last_ts]
+                if len(new) and new.index[0] == last_ts and _bar_values(new, 0) == self._last_bar.get(symbol):
+                    # Barre déjà diffusée, inchangée
+                    new = new.iloc[1:]
+                if new.empty:
+                    continue
+                self._last_ts[symbol] = new.index[-1]
+                self._last_bar[symbol] = _bar_values(new, len(new) - 1)
+                payload = candles_payload(symbol, new)
+                self._backlog.setdefault(symbol, deque(maxlen=BACKLOG_BARS)).append(payload)
+                subscribers = list(self._subscribers.get(symbol, ()))
+            for listener in self._listeners:
+                try:
+                    listener(symbol, new)
+                except Exception:
+                    # Un consommateur défaillant ne doit pas bloquer la diffusion aux clients
+                    pass
+            for q in subscribers:
+                try:
+                    q.put_nowait(payload)
+                except queue.Full:
+                    # Client trop lent : il recevra le backlog à sa reconnexion
+                    self.unsubscribe(symbol, q)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll_once()
+            self._stop.wait(self.poll_seconds)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="candle-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stream(self, symbol: str, heartbeat: float = 15.0):
+        """Générateur Server-Sent Events pour un client abonné à `symbol`."""
+        q = self.subscribe(symbol)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    payload = q.get(timeout=heartbeat)
+                except queue.Empty:
+                    # Commentaire SSE : garde la connexion ouverte à travers les proxys
+                    yield ": ping\n\n"
+                    continue
+                message = f"data: {json.dumps(payload, separators=(',', ':'))}\n\n"
+                self.bytes_sent += len(message)
+                yield message
+        finally:
+            self.unsubscribe(symbol, q)
+
+
+def blocks_worker(environ: dict) -> bool:
+    """
+    Vrai si une connexion SSE occuperait un worker entier pendant toute sa durée : serveur
+    ni multi-thread (gunicorn gthread, serveur Flask) ni coopératif (gevent / eventlet).
+    """
+    if environ.get("wsgi.multithread"):
+        return False
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched("socket"):
+            return False
+    except ImportError:
+        pass
+    try:
+        from eventlet import patcher
+        if patcher.is_monkey_patched("socket"):
+            return False
+    except ImportError:
+        pass
+    return True
+
+
+def register_stream_routes(server, poller: CandlePoller, allowed_symbols: Optional[Set[str]] = None):
+    """
+    Expose /stream/candles/<symbol> (SSE) sur le serveur Flask de l'application Dash.
+
+    Chaque flux garde sa requête ouverte : STREAMING_MODE suppose des workers gthread
+    (`gunicorn -k gthread --threads N`) ou gevent. Sous des workers sync, quelques onglets
+    bloqueraient toute l'application : le flux est alors refusé (503) et le graphique
+    n'est plus rafraîchi que par interval-graph-update.
+    """
+    from flask import Response, abort, request, stream_with_context
+
+    @server.route("/stream/candles/<symbol>")
+    def stream_candles(symbol):
+        if allowed_symbols is not None and symbol not in allowed_symbols:
+            abort(404)
+        if blocks_worker(request.environ):
+            abort(503, description="STREAMING_MODE nécessite des workers gthread ou gevent "
+                                   "(gunicorn -k gthread --threads N)")
+        return Response(
+            stream_with_context(poller.stream(symbol)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
@@ -0,0 +1,189 @@
+"""
+Balayage de paramètres du signal LSTM sur tous les symboles :
+seuil de confiance (abs(pred) * 1000, en %) x durée de détention (barres).
+
+La grille (symbole x paramètres) est répartie sur un pool de processus :
+- chaque worker charge le modèle une seule fois (initializer, un thread par worker)
+- les séries de prix sont partagées via multiprocessing.shared_memory, sans pickling
+- les tâches d'un même symbole forment un bloc : ses fenêtres ne sont prédites qu'une fois par worker
+
+Usage (depuis la racine du dépôt) :
+    PYTHONPATH="Interface Graphique" python -m services.sweep --workers 4 \\
+        --thresholds 0,0.5,1,2 --holding 1,3,5,10 [--backend onnx] [--out sweep.csv]
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.backtest import bars_per_year, strategy_metrics
+from services.model_inputs import N_TIMESTEPS, SYMBOL_TO_ID, series_windows
+
+MODEL_PATH = "Modèle IA/global_lstm_returns.keras"
+FEATURES_CSV = "Data/ALL_FEATURES.csv"
+
+# Lignes du bloc partagé
+_CLOSE, _DAILY = 0, 1
+
+_worker: Dict[str, object] = {}
+
+
+def evaluate_params(preds: np.ndarray, close: np.ndarray, daily: np.ndarray, min_confidence: float,
+                    holding_days: int, periods_per_year: float, first_end: int) -> dict:
+    """
+    Stratégie pour un jeu de paramètres (vectorisé) :
+    - position = signe de la prédiction si abs(pred) * 1000 >= min_confidence, sinon neutre
+    - chaque signal engage 1/holding_days du capital pendant holding_days barres
+    `first_end` : barre où se termine la première fenêtre (cf. model_inputs.series_windows)
+    """
+    end = first_end
+    close = close[end:]
+    next_return = np.append(daily[end + 1:], np.nan)
+    position = np.where(np.abs(preds) * 1000 >= min_confidence, np.sign(preds), 0.0)
+
+    forward = np.full(len(close), np.nan)
+    forward[:-holding_days] = close[holding_days:] / close[:-holding_days] - 1
+    traded = (position != 0) & ~np.isnan(forward)
+
+    held = np.convolve(position, np.ones(holding_days))[:len(position)] / holding_days
+    valid = ~np.isnan(next_return)
+    row = {
+        "n_signals": len(preds),
+        "n_trades": int(traded.sum()),
+        "exposure": float(np.mean(position != 0)),
+        "hit_rate": float(np.mean(np.sign(forward[traded]) == position[traded])) if traded.any() else float("nan"),
+        "avg_trade_return": float(np.mean(position[traded] * forward[traded])) if traded.any() else float("nan"),
+    }
+    row.update(strategy_metrics(held[valid] * next_return[valid], periods_per_year))
+    return row
+
+
+# === WORKERS ===
+def _setup_worker(data: np.ndarray, layout: Dict[str, tuple], model_path: str, backend: Optional[str], **extra):
+    from services.model_backends import load_backend
+
+    _worker.update(data=data, layout=layout, model=load_backend(model_path, backend), preds={}, **extra)
+
+
+def _init_worker(shm_name: str, shape: Tuple[int, int], layout: Dict[str, tuple],
+                 model_path: str, backend: Optional[str]):
+    # Un seul thread d'inférence par worker : le parallélisme vient des processus
+    os.environ["MODEL_THREADS"] = "1"
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    # Le segment appartient au processus parent, seul à le supprimer (unlink) ; les workers
+    # spawn partagent son resource_tracker et ne font que s'y attacher
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _setup_worker(np.ndarray(shape, dtype=np.float64, buffer=shm.buf), layout, model_path, backend, shm=shm)
+
+
+def _symbol_predictions(symbol: str) -> Tuple[np.ndarray, int]:
+    preds = _worker["preds"]
+    if symbol not in preds:
+        start, stop, symbol_id, _ = _worker["layout"][symbol]
+        windows, first_end = series_windows(_worker["data"][_CLOSE, start:stop])
+        ids = np.full((len(windows), 1), symbol_id)
+        out = np.asarray(_worker["model"].predict_on_batch([windows, ids]), dtype=np.float64)
+        preds[symbol] = out.reshape(len(windows), -1)[:, 0], first_end
+    return preds[symbol]
+
+
+def _evaluate_task(task: Tuple[str, float, int]) -> dict:
+    symbol, min_confidence, holding_days = task
+    start, stop, _, periods_per_year = _worker["layout"][symbol]
+    data = _worker["data"]
+    row = {"symbol": symbol, "min_confidence": min_confidence, "holding_days": holding_days}
+    preds, first_end = _symbol_predictions(symbol)
+    row.update(evaluate_params(preds, data[_CLOSE, start:stop], data[_DAILY, start:stop],
+                               min_confidence, holding_days, periods_per_year, first_end))
+    return row
+
+
+# === EXÉCUTION ===
+def run_sweep(frames: Dict[str, pd.DataFrame], symbol_to_id: Dict[str, int],
+              thresholds: Sequence[float], holding_days: Sequence[int], workers: int = 1,
+              model_path: str = MODEL_PATH, backend: Optional[str] = None) -> pd.DataFrame:
+    """Évalue toute la grille et retourne une ligne par (symbole, seuil, détention)."""
+    symbols = [s for s in sorted(frames) if s in symbol_to_id and len(frames[s]) > N_TIMESTEPS + 1]
+    sizes = [len(frames[s]) for s in symbols]
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    layout = {
+        s: (int(offsets[i]), int(offsets[i + 1]), symbol_to_id[s], bars_per_year(frames[s]["date"].to_numpy()))
+        for i, s in enumerate(symbols)
+    }
+    shape = (2, int(offsets[-1]))
+    tasks = [(s, float(t), int(h)) for s in symbols for t, h in itertools.product(thresholds, holding_days)]
+
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    try:
+        data = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        for s in symbols:
+            start, stop = layout[s][:2]
+            data[_CLOSE, start:stop] = frames[s]["Close"].to_numpy(dtype=np.float64)
+            data[_DAILY, start:stop] = frames[s]["daily_return"].to_numpy(dtype=np.float64)
+
+        # Un bloc de tâches = la grille complète d'un symbole
+        chunksize = max(len(tasks) // max(len(symbols), 1), 1)
+        if workers <= 1:
+            _setup_worker(data, layout, model_path, backend)
+            rows = [_evaluate_task(task) for task in tasks]
+            _worker.clear()
+        else:
+            initargs = (shm.name, shape, layout, model_path, backend)
+            # spawn : pas de fork d'un processus ayant déjà des threads TensorFlow / ONNX Runtime
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                     initializer=_init_worker, initargs=initargs) as executor:
+                rows = list(executor.map(_evaluate_task, tasks, chunksize=chunksize))
+        del data
+    finally:
+        shm.close()
+        shm.unlink()
+    return pd.DataFrame(rows)
+
+
+def summarize(table: pd.DataFrame) -> pd.DataFrame:
+    """Tableau comparatif : moyenne sur les symboles de chaque jeu de paramètres, trié par Sharpe."""
+    summary = table.groupby(["min_confidence", "holding_days"]).agg(
+        hit_rate=("hit_rate", "mean"),
+        cumulative_return=("cumulative_return", "mean"),
+        sharpe=("sharpe", "mean"),
+        max_drawdown=("max_drawdown", "min"),
+        exposure=("exposure", "mean"),
+        n_trades=("n_trades", "sum"),
+    )
+    return summary.sort_values("sharpe", ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--thresholds", default="0,0.5,1,2")
+    parser.add_argument("--holding", default="1,3,5,10")
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    from services.data_store import load_partitions
+
+    frames = load_partitions(FEATURES_CSV, "ALL_FEATURES", parse_dates=["date"])
+    thresholds = [float(x) for x in args.thresholds.split(",")]
+    holding = [int(x) for x in args.holding.split(",")]
+
+    t0 = time.perf_counter()
+    table = run_sweep(frames, SYMBOL_TO_ID, thresholds, holding, workers=args.workers, backend=args.backend)
+    elapsed = time.perf_counter() - t0
+
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(summarize(table).round(4))
+    print(f"{len(table)} combinaisons, {args.workers} worker(s) : {elapsed:.2f} s")
+    if args.out:
+        table.to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
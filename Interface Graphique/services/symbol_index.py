@@ -0,0 +1,83 @@
+import threading
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class SymbolIndex:
+    """
+    Index en mémoire construit au chargement des données :
+    - une tranche contiguë triée par date par symbole
+    - le tableau des dates associé, pour résoudre les périodes par recherche dichotomique
+    - une révision par symbole, incrémentée à chaque fusion de barres live (update)
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], date_col: str = "date"):
+        self.date_col = date_col
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._dates: Dict[str, np.ndarray] = {}
+        self._revisions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for symbol, df in frames.items():
+            if not df[date_col].is_monotonic_increasing:
+                df = df.sort_values(date_col, kind="stable").reset_index(drop=True)
+            self._frames[symbol] = df
+            self._dates[symbol] = df[date_col].to_numpy()
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._frames
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self._frames))
+
+    def symbols(self):
+        return sorted(self._frames)
+
+    def get(self, symbol: str) -> pd.DataFrame:
+        """Historique complet du symbole (vide si inconnu)."""
+        return self._frames.get(symbol, pd.DataFrame())
+
+    def dates(self, symbol: str) -> np.ndarray:
+        return self._dates[symbol]
+
+    def revision(self, symbol: str) -> int:
+        """Nombre de fusions de barres live du symbole (0 : historique chargé)."""
+        return self._revisions.get(symbol, 0)
+
+    def update(self, symbol: str, candles: pd.DataFrame):
+        """
+        Fusionne des bougies (index daté, colonnes OHLCV), par exemple poussées par le
+        CandlePoller : une barre de même date remplace la barre connue, les autres sont
+        ajoutées. Les colonnes absentes des bougies (features) restent vides.
+        """
+        if symbol not in self._frames or candles.empty:
+            return
+        index = pd.DatetimeIndex(candles.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        with self._lock:
+            df = self._frames[symbol]
+            dates = self._dates[symbol]
+            first, last = np.array([index.min().to_datetime64(), index.max().to_datetime64()]).astype(dates.dtype)
+            before = np.searchsorted(dates, first, side="left")
+            after = np.searchsorted(dates, last, side="right")
+            new = pd.DataFrame({col: candles[col].to_numpy() for col in candles.columns if col in df.columns})
+            # Types du store conservés pour les prix (float32)
+            new = new.astype({col: df.dtypes[col] for col in new.columns if df.dtypes[col].kind == "f"})
+            new.insert(0, self.date_col, index.astype(dates.dtype))
+            new = new.sort_values(self.date_col, kind="stable")
+            df = pd.concat([df.iloc[:before], new, df.iloc[after:]], ignore_index=True)
+            # Nouvel objet (jamais modifié sur place) : les lecteurs gardent une vue cohérente
+            self._frames[symbol] = df
+            self._dates[symbol] = df[self.date_col].to_numpy()
+            self._revisions[symbol] = self._revisions.get(symbol, 0) + 1
+
+    def window(self, symbol: str, start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """Lignes du symbole à partir de `start` (vue, sans copie ni parcours complet)."""
+        df = self.get(symbol)
+        if start is None or df.empty:
+            return df
+        dates = self._dates[symbol]
+        i = np.searchsorted(dates, np.datetime64(pd.Timestamp(start).to_datetime64()).astype(dates.dtype), side="left")
+        return df.iloc[i:]
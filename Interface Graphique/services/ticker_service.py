@@ -0,0 +1,120 @@
+import threading
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from services.instrumentation import track_fetch
+
+try:
+    import yfinance as yf
+except Exception:
+    yf = None
+
+
+def replay_download(history: Dict[str, pd.DataFrame]) -> Callable[[List[str]], pd.DataFrame]:
+    """Source hors-ligne : deux dernières clôtures de chaque ticker présent dans `history` ({symbole: bougies})."""
+
+    def download(tickers: List[str]) -> pd.DataFrame:
+        frames = {}
+        for ticker in tickers:
+            if ticker in history:
+                part = history[ticker].tail(2)
+                frames[ticker] = pd.DataFrame({"Close": part["Close"].to_numpy()}, index=part["date"].to_numpy())
+        return pd.concat(frames, axis=1, sort=True)
+
+    return download
+
+
+def _format_quote(label: str, closes: pd.Series) -> dict:
+    closes = closes.dropna()
+    if len(closes) < 2:
+        return {"label": label, "value": "N/A", "change": "down 0.0%", "class": "down"}
+    current = closes.iloc[-1]
+    prev = closes.iloc[-2]
+    change = (current - prev) / prev * 100
+    change_str = f"up {change:.2f}%" if change > 0 else f"down {abs(change):.2f}%"
+    change_class = "up" if change > 0 else "down"
+    return {"label": label, "value": f"{current:,.2f}", "change": change_str, "class": change_class}
+
+
+class TickerService:
+    """
+    Rafraîchit en arrière-plan les cotations du bandeau :
+    - un seul téléchargement groupé pour tous les tickers
+    - un instantané en mémoire lu par les callbacks (aucun appel réseau côté requête)
+    """
+
+    def __init__(self, tickers: Dict[str, str], refresh_seconds: float = 300.0,
+                 download: Optional[Callable[[List[str]], pd.DataFrame]] = None):
+        self.tickers = dict(tickers)
+        self.refresh_seconds = refresh_seconds
+        # Source de substitution (hors-ligne, tests de charge) : même format que yf.download(group_by="ticker")
+        self.download = download
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot = [
+            {"label": label, "value": "N/A", "change": "down 0.0%", "class": "down"}
+            for label in self.tickers.values()
+        ]
+        # Dernière erreur de téléchargement (comptée dans market_data_requests_total)
+        self.last_error: Optional[BaseException] = None
+
+    def _download(self) -> pd.DataFrame:
+        if self.download is not None:
+            return self.download(list(self.tickers))
+        if yf is None:
+            raise RuntimeError("yfinance is not installed. Please install yfinance.")
+        return yf.download(
+            list(self.tickers), period="1d", interval="1m",
+            group_by="ticker", auto_adjust=False, progress=False, threads=False
+        )
+
+    def refresh(self) -> List[dict]:
+        try:
+            with track_fetch("yfinance_tickers"):
+                hist = self._download()
+            data = []
+            for symbol, label in self.tickers.items():
+                try:
+                    data.append(_format_quote(label, hist[symbol]["Close"]))
+                except KeyError:
+                    data.append({"label": label, "value": "N/A", "change": "down 0.0%", "class": "down"})
+        except Exception as e:
+            self.last_error = e
+            # On garde le dernier instantané valide s'il existe
+            if self._ready.is_set():
+                return self.snapshot()
+            data = [
+                {"label": label, "value": "ERR", "change": "down 0.0%", "class": "down"}
+                for label in self.tickers.values()
+            ]
+        else:
+            self.last_error = None
+        with self._lock:
+            self._snapshot = data
+        self._ready.set()
+        return data
+
+    def snapshot(self, wait: float = 0.0) -> List[dict]:
+        """Retourne la dernière cotation connue (attend au plus `wait` s le premier rafraîchissement)."""
+        if wait and not self._ready.is_set():
+            self._ready.wait(wait)
+        with self._lock:
+            return list(self._snapshot)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.refresh_seconds)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ticker-service", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()